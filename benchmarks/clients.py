@@ -0,0 +1,294 @@
+"""
+Сквозной бенчмарк синхронного и асинхронного FinamClient
+на локальном FakeFinamServer.
+
+Измеряются время подключения канала и получения токена сессии,
+пропускная способность и задержка унарных вызовов, количество сообщений стрима в секунду и память
+на одну подписку. Результаты сохраняются в JSON, предыдущий результат
+можно передать через --compare для поиска регрессий.
+
+Запуск: python -m benchmarks.clients [--output result.json]
+    [--compare baseline.json] [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from statistics import median, quantiles
+from time import perf_counter, perf_counter_ns
+
+import grpc
+from google.protobuf import __version__ as protobuf_version
+from google.type.decimal_pb2 import Decimal
+
+from benchmarks.fake_server import FakeFinamServer
+from finam_grpc_client import FinamClient
+from finam_grpc_client.asyncio import FinamClient as AsyncFinamClient
+from finam_grpc_client.proto.grpc.tradeapi.v1.auth.auth_service_pb2 import (
+    SubscribeJwtRenewalRequest,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.auth.auth_service_pb2_grpc import (
+    AuthServiceStub,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    QuoteRequest,
+    SubscribeQuoteRequest,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    Order,
+)
+
+ACCOUNT_ID = "1234567"
+SYMBOL = "YDEX@MISX"
+
+# Метрики, для которых большее значение лучше.
+HIGHER_IS_BETTER = ("rps", "messages_per_second")
+
+
+def _latency(timings: list[int], elapsed: float) -> dict[str, float]:
+    percentiles = quantiles(timings, n=100)
+    return {
+        "rps": len(timings) / elapsed,
+        "p50_us": percentiles[49] / 1000,
+        "p90_us": percentiles[89] / 1000,
+        "p99_us": percentiles[98] / 1000,
+    }
+
+
+def _rss() -> int:
+    """Resident set size процесса в байтах."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _orders(count: int) -> list[Order]:
+    return [
+        Order(
+            account_id=ACCOUNT_ID,
+            symbol=SYMBOL,
+            quantity=Decimal(value="1"),
+            client_order_id=str(i),
+        )
+        for i in range(count)
+    ]
+
+
+def bench_startup(url: str, args: argparse.Namespace) -> dict:
+    """
+    Составляющие запуска клиента: подключение нового канала и первый
+    токен из SubscribeJwtRenewal, которого ждет start(). Сам start()
+    не измеряется: он проверяет токен раз в секунду.
+    """
+    connect, token = [], []
+    for _ in range(args.startups):
+        with grpc.insecure_channel(url) as channel:
+            begin = perf_counter_ns()
+            grpc.channel_ready_future(channel).result(timeout=10)
+            connect.append(perf_counter_ns() - begin)
+            begin = perf_counter_ns()
+            stream = AuthServiceStub(channel).SubscribeJwtRenewal(
+                SubscribeJwtRenewalRequest(secret="secret")
+            )
+            next(stream)
+            token.append(perf_counter_ns() - begin)
+            stream.cancel()
+    return {
+        "connect_us": median(connect) / 1000,
+        "token_us": median(token) / 1000,
+    }
+
+
+def bench_sync(url: str, args: argparse.Namespace) -> dict:
+    result: dict = {}
+    client = FinamClient("secret", url=url, secure=False, rate_limit=None)
+    client.start()
+    try:
+        request = QuoteRequest(symbol=SYMBOL)
+        for _ in range(100):
+            client.last_quote(request)
+        timings = []
+        start = perf_counter()
+        for _ in range(args.unary):
+            begin = perf_counter_ns()
+            client.last_quote(request)
+            timings.append(perf_counter_ns() - begin)
+        result["unary"] = _latency(timings, perf_counter() - start)
+
+        orders = _orders(args.unary)
+        start = perf_counter()
+        client.place_orders(orders, max_in_flight=args.concurrency)
+        result["unary_concurrent"] = {
+            "rps": args.unary / (perf_counter() - start)
+        }
+
+        stream = client.subscribe_quote(
+            SubscribeQuoteRequest(symbols=[SYMBOL])
+        )
+        next(stream)
+        start = perf_counter()
+        for count, _ in enumerate(stream, 1):
+            if count == args.messages:
+                break
+        result["stream"] = {
+            "messages_per_second": args.messages / (perf_counter() - start)
+        }
+        stream.cancel()
+    finally:
+        client.stop()
+    return result
+
+
+async def _bench_async(url: str, args: argparse.Namespace) -> dict:
+    result: dict = {}
+    client = AsyncFinamClient("secret", url=url, secure=False, rate_limit=None)
+    await client.start()
+    try:
+        request = QuoteRequest(symbol=SYMBOL)
+        for _ in range(100):
+            await client.last_quote(request)
+        timings = []
+        start = perf_counter()
+        for _ in range(args.unary):
+            begin = perf_counter_ns()
+            await client.last_quote(request)
+            timings.append(perf_counter_ns() - begin)
+        result["unary"] = _latency(timings, perf_counter() - start)
+
+        orders = _orders(args.unary)
+        start = perf_counter()
+        await client.place_orders(orders, max_in_flight=args.concurrency)
+        result["unary_concurrent"] = {
+            "rps": args.unary / (perf_counter() - start)
+        }
+
+        stream = client.subscribe_quote(
+            SubscribeQuoteRequest(symbols=[SYMBOL])
+        )
+        await stream.read()
+        start = perf_counter()
+        for _ in range(args.messages):
+            await stream.read()
+        result["stream"] = {
+            "messages_per_second": args.messages / (perf_counter() - start)
+        }
+        stream.cancel()
+    finally:
+        await client.stop()
+    return result
+
+
+def bench_async(url: str, args: argparse.Namespace) -> dict:
+    return asyncio.run(_bench_async(url, args))
+
+
+def bench_subscriptions(url: str, args: argparse.Namespace) -> dict:
+    """Прирост RSS на одну открытую подписку синхронного клиента."""
+    with FinamClient("secret", url=url, secure=False) as client:
+        request = SubscribeQuoteRequest(symbols=[SYMBOL])
+        next(client.subscribe_quote(request))
+        before = _rss()
+        streams = []
+        for _ in range(args.subscriptions):
+            stream = client.subscribe_quote(request)
+            next(stream)
+            streams.append(stream)
+        after = _rss()
+        for stream in streams:
+            stream.cancel()
+    return {
+        "subscriptions": args.subscriptions,
+        "bytes_per_subscription": (after - before) / args.subscriptions,
+    }
+
+
+def _flatten(data: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(
+    result: dict, baseline: dict, threshold: float
+) -> list[tuple[str, float, float]]:
+    """
+    Метрики, ухудшившиеся относительно baseline больше чем на threshold.
+
+    :return: Список (метрика, значение в baseline, текущее значение).
+    """
+    current = _flatten(result["results"])
+    regressions = []
+    for name, old in _flatten(baseline["results"]).items():
+        new = current.get(name)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        if name.rsplit(".", 1)[-1] in HIGHER_IS_BETTER:
+            change = -change
+        if change > threshold:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.clients")
+    parser.add_argument("--unary", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--subscriptions", type=int, default=50)
+    parser.add_argument("--startups", type=int, default=20)
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего запуска")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with FakeFinamServer(
+        rate=0, max_workers=args.concurrency + 8, seed=0
+    ) as server:
+        results["startup"] = bench_startup(server.url, args)
+        results["sync"] = bench_sync(server.url, args)
+        results["asyncio"] = bench_async(server.url, args)
+    with FakeFinamServer(
+        rate=10, max_workers=args.subscriptions + 8, seed=0
+    ) as server:
+        results["subscriptions"] = bench_subscriptions(server.url, args)
+
+    result = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "grpcio": grpc.__version__,
+        "protobuf": protobuf_version,
+        "results": results,
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(result, baseline, args.threshold)
+        for name, old, new in regressions:
+            print(
+                f"REGRESSION {name}: {old:.2f} -> {new:.2f}", file=sys.stderr
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
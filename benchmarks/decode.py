@@ -0,0 +1,170 @@
+"""
+Скорость разбора сообщений на разных реализациях protobuf.
+
+Для каждой реализации (upb, cpp, python) запускается отдельный процесс
+с PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION, в котором измеряется
+FromString и SerializeToString для SubscribeOrderBookResponse
+и BarsResponse. Недоступные реализации выводятся как unavailable.
+
+Запуск: python -m benchmarks.decode [--backend upb ...] [--seconds 1]
+    [--output result.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+BACKENDS = ("upb", "cpp", "python")
+
+
+def _messages(depth: int, bars: int) -> dict:
+    from google.protobuf.timestamp_pb2 import Timestamp
+    from google.type.decimal_pb2 import Decimal
+
+    from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+        Bar,
+        BarsResponse,
+        StreamOrderBook,
+        SubscribeOrderBookResponse,
+    )
+
+    timestamp = Timestamp(seconds=1_700_000_000, nanos=123_000_000)
+    rows = []
+    for level in range(1, depth + 1):
+        for price, side in (
+            (100 + level * 0.01, "sell"),
+            (100 - level * 0.01, "buy"),
+        ):
+            rows.append(
+                StreamOrderBook.Row(
+                    price=Decimal(value=f"{price:.2f}"),
+                    action=StreamOrderBook.Row.ACTION_UPDATE,
+                    timestamp=timestamp,
+                    **{f"{side}_size": Decimal(value="10")},
+                )
+            )
+    order_book = SubscribeOrderBookResponse(
+        order_book=[StreamOrderBook(symbol="YDEX@MISX", rows=rows)]
+    )
+    bars_response = BarsResponse(
+        symbol="YDEX@MISX",
+        bars=[
+            Bar(
+                timestamp=Timestamp(seconds=1_700_000_000 + i * 60),
+                open=Decimal(value=f"{100 + i * 0.01:.2f}"),
+                high=Decimal(value=f"{100.05 + i * 0.01:.2f}"),
+                low=Decimal(value=f"{99.95 + i * 0.01:.2f}"),
+                close=Decimal(value=f"{100 + i * 0.01:.2f}"),
+                volume=Decimal(value="100"),
+            )
+            for i in range(bars)
+        ],
+    )
+    return {
+        "SubscribeOrderBookResponse": order_book,
+        "BarsResponse": bars_response,
+    }
+
+
+def _rate(function, payload, seconds: float) -> float:
+    """Количество вызовов в секунду."""
+    calls = 0
+    batch = 1
+    start = perf_counter()
+    while (elapsed := perf_counter() - start) < seconds:
+        for _ in range(batch):
+            function(payload)
+        calls += batch
+        if elapsed < seconds / 10:
+            batch *= 2
+    return calls / (perf_counter() - start)
+
+
+def run(depth: int, bars: int, seconds: float) -> dict:
+    """Замер в текущем процессе."""
+    from finam_grpc_client.protobuf_backend import protobuf_backend
+
+    result = {}
+    for name, message in _messages(depth, bars).items():
+        payload = message.SerializeToString()
+        decode = _rate(type(message).FromString, payload, seconds)
+        encode = _rate(type(message).SerializeToString, message, seconds)
+        result[name] = {
+            "bytes": len(payload),
+            "decode_per_second": decode,
+            "decode_mb_per_second": decode * len(payload) / 1e6,
+            "encode_per_second": encode,
+        }
+    return {"backend": protobuf_backend(), "messages": result}
+
+
+def measure(backend: str, depth: int, bars: int, seconds: float) -> dict:
+    """Замер в отдельном процессе с заданной реализацией protobuf."""
+    env = dict(os.environ, PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=backend)
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.decode",
+            "--child",
+            "--depth",
+            str(depth),
+            "--bars",
+            str(bars),
+            "--seconds",
+            str(seconds),
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if process.returncode:
+        error = process.stderr.strip().splitlines()
+        return {"backend": backend, "unavailable": error[-1] if error else ""}
+    return json.loads(process.stdout)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.decode")
+    parser.add_argument(
+        "--backend", action="append", choices=BACKENDS, dest="backends"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=20, help="Глубина стакана"
+    )
+    parser.add_argument(
+        "--bars", type=int, default=500, help="Количество свечей"
+    )
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run(args.depth, args.bars, args.seconds)))
+        return
+
+    results = []
+    for backend in args.backends or BACKENDS:
+        result = measure(backend, args.depth, args.bars, args.seconds)
+        results.append(result)
+        if "unavailable" in result:
+            print(f"{backend:<7} unavailable: {result['unavailable']}")
+            continue
+        for name, stats in result["messages"].items():
+            print(
+                f"{result['backend']:<7} {name:<27} {stats['bytes']:>7}B "
+                f"decode={stats['decode_per_second']:>10.0f}/s "
+                f"({stats['decode_mb_per_second']:.1f} MB/s) "
+                f"encode={stats['encode_per_second']:>10.0f}/s"
+            )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
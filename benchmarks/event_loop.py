@@ -0,0 +1,158 @@
+"""
+Асинхронный FinamClient на стандартном цикле asyncio и на uvloop.
+
+Для каждого цикла запускается отдельный процесс, который подключается
+к общему FakeFinamServer и измеряет количество сообщений в секунду
+по нескольким одновременным подпискам subscribe_quote и задержку
+последовательных вызовов last_quote. Если uvloop не установлен,
+он выводится как unavailable.
+
+Запуск: python -m benchmarks.event_loop [--loop uvloop ...]
+    [--streams 4] [--messages 20000] [--unary 5000]
+    [--output result.json]
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+from statistics import quantiles
+from time import perf_counter, perf_counter_ns
+
+LOOPS = ("asyncio", "uvloop")
+SYMBOL = "YDEX@MISX"
+
+
+async def _stream(client, messages: int) -> None:
+    from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+        SubscribeQuoteRequest,
+    )
+
+    stream = client.subscribe_quote(
+        request=SubscribeQuoteRequest(symbols=[SYMBOL])
+    )
+    for _ in range(messages):
+        await stream.read()
+    stream.cancel()
+
+
+async def _measure(url: str, args: argparse.Namespace) -> dict:
+    from finam_grpc_client.asyncio import FinamClient
+    from finam_grpc_client.asyncio.event_loop import event_loop_implementation
+    from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+        QuoteRequest,
+    )
+
+    result: dict = {"loop": event_loop_implementation()}
+    async with FinamClient("secret", url=url, secure=False) as client:
+        await _stream(client, 100)
+        start = perf_counter()
+        await asyncio.gather(
+            *(_stream(client, args.messages) for _ in range(args.streams))
+        )
+        elapsed = perf_counter() - start
+        result["stream"] = {
+            "streams": args.streams,
+            "messages_per_second": args.streams * args.messages / elapsed,
+        }
+
+        request = QuoteRequest(symbol=SYMBOL)
+        for _ in range(100):
+            await client.last_quote(request=request)
+        timings = []
+        start = perf_counter()
+        for _ in range(args.unary):
+            begin = perf_counter_ns()
+            await client.last_quote(request=request)
+            timings.append(perf_counter_ns() - begin)
+        elapsed = perf_counter() - start
+        percentiles = quantiles(timings, n=100)
+        result["unary"] = {
+            "rps": args.unary / elapsed,
+            "p50_us": percentiles[49] / 1000,
+            "p90_us": percentiles[89] / 1000,
+            "p99_us": percentiles[98] / 1000,
+        }
+    return result
+
+
+def run(loop: str, url: str, args: argparse.Namespace) -> dict:
+    """Замер в текущем процессе."""
+    from finam_grpc_client.asyncio.event_loop import run as run_in_loop
+
+    return run_in_loop(_measure(url, args), use_uvloop=loop == "uvloop")
+
+
+def measure(loop: str, url: str, args: argparse.Namespace) -> dict:
+    """Замер в отдельном процессе с заданным циклом событий."""
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.event_loop",
+            "--child",
+            url,
+            "--loop",
+            loop,
+            "--streams",
+            str(args.streams),
+            "--messages",
+            str(args.messages),
+            "--unary",
+            str(args.unary),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        error = process.stderr.strip().splitlines()
+        return {"loop": loop, "unavailable": error[-1] if error else ""}
+    return json.loads(process.stdout)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.event_loop")
+    parser.add_argument("--loop", action="append", choices=LOOPS, dest="loops")
+    parser.add_argument(
+        "--streams", type=int, default=4, help="Одновременные подписки"
+    )
+    parser.add_argument(
+        "--messages", type=int, default=20_000, help="Сообщений на подписку"
+    )
+    parser.add_argument("--unary", type=int, default=5000)
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run(args.loops[0], args.child, args)))
+        return
+
+    from benchmarks.fake_server import FakeFinamServer
+
+    results = []
+    with FakeFinamServer(
+        rate=0, max_workers=args.streams + 8, seed=0
+    ) as server:
+        for loop in args.loops or LOOPS:
+            result = measure(loop, server.url, args)
+            results.append(result)
+            if "unavailable" in result:
+                print(f"{loop:<7} unavailable: {result['unavailable']}")
+                continue
+            stream, unary = result["stream"], result["unary"]
+            print(
+                f"{result['loop']:<7} "
+                f"stream={stream['messages_per_second']:>9.0f} msg/s "
+                f"unary p50={unary['p50_us']:>7.0f}us "
+                f"p99={unary['p99_us']:>7.0f}us "
+                f"rps={unary['rps']:>6.0f}"
+            )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
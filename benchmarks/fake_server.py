@@ -0,0 +1,604 @@
+import base64
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent import futures
+from typing import Iterator, Mapping, Self
+
+import grpc
+from google.protobuf.message import Message
+from google.protobuf.timestamp_pb2 import Timestamp
+from google.type.decimal_pb2 import Decimal
+
+from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+    GetAccountResponse,
+    Position,
+    TradesResponse,
+    TransactionsResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2_grpc import (
+    AccountsServiceServicer,
+    add_AccountsServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+    ClockResponse,
+    Exchange,
+    ExchangesResponse,
+    GetAssetParamsResponse,
+    GetAssetResponse,
+    Longable,
+    ScheduleResponse,
+    Shortable,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2_grpc import (
+    AssetsServiceServicer,
+    add_AssetsServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.auth.auth_service_pb2 import (
+    AuthResponse,
+    SubscribeJwtRenewalResponse,
+    TokenDetailsResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.auth.auth_service_pb2_grpc import (
+    AuthServiceServicer,
+    add_AuthServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    Bar,
+    BarsResponse,
+    OrderBookResponse,
+    Quote,
+    QuoteResponse,
+    StreamOrderBook,
+    SubscribeBarsResponse,
+    SubscribeOrderBookResponse,
+    SubscribeQuoteResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2_grpc import (
+    MarketDataServiceServicer,
+    add_MarketDataServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.metrics.usage_metrics_service_pb2 import (
+    GetUsageMetricsResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.metrics.usage_metrics_service_pb2_grpc import (
+    UsageMetricsServiceServicer,
+    add_UsageMetricsServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    ORDER_STATUS_CANCELED,
+    ORDER_STATUS_FILLED,
+    ORDER_STATUS_NEW,
+    ORDER_TYPE_MARKET,
+    OrdersResponse,
+    OrderState,
+    SubscribeOrdersResponse,
+    SubscribeTradesResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2_grpc import (
+    OrdersServiceServicer,
+    add_OrdersServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.side_pb2 import SIDE_BUY
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+from finam_grpc_client.recording import RecordReader, replay_schedule
+
+logger = logging.getLogger("benchmarks.FakeFinamServer")
+
+
+def _now() -> Timestamp:
+    timestamp = Timestamp()
+    timestamp.GetCurrentTime()
+    return timestamp
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_jwt(subject: str, ttl: float) -> str:
+    """Неподписанный JWT с полями sub и exp."""
+    header = _b64(json.dumps({"alg": "none", "typ": "JWT"}).encode())
+    payload = _b64(
+        json.dumps({"sub": subject, "exp": int(time.time() + ttl)}).encode()
+    )
+    return f"{header}.{payload}."
+
+
+class _Pacer:
+    """Равномерная выдача сообщений с заданной частотой."""
+
+    def __init__(self, rate: float) -> None:
+        self.__interval = 1 / rate if rate > 0 else 0.0
+        self.__next = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.__interval:
+            return
+        self.__next += self.__interval
+        delay = self.__next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeAuthService(AuthServiceServicer):
+    def __init__(self, token_ttl: float, renewal_interval: float) -> None:
+        self.token_ttl = token_ttl
+        self.renewal_interval = renewal_interval
+
+    def Auth(self, request, context):
+        return AuthResponse(token=make_jwt(request.secret, self.token_ttl))
+
+    def TokenDetails(self, request, context):
+        expires_at = Timestamp()
+        expires_at.FromNanoseconds(
+            time.time_ns() + int(self.token_ttl * 1_000_000_000)
+        )
+        return TokenDetailsResponse(
+            created_at=_now(), expires_at=expires_at, account_ids=["FAKE"]
+        )
+
+    def SubscribeJwtRenewal(self, request, context):
+        done = threading.Event()
+        context.add_callback(done.set)
+        while not done.is_set():
+            yield SubscribeJwtRenewalResponse(
+                token=make_jwt(request.secret, self.token_ttl)
+            )
+            done.wait(self.renewal_interval)
+
+
+class FakeAssetsService(AssetsServiceServicer):
+    def Clock(self, request, context):
+        return ClockResponse(timestamp=_now())
+
+    def Exchanges(self, request, context):
+        return ExchangesResponse(
+            exchanges=[Exchange(mic="MISX", name="Moscow Exchange")]
+        )
+
+    def GetAsset(self, request, context):
+        ticker, _, mic = request.symbol.partition("@")
+        return GetAssetResponse(
+            id=request.symbol,
+            ticker=ticker,
+            mic=mic,
+            decimals=2,
+            min_step=1,
+            lot_size=Decimal(value="1"),
+        )
+
+    def GetAssetParams(self, request, context):
+        params = GetAssetParamsResponse(
+            symbol=request.symbol,
+            account_id=request.account_id,
+            longable=Longable(value=Longable.AVAILABLE),
+            shortable=Shortable(value=Shortable.AVAILABLE),
+        )
+        params.is_tradable.value = True
+        return params
+
+    def Schedule(self, request, context):
+        return ScheduleResponse(symbol=request.symbol)
+
+
+class FakeMarketDataService(MarketDataServiceServicer):
+    """
+    Синтетические котировки, свечи и стаканы со случайным блужданием цены.
+
+    Если для метода задан файл записи, стрим воспроизводится из него.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        records: Mapping[str, str],
+        replay_speed: float | None,
+        seed: int | None,
+    ) -> None:
+        self.rate = rate
+        self.records = dict(records)
+        self.replay_speed = replay_speed
+        self.__random = random.Random(seed)
+        self.__prices: dict[str, float] = {}
+        self.__lock = threading.Lock()
+
+    def price(self, symbol: str) -> float:
+        with self.__lock:
+            price = self.__prices.get(symbol, 100.0)
+            price = round(max(price + self.__random.gauss(0, 0.05), 0.01), 2)
+            self.__prices[symbol] = price
+        return price
+
+    def quote(self, symbol: str) -> Quote:
+        price = self.price(symbol)
+        return Quote(
+            symbol=symbol,
+            timestamp=_now(),
+            bid=Decimal(value=f"{price - 0.01:.2f}"),
+            ask=Decimal(value=f"{price + 0.01:.2f}"),
+            last=Decimal(value=f"{price:.2f}"),
+            bid_size=Decimal(value="10"),
+            ask_size=Decimal(value="10"),
+            last_size=Decimal(value="1"),
+        )
+
+    def bar(self, symbol: str) -> Bar:
+        price = self.price(symbol)
+        return Bar(
+            timestamp=_now(),
+            open=Decimal(value=f"{price:.2f}"),
+            high=Decimal(value=f"{price + 0.05:.2f}"),
+            low=Decimal(value=f"{price - 0.05:.2f}"),
+            close=Decimal(value=f"{price:.2f}"),
+            volume=Decimal(value="100"),
+        )
+
+    def order_book(self, symbol: str, depth: int = 10) -> StreamOrderBook:
+        price = self.price(symbol)
+        timestamp = _now()
+        rows = []
+        for level in range(1, depth + 1):
+            rows.append(
+                StreamOrderBook.Row(
+                    price=Decimal(value=f"{price + level * 0.01:.2f}"),
+                    sell_size=Decimal(value="10"),
+                    action=StreamOrderBook.Row.ACTION_UPDATE,
+                    timestamp=timestamp,
+                )
+            )
+            rows.append(
+                StreamOrderBook.Row(
+                    price=Decimal(value=f"{price - level * 0.01:.2f}"),
+                    buy_size=Decimal(value="10"),
+                    action=StreamOrderBook.Row.ACTION_UPDATE,
+                    timestamp=timestamp,
+                )
+            )
+        return StreamOrderBook(symbol=symbol, rows=rows)
+
+    def LastQuote(self, request, context):
+        return QuoteResponse(
+            symbol=request.symbol, quote=self.quote(request.symbol)
+        )
+
+    def Bars(self, request, context):
+        return BarsResponse(
+            symbol=request.symbol,
+            bars=[self.bar(request.symbol) for _ in range(100)],
+        )
+
+    def OrderBook(self, request, context):
+        book = self.order_book(request.symbol)
+        response = OrderBookResponse(symbol=request.symbol)
+        for row in book.rows:
+            response.orderbook.rows.add().MergeFromString(
+                row.SerializeToString()
+            )
+        return response
+
+    def SubscribeQuote(self, request, context):
+        return self.__stream(
+            "subscribe_quote",
+            context,
+            lambda: SubscribeQuoteResponse(
+                quote=[self.quote(symbol) for symbol in request.symbols]
+            ),
+        )
+
+    def SubscribeBars(self, request, context):
+        return self.__stream(
+            "subscribe_bars",
+            context,
+            lambda: SubscribeBarsResponse(
+                symbol=request.symbol, bars=[self.bar(request.symbol)]
+            ),
+        )
+
+    def SubscribeOrderBook(self, request, context):
+        return self.__stream(
+            "subscribe_order_book",
+            context,
+            lambda: SubscribeOrderBookResponse(
+                order_book=[self.order_book(request.symbol)]
+            ),
+        )
+
+    def __stream(self, method, context, make) -> Iterator[Message]:
+        path = self.records.get(method)
+        if path is not None:
+            with RecordReader(path) as reader:
+                for delay, message in replay_schedule(
+                    reader, self.replay_speed
+                ):
+                    if not context.is_active():
+                        return
+                    if delay > 0:
+                        time.sleep(delay)
+                    yield message
+            return
+        pacer = _Pacer(self.rate)
+        while context.is_active():
+            yield make()
+            pacer.wait()
+
+
+class FakeOrdersService(OrdersServiceServicer):
+    """
+    Прием заявок с имитацией исполнения.
+
+    Рыночные заявки исполняются сразу, остальные - через fill_delay
+    секунд по лимитной цене. Состояния и сделки рассылаются
+    подписчикам SubscribeOrders и SubscribeTrades.
+    """
+
+    def __init__(
+        self, market_data: FakeMarketDataService, fill_delay: float | None
+    ) -> None:
+        self.market_data = market_data
+        self.fill_delay = fill_delay
+        self.__ids = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.__orders: dict[str, OrderState] = {}
+        self.__order_queues: list[tuple[str, queue.SimpleQueue]] = []
+        self.__trade_queues: list[tuple[str, queue.SimpleQueue]] = []
+        self.trades: list[AccountTrade] = []
+
+    def PlaceOrder(self, request, context):
+        order_id = str(next(self.__ids))
+        state = OrderState(
+            order_id=order_id,
+            exec_id=order_id,
+            status=ORDER_STATUS_NEW,
+            order=request,
+            transact_at=_now(),
+        )
+        self.__update(state)
+        if request.type == ORDER_TYPE_MARKET or self.fill_delay == 0:
+            self.__fill(order_id)
+        elif self.fill_delay is not None:
+            timer = threading.Timer(self.fill_delay, self.__fill, (order_id,))
+            timer.daemon = True
+            timer.start()
+        return state
+
+    def CancelOrder(self, request, context):
+        with self.__lock:
+            state = self.__orders.get(request.order_id)
+        if state is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "order not found")
+        if state.status != ORDER_STATUS_NEW:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION, "order is not active"
+            )
+        cancelled = OrderState()
+        cancelled.CopyFrom(state)
+        cancelled.status = ORDER_STATUS_CANCELED
+        cancelled.withdraw_at.CopyFrom(_now())
+        self.__update(cancelled)
+        return cancelled
+
+    def GetOrders(self, request, context):
+        with self.__lock:
+            orders = [
+                state
+                for state in self.__orders.values()
+                if state.order.account_id == request.account_id
+            ]
+        return OrdersResponse(orders=orders)
+
+    def GetOrder(self, request, context):
+        with self.__lock:
+            state = self.__orders.get(request.order_id)
+        if state is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "order not found")
+        return state
+
+    def SubscribeOrders(self, request, context):
+        return self.__subscribe(
+            self.__order_queues,
+            request.account_id,
+            context,
+            lambda state: SubscribeOrdersResponse(orders=[state]),
+        )
+
+    def SubscribeTrades(self, request, context):
+        return self.__subscribe(
+            self.__trade_queues,
+            request.account_id,
+            context,
+            lambda trade: SubscribeTradesResponse(trades=[trade]),
+        )
+
+    def __subscribe(self, queues, account_id, context, make):
+        events: queue.SimpleQueue = queue.SimpleQueue()
+        entry = (account_id, events)
+        with self.__lock:
+            queues.append(entry)
+        try:
+            while context.is_active():
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                yield make(event)
+        finally:
+            with self.__lock:
+                queues.remove(entry)
+
+    def __update(self, state: OrderState) -> None:
+        with self.__lock:
+            self.__orders[state.order_id] = state
+            queues = list(self.__order_queues)
+        self.__publish(queues, state.order.account_id, state)
+
+    def __fill(self, order_id: str) -> None:
+        with self.__lock:
+            state = self.__orders.get(order_id)
+        if state is None or state.status != ORDER_STATUS_NEW:
+            return
+        order = state.order
+        price = order.limit_price.value or (
+            f"{self.market_data.price(order.symbol):.2f}"
+        )
+        trade = AccountTrade(
+            trade_id=f"T{order_id}",
+            symbol=order.symbol,
+            price=Decimal(value=price),
+            size=order.quantity,
+            side=order.side or SIDE_BUY,
+            timestamp=_now(),
+            order_id=order_id,
+            account_id=order.account_id,
+        )
+        filled = OrderState()
+        filled.CopyFrom(state)
+        filled.status = ORDER_STATUS_FILLED
+        self.__update(filled)
+        with self.__lock:
+            self.trades.append(trade)
+            queues = list(self.__trade_queues)
+        self.__publish(queues, order.account_id, trade)
+
+    @staticmethod
+    def __publish(queues, account_id: str, event) -> None:
+        for subscriber, events in queues:
+            if subscriber == account_id:
+                events.put(event)
+
+
+class FakeAccountsService(AccountsServiceServicer):
+    def __init__(self, orders: FakeOrdersService) -> None:
+        self.orders = orders
+
+    def GetAccount(self, request, context):
+        positions: dict[str, float] = {}
+        for trade in list(self.orders.trades):
+            if trade.account_id != request.account_id:
+                continue
+            size = float(trade.size.value or 0)
+            if trade.side != SIDE_BUY:
+                size = -size
+            positions[trade.symbol] = positions.get(trade.symbol, 0) + size
+        return GetAccountResponse(
+            account_id=request.account_id,
+            type="FAKE",
+            status="ACTIVE",
+            positions=[
+                Position(symbol=symbol, quantity=Decimal(value=f"{quantity}"))
+                for symbol, quantity in positions.items()
+            ],
+        )
+
+    def Trades(self, request, context):
+        start = request.interval.start_time.ToNanoseconds()
+        end = request.interval.end_time.ToNanoseconds()
+        trades = [
+            trade
+            for trade in list(self.orders.trades)
+            if trade.account_id == request.account_id
+            and start <= trade.timestamp.ToNanoseconds() < end
+        ]
+        if request.limit:
+            trades = trades[: request.limit]
+        return TradesResponse(trades=trades)
+
+    def Transactions(self, request, context):
+        return TransactionsResponse()
+
+
+class FakeUsageMetricsService(UsageMetricsServiceServicer):
+    def GetUsageMetrics(self, request, context):
+        return GetUsageMetricsResponse()
+
+
+class FakeFinamServer:
+    """
+    Локальный gRPC сервер, имитирующий API Finam, для нагрузочного
+    тестирования и бенчмарков.
+
+    Выдает JWT через SubscribeJwtRenewal, отдает синтетические
+    или записанные стримы рыночных данных с заданной частотой
+    и имитирует исполнение заявок. Работает без TLS, поэтому клиент
+    нужно создавать с secure=False.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate: float = 100.0,
+        records: Mapping[str, str] | None = None,
+        replay_speed: float | None = 1.0,
+        fill_delay: float | None = 0.0,
+        token_ttl: float = 900.0,
+        renewal_interval: float = 600.0,
+        max_workers: int = 32,
+        seed: int | None = None,
+    ) -> None:
+        """
+        :param host: Адрес для прослушивания.
+        :param port: Порт. 0 - выбрать свободный.
+        :param rate: Частота сообщений в синтетических стримах, шт/сек.
+            0 - без ограничения.
+        :param records: Файлы записей recording() для стримов,
+            например {"subscribe_quote": "quotes.log"}.
+        :param replay_speed: Скорость воспроизведения записей.
+        :param fill_delay: Задержка исполнения не рыночных заявок, сек.
+            None - не исполнять.
+        :param token_ttl: Время жизни выдаваемого токена, сек.
+        :param renewal_interval: Период выдачи новых токенов, сек.
+        :param max_workers: Количество потоков сервера. Каждый открытый
+            стрим занимает один поток.
+        :param seed: Начальное значение генератора цен.
+        """
+        self.market_data = FakeMarketDataService(
+            rate, records or {}, replay_speed, seed
+        )
+        self.orders = FakeOrdersService(self.market_data, fill_delay)
+        self.__server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=max_workers)
+        )
+        add_AuthServiceServicer_to_server(
+            FakeAuthService(token_ttl, renewal_interval), self.__server
+        )
+        add_AssetsServiceServicer_to_server(FakeAssetsService(), self.__server)
+        add_MarketDataServiceServicer_to_server(
+            self.market_data, self.__server
+        )
+        add_OrdersServiceServicer_to_server(self.orders, self.__server)
+        add_AccountsServiceServicer_to_server(
+            FakeAccountsService(self.orders), self.__server
+        )
+        add_UsageMetricsServiceServicer_to_server(
+            FakeUsageMetricsService(), self.__server
+        )
+        self.__port = self.__server.add_insecure_port(f"{host}:{port}")
+        self.__host = host
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """Адрес для параметра url клиента."""
+        return f"{self.__host}:{self.__port}"
+
+    def start(self) -> None:
+        """Запуск сервера."""
+        self.__server.start()
+        logger.info("FakeFinamServer is listening on %s", self.url)
+
+    def stop(self, grace: float | None = None) -> None:
+        """Остановка сервера."""
+        self.__server.stop(grace).wait()
+        logger.info("FakeFinamServer has stopped")
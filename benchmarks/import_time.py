@@ -0,0 +1,91 @@
+"""
+Время холодного импорта клиента по данным python -X importtime.
+
+Каждый замер выполняется в отдельном процессе. Выводится медиана
+суммарного времени, количество загруженных модулей *_pb2 и самые
+медленные модули последнего запуска.
+
+Запуск: python -m benchmarks.import_time [модуль] [--runs N] [--top N]
+    [--output result.json]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from statistics import median
+
+SCRIPT = (
+    "import sys; import {module}; "
+    "print(sum(name.endswith('_pb2') for name in sys.modules))"
+)
+
+
+def measure(module: str) -> tuple[int, int, list[tuple[int, str]]]:
+    """
+    Один запуск импорта.
+
+    :return: Суммарное время в мкс, количество модулей *_pb2 и список
+        (собственное время в мкс, имя модуля).
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            SCRIPT.format(module=module),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((int(self_us), name.strip()))
+        if not name.startswith("  "):
+            total += int(cumulative_us)
+    return total, int(result.stdout), modules
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time")
+    parser.add_argument(
+        "module", nargs="?", default="finam_grpc_client.client"
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    args = parser.parse_args(argv)
+
+    totals = []
+    for _ in range(args.runs):
+        total, pb2_modules, modules = measure(args.module)
+        totals.append(total)
+    print(f"import {args.module}")
+    print(
+        f"median={median(totals) / 1000:.1f}ms min={min(totals) / 1000:.1f}ms"
+    )
+    print(f"pb2 modules={pb2_modules}")
+    for self_us, name in sorted(modules, reverse=True)[: args.top]:
+        print(f"{self_us / 1000:8.2f}ms {name}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "module": args.module,
+                    "median_ms": median(totals) / 1000,
+                    "min_ms": min(totals) / 1000,
+                    "pb2_modules": pb2_modules,
+                },
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Задержка отправки PlaceOrder: Order, собираемый с нуля, и OrderTemplate.
+
+Запуск: python -m benchmarks.place_order [количество заявок]
+"""
+
+import sys
+from concurrent import futures
+from statistics import quantiles
+from time import perf_counter_ns
+
+import grpc
+from google.type.decimal_pb2 import Decimal
+
+from finam_grpc_client import OrderTemplate
+from finam_grpc_client.base import PLACE_ORDER_METHOD
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    ORDER_TYPE_LIMIT,
+    TIME_IN_FORCE_DAY,
+    Order,
+    OrderState,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2_grpc import (
+    OrdersServiceServicer,
+    OrdersServiceStub,
+    add_OrdersServiceServicer_to_server,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.side_pb2 import SIDE_BUY
+
+ACCOUNT_ID = "1234567"
+SYMBOL = "YDEX@MISX"
+
+
+class _OrdersServicer(OrdersServiceServicer):
+    def PlaceOrder(self, request, context):
+        return OrderState(order_id="1", order=request)
+
+
+def _full_order(i: int) -> Order:
+    return Order(
+        account_id=ACCOUNT_ID,
+        symbol=SYMBOL,
+        quantity=Decimal(value="10"),
+        side=SIDE_BUY,
+        type=ORDER_TYPE_LIMIT,
+        time_in_force=TIME_IN_FORCE_DAY,
+        limit_price=Decimal(value=f"{4000 + i % 100}.5"),
+        client_order_id=str(i),
+    )
+
+
+def _measure(name: str, send, count: int) -> None:
+    timings = []
+    for i in range(count):
+        start = perf_counter_ns()
+        send(i)
+        timings.append(perf_counter_ns() - start)
+    percentiles = quantiles(timings, n=100)
+    print(
+        f"{name:<10} p50={percentiles[49] / 1000:8.1f}us "
+        f"p99={percentiles[98] / 1000:8.1f}us"
+    )
+
+
+def main(count: int = 10_000) -> None:
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    add_OrdersServiceServicer_to_server(_OrdersServicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    template = OrderTemplate(_full_order(0))
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        stub = OrdersServiceStub(channel)
+        place_order_bytes = channel.unary_unary(
+            PLACE_ORDER_METHOD, response_deserializer=OrderState.FromString
+        )
+        for _ in range(2):
+            _measure("order", lambda i: stub.PlaceOrder(_full_order(i)), count)
+            _measure(
+                "template",
+                lambda i: place_order_bytes(
+                    template.build(
+                        "10", str(i), limit_price=f"{4000 + i % 100}.5"
+                    )
+                ),
+                count,
+            )
+        _measure("build", lambda i: _full_order(i).SerializeToString(), count)
+        _measure(
+            "build_tpl",
+            lambda i: template.build(
+                "10", str(i), limit_price=f"{4000 + i % 100}.5"
+            ),
+            count,
+        )
+    server.stop(None)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
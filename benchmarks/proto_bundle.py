@@ -0,0 +1,101 @@
+"""
+Проверка и сравнение сборок proto-модулей.
+
+В отдельном процессе импортируются все *_service_pb2_grpc модули
+и считаются загруженные proto-файлы, типы сообщений, размер
+сериализованных дескрипторов, прирост RSS и время импорта.
+С флагом --lean проверяется, что сборка из update_proto.sh --lean
+не загружает модули protoc_gen_openapiv2 (иначе код возврата 1).
+
+Запуск: python -m benchmarks.proto_bundle [--path каталог] [--lean]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+SERVICES = (
+    "accounts.accounts_service_pb2_grpc",
+    "assets.assets_service_pb2_grpc",
+    "auth.auth_service_pb2_grpc",
+    "marketdata.marketdata_service_pb2_grpc",
+    "metrics.usage_metrics_service_pb2_grpc",
+    "orders.orders_service_pb2_grpc",
+)
+
+SCRIPT = """
+import importlib, json, os, sys, time
+
+def rss():
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+import google.protobuf.descriptor_pool
+before = rss()
+start = time.perf_counter()
+for name in {services!r}:
+    importlib.import_module("finam_grpc_client.proto.grpc.tradeapi.v1." + name)
+elapsed = time.perf_counter() - start
+
+def count_messages(messages):
+    return sum(1 + count_messages(m.nested_types) for m in messages)
+
+files = {{}}
+for module in list(sys.modules.values()):
+    descriptor = getattr(module, "DESCRIPTOR", None)
+    if getattr(descriptor, "serialized_pb", None) is not None:
+        files[descriptor.name] = descriptor
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "rss_bytes": rss() - before,
+    "files": len(files),
+    "messages": sum(
+        count_messages(f.message_types_by_name.values())
+        for f in files.values()
+    ),
+    "descriptor_bytes": sum(len(f.serialized_pb) for f in files.values()),
+    "openapiv2_files": sorted(n for n in files if "openapiv2" in n),
+}}))
+"""
+
+
+def measure(path: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(services=SERVICES)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=path,
+    )
+    return json.loads(result.stdout)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.proto_bundle")
+    parser.add_argument(
+        "--path",
+        default=".",
+        help="Каталог, содержащий пакет finam_grpc_client",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Проверить, что openapiv2 не загружается",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.path) for _ in range(args.runs)]
+    result = runs[-1]
+    result["import_ms"] = min(run["import_ms"] for run in runs)
+    result["rss_bytes"] = min(run["rss_bytes"] for run in runs)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.lean and result["openapiv2_files"]:
+        print("openapiv2 descriptors are loaded", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
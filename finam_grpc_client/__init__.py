@@ -1 +1,70 @@
-from .client import FinamClient
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Имя recording совпадает с именем подмодуля, поэтому он загружается
+# сразу: иначе импорт finam_grpc_client.recording из другого места
+# оставил бы в атрибуте пакета модуль вместо функции. Модуль зависит
+# только от рантайма protobuf и не загружает сгенерированные файлы.
+from .recording import RecordReader, RecordWriter, ReplayClient, recording
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
+    from .client import FinamClient
+    from .connectivity import ResubscribingStream, resubscribing
+    from .draining import ClientStoppingError
+    from .instrumentation import Instrumentation, MetricsRegistry
+    from .journal import TradeJournal
+    from .order_template import OrderTemplate
+    from .portfolio import PortfolioTracker, PositionSnapshot
+    from .protobuf_backend import SlowProtobufBackendError
+    from .timestamps import TimestampedBatch, timestamped, timestamps_ns
+    from .validation import (
+        InstrumentRules,
+        OrderValidationError,
+        OrderValidator,
+    )
+
+# Модули загружаются при первом обращении к имени, чтобы импорт
+# пакета (в том числе неявный, при импорте proto-модулей) не тянул
+# за собой все сгенерированные дескрипторы.
+_EXPORTS = {
+    "ResponseCache": ".cache",
+    "FinamClient": ".client",
+    "ResubscribingStream": ".connectivity",
+    "resubscribing": ".connectivity",
+    "ClientStoppingError": ".draining",
+    "Instrumentation": ".instrumentation",
+    "MetricsRegistry": ".instrumentation",
+    "TradeJournal": ".journal",
+    "OrderTemplate": ".order_template",
+    "PortfolioTracker": ".portfolio",
+    "PositionSnapshot": ".portfolio",
+    "SlowProtobufBackendError": ".protobuf_backend",
+    "TimestampedBatch": ".timestamps",
+    "timestamped": ".timestamps",
+    "timestamps_ns": ".timestamps",
+    "InstrumentRules": ".validation",
+    "OrderValidationError": ".validation",
+    "OrderValidator": ".validation",
+}
+
+__all__ = [
+    *_EXPORTS,
+    "RecordReader",
+    "RecordWriter",
+    "ReplayClient",
+    "recording",
+]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1 +1,39 @@
-from .client import FinamClient
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .bookkeeper import OrderBookkeeper
+    from .client import FinamClient
+    from .connectivity import ResubscribingStream, resubscribing
+    from .dispatcher import EventDispatcher
+    from .event_loop import UnsupportedEventLoopError, UvloopRequiredError, run
+    from .journal import AsyncTradeJournal
+    from .replay import AsyncReplayClient
+
+_EXPORTS = {
+    "OrderBookkeeper": ".bookkeeper",
+    "FinamClient": ".client",
+    "ResubscribingStream": ".connectivity",
+    "resubscribing": ".connectivity",
+    "EventDispatcher": ".dispatcher",
+    "UnsupportedEventLoopError": ".event_loop",
+    "UvloopRequiredError": ".event_loop",
+    "run": ".event_loop",
+    "AsyncTradeJournal": ".journal",
+    "AsyncReplayClient": ".replay",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+from asyncio import Future, Task, create_task
+from collections import defaultdict
+from decimal import Decimal
+from typing import Collection, Self
+
+from grpc import RpcError
+
+from finam_grpc_client.asyncio.client import FinamClient
+from finam_grpc_client.base import (
+    SUBSCRIBE_ORDERS_METHOD,
+    SUBSCRIBE_TRADES_METHOD,
+)
+from finam_grpc_client.order_status import FINAL_STATUSES
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    OrdersRequest,
+    OrderState,
+    SubscribeOrdersRequest,
+    SubscribeTradesRequest,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+type _WaiterKey = tuple[str, str]
+
+
+class OrderBookkeeper:
+    """
+    Локальное состояние заявок счета.
+
+    Синхронизируется со стримами subscribe_orders и subscribe_trades,
+    при запуске сверяется с get_orders. Позволяет дождаться нужного
+    статуса заявки без опроса API.
+    """
+
+    logger = logging.getLogger("finam_grpc_client.asyncio.OrderBookkeeper")
+
+    def __init__(
+        self,
+        client: FinamClient,
+        account_id: str,
+        *,
+        reconnect_delay: float = 10,
+    ) -> None:
+        """
+        :param client: Запущенный асинхронный клиент.
+        :param account_id: Идентификатор счета.
+        :param reconnect_delay: Пауза перед переподключением стрима, сек.
+            Если соединение канала восстановилось раньше, стрим
+            переподключается сразу.
+        """
+        self.__client = client
+        self.__account_id = account_id
+        self.__reconnect_delay = reconnect_delay
+        self.__orders: dict[str, OrderState] = {}
+        self.__client_order_ids: dict[str, str] = {}
+        self.__trades: defaultdict[str, list[AccountTrade]] = defaultdict(list)
+        self.__trade_ids: set[str] = set()
+        self.__waiters: defaultdict[
+            _WaiterKey, list[tuple[Collection[int], Future[OrderState]]]
+        ] = defaultdict(list)
+        self.__jobs: list[Task] = []
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    @property
+    def account_id(self) -> str:
+        """Идентификатор счета."""
+        return self.__account_id
+
+    @property
+    def started(self) -> bool:
+        """Запущена ли синхронизация."""
+        return bool(self.__jobs)
+
+    async def start(self) -> None:
+        """Подписка на стримы заявок и сделок и сверка с get_orders."""
+        if self.started:
+            return
+        self.__jobs = [
+            create_task(
+                self.__orders_job(), name=f"OrdersJob-{self.__account_id}"
+            ),
+            create_task(
+                self.__trades_job(), name=f"TradesJob-{self.__account_id}"
+            ),
+        ]
+        try:
+            await self.reconcile()
+        except BaseException:
+            await self.stop()
+            raise
+        self.logger.info("OrderBookkeeper has started")
+
+    async def stop(self) -> None:
+        """Отмена подписок и всех ожидающих futures."""
+        jobs, self.__jobs = self.__jobs, []
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        for waiters in self.__waiters.values():
+            for _, future in waiters:
+                future.cancel()
+        self.__waiters.clear()
+        self.logger.info("OrderBookkeeper has stopped")
+
+    async def reconcile(self, overwrite: bool = False) -> None:
+        """
+        Сверка с get_orders.
+
+        :param overwrite: Перезаписывать ли состояния, уже полученные
+            из стрима. Используется после переподключения.
+        """
+        response = await self.__client.get_orders(
+            request=OrdersRequest(account_id=self.__account_id)
+        )
+        for state in response.orders:
+            if overwrite or state.order_id not in self.__orders:
+                self.apply_order(state)
+
+    def get(self, order_id: str) -> OrderState | None:
+        """Последнее известное состояние заявки."""
+        return self.__orders.get(order_id)
+
+    def get_by_client_order_id(
+        self, client_order_id: str
+    ) -> OrderState | None:
+        """Последнее известное состояние заявки по client_order_id."""
+        order_id = self.__client_order_ids.get(client_order_id)
+        if order_id is None:
+            return None
+        return self.__orders.get(order_id)
+
+    def orders(self) -> list[OrderState]:
+        """Состояния всех известных заявок."""
+        return list(self.__orders.values())
+
+    def active_orders(self) -> list[OrderState]:
+        """Заявки в не финальном статусе."""
+        return [
+            state
+            for state in self.__orders.values()
+            if state.status not in FINAL_STATUSES
+        ]
+
+    def fills(self, order_id: str) -> list[AccountTrade]:
+        """Сделки по заявке."""
+        return list(self.__trades.get(order_id, ()))
+
+    def filled_quantity(self, order_id: str) -> Decimal:
+        """Исполненное количество по сделкам заявки."""
+        return sum(
+            (Decimal(trade.size.value) for trade in self.fills(order_id)),
+            Decimal(0),
+        )
+
+    def wait_for(
+        self,
+        order_id: str | None = None,
+        *,
+        client_order_id: str | None = None,
+        statuses: Collection[int] = FINAL_STATUSES,
+    ) -> Future[OrderState]:
+        """
+        Future, который завершится, когда заявка перейдет в один из статусов.
+
+        Заявку можно указать по order_id или client_order_id.
+        client_order_id удобен, когда ожидание начинается до ответа
+        place_order.
+
+        :param order_id: Идентификатор заявки.
+        :param client_order_id: Клиентский идентификатор заявки.
+        :param statuses: Ожидаемые статусы. По умолчанию - финальные.
+        """
+        if order_id is not None:
+            key = ("order_id", order_id)
+            state = self.get(order_id)
+        elif client_order_id is not None:
+            key = ("client_order_id", client_order_id)
+            state = self.get_by_client_order_id(client_order_id)
+        else:
+            raise ValueError("order_id or client_order_id is required")
+        future: Future[OrderState] = asyncio.get_running_loop().create_future()
+        if state is not None and state.status in statuses:
+            future.set_result(state)
+        else:
+            self.__waiters[key].append((statuses, future))
+        return future
+
+    async def wait_done(
+        self,
+        order_id: str | None = None,
+        *,
+        client_order_id: str | None = None,
+    ) -> OrderState:
+        """Ожидание финального статуса заявки (исполнена, отменена и т.д.)."""
+        return await self.wait_for(order_id, client_order_id=client_order_id)
+
+    def apply_order(self, state: OrderState) -> None:
+        """Применение нового состояния заявки."""
+        self.__orders[state.order_id] = state
+        client_order_id = state.order.client_order_id
+        if client_order_id:
+            self.__client_order_ids[client_order_id] = state.order_id
+            self.__notify(("client_order_id", client_order_id), state)
+        self.__notify(("order_id", state.order_id), state)
+
+    def apply_trade(self, trade: AccountTrade) -> None:
+        """Применение сделки. Повторно полученные сделки игнорируются."""
+        if trade.trade_id in self.__trade_ids:
+            return
+        self.__trade_ids.add(trade.trade_id)
+        self.__trades[trade.order_id].append(trade)
+
+    def __notify(self, key: _WaiterKey, state: OrderState) -> None:
+        waiters = self.__waiters.get(key)
+        if not waiters:
+            return
+        pending = []
+        for statuses, future in waiters:
+            if future.done():
+                continue
+            if state.status in statuses:
+                future.set_result(state)
+            else:
+                pending.append((statuses, future))
+        if pending:
+            self.__waiters[key] = pending
+        else:
+            del self.__waiters[key]
+
+    async def __orders_job(self) -> None:
+        request = SubscribeOrdersRequest(account_id=self.__account_id)
+        reconnect = False
+        while True:
+            generation = self.__client.connectivity.generation
+            try:
+                if reconnect:
+                    await self.reconcile(overwrite=True)
+                async for response in self.__client.subscribe_orders(
+                    request=request
+                ):
+                    for state in response.orders:
+                        self.apply_order(state)
+            except RpcError as e:
+                self.logger.exception(e.details(), exc_info=e)
+            except asyncio.CancelledError:
+                break
+            if self.__client.stopped:
+                break
+            reconnect = True
+            await self.__client.connectivity.wait(
+                generation, self.__reconnect_delay
+            )
+            self.__client._record_retry(SUBSCRIBE_ORDERS_METHOD)
+
+    async def __trades_job(self) -> None:
+        request = SubscribeTradesRequest(account_id=self.__account_id)
+        while True:
+            generation = self.__client.connectivity.generation
+            try:
+                async for response in self.__client.subscribe_trades(
+                    request=request
+                ):
+                    for trade in response.trades:
+                        self.apply_trade(trade)
+            except RpcError as e:
+                self.logger.exception(e.details(), exc_info=e)
+            except asyncio.CancelledError:
+                break
+            if self.__client.stopped:
+                break
+            await self.__client.connectivity.wait(
+                generation, self.__reconnect_delay
+            )
+            self.__client._record_retry(SUBSCRIBE_TRADES_METHOD)
@@ -0,0 +1,61 @@
+import asyncio
+
+from grpc.aio import UnaryUnaryClientInterceptor
+
+from finam_grpc_client.cache import ResponseCache
+from finam_grpc_client.instrumentation import method_name
+
+
+class CachingInterceptor(UnaryUnaryClientInterceptor):
+    """Ответы из ResponseCache для асинхронного канала."""
+
+    def __init__(self, cache: ResponseCache) -> None:
+        self.__cache = cache
+        self.__refreshes: set[asyncio.Task] = set()
+
+    async def intercept_unary_unary(
+        self, continuation, client_call_details, request
+    ):
+        method = method_name(client_call_details.method)
+        if method not in self.__cache:
+            return await continuation(client_call_details, request)
+        key = request.SerializeToString(deterministic=True)
+        response, refresh = self.__cache.lookup(method, key)
+        if response is None:
+            return await self.__fetch(
+                continuation, client_call_details, request, method, key
+            )
+        if refresh:
+            task = asyncio.create_task(
+                self.__fetch(
+                    continuation, client_call_details, request, method, key
+                )
+            )
+            self.__refreshes.add(task)
+            task.add_done_callback(self.__refresh_done)
+        return response
+
+    async def __fetch(
+        self,
+        continuation,
+        client_call_details,
+        request,
+        method: str,
+        key: bytes,
+    ):
+        try:
+            call = await continuation(client_call_details, request)
+            response = await call
+        except BaseException:
+            self.__cache.release(method, key)
+            raise
+        self.__cache.store(method, key, response)
+        return response
+
+    def __refresh_done(self, task: asyncio.Task) -> None:
+        self.__refreshes.discard(task)
+        if not task.cancelled():
+            # Ошибка фонового обновления не передается вызывающему:
+            # устаревший ответ уже возвращен, а следующий вызов
+            # после истечения stale_while_revalidate повторит запрос.
+            task.exception()
@@ -1,24 +1,77 @@
+from __future__ import annotations
+
 import asyncio
 import datetime
 import logging
-from asyncio import Task, create_task, iscoroutine, sleep
+from asyncio import Semaphore, Task, create_task, gather, iscoroutine, sleep
+from functools import partial
+from time import perf_counter
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, Sequence
 
-from grpc import RpcError, ssl_channel_credentials
+from grpc import RpcError
 from grpc.aio import (
     Channel,
     Metadata,
     UnaryStreamMultiCallable,
     UnaryUnaryMultiCallable,
+    insecure_channel,
     secure_channel,
 )
 
-from finam_grpc_client.base import AbstractFinamClient
+from finam_grpc_client.asyncio.connectivity import ConnectivityMonitor
+from finam_grpc_client.asyncio.draining import CallTracker
+from finam_grpc_client.asyncio.event_loop import (
+    check_event_loop,
+    check_grpc_aio,
+)
+from finam_grpc_client.asyncio.rate_limit import AsyncRateLimiter
+from finam_grpc_client.base import (
+    DEFAULT_MAX_IN_FLIGHT,
+    SUBSCRIBE_JWT_RENEWAL_METHOD,
+    WARM_UP_TIMEOUT,
+    AbstractFinamClient,
+)
+from finam_grpc_client.channels import (
+    CHANNEL_OPTIONS,
+    channel_credentials,
+    shared_channels,
+)
+from finam_grpc_client.endpoints import (
+    DEFAULT_PROBE_INTERVAL,
+    PROBE_TIMEOUT,
+    probe_failed,
+)
+from finam_grpc_client.history import (
+    DEFAULT_HISTORY_LIMIT,
+    DEFAULT_HISTORY_WINDOW,
+    AdaptiveWindow,
+)
+from finam_grpc_client.instrumentation import internal_calls
 from finam_grpc_client.proto.grpc.tradeapi.v1.auth.auth_service_pb2 import (
     SubscribeJwtRenewalRequest,
     SubscribeJwtRenewalResponse,
     TokenDetailsRequest,
     TokenDetailsResponse,
 )
+from finam_grpc_client.rate_limit import DEFAULT_RATE_LIMIT
+from finam_grpc_client.timestamps import timestamp_ns, to_datetime
+
+if TYPE_CHECKING:
+    from finam_grpc_client.cache import ResponseCache
+    from finam_grpc_client.instrumentation import Instrumentation
+    from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+        Transaction,
+    )
+    from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+        Order,
+        OrderState,
+    )
+    from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+    from finam_grpc_client.validation import (
+        InstrumentRules,
+        OrderValidationError,
+        OrderValidator,
+    )
 
 
 class FinamClient(
@@ -30,8 +83,46 @@ class FinamClient(
 ):
     logger = logging.getLogger("finam_grpc_client.asyncio.FinamClient")
 
-    def __init__(self, secret: str, *, url: str = "api.finam.ru:443"):
-        super().__init__(secret, url)
+    def __init__(
+        self,
+        secret: str,
+        *,
+        url: str | Sequence[str] = "api.finam.ru:443",
+        validator: OrderValidator | None = None,
+        secure: bool = True,
+        share_channel: bool = False,
+        warm_up: bool = False,
+        instrumentation: Instrumentation | None = None,
+        require_fast_protobuf: bool = False,
+        coalesce: bool | Iterable[str] = False,
+        cache: ResponseCache | None = None,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        rate_limit: int | None = DEFAULT_RATE_LIMIT,
+        require_uvloop: bool = False,
+    ):
+        super().__init__(
+            secret,
+            url,
+            validator,
+            instrumentation,
+            require_fast_protobuf,
+            coalesce,
+            cache,
+        )
+        self.secure = secure
+        self.share_channel = share_channel
+        self.warm_up = warm_up
+        self.probe_interval = probe_interval
+        self.rate_limiter = (
+            AsyncRateLimiter(rate_limit) if rate_limit is not None else None
+        )
+        self.require_uvloop = require_uvloop
+        self.connectivity = ConnectivityMonitor(instrumentation)
+        self.__calls = CallTracker()
+        self.__probe_wakeup = asyncio.Event()
+        self.connectivity.on_lost = self.__probe_wakeup.set
+        self.__probe_job: Task | None = None
+        self.__channel_keys: dict[str, tuple] = {}
         self.__job: Task | None = None
         self.__renewal_token_call: UnaryStreamMultiCallable | None = None
 
@@ -45,26 +136,50 @@ class FinamClient(
     async def start(self) -> None:
         if self.started:
             return
+        check_event_loop(self.require_uvloop)
+        await check_grpc_aio()
         super().start()
+        self.__calls.open()
+        self.connectivity.start(self._channel)
+        if len(self.urls) > 1:
+            self.__probe_job = create_task(
+                self.__probe_endpoints_job(), name="EndpointProbeJob"
+            )
         self.__job = create_task(
             self.__update_token_job(), name="UpdateTokenJob"  # type: ignore
         )
         self.logger.debug("Waiting for the session token to be updated")  # type: ignore
         while self.session_token is None:  # type: ignore
             await sleep(1)
+        if self.warm_up:
+            await asyncio.wait_for(
+                self._warm_up().channel_ready(), WARM_UP_TIMEOUT
+            )
         self.logger.info("FinamClient has started")  # type: ignore
 
-    async def stop(self) -> None:
+    async def stop(self, grace: float | None = None) -> None:
         if self.stopped:
             return
-        coro = super().stop()
+        if grace is not None and not await self.__calls.drain(grace):
+            self.logger.warning(
+                "Stopping with %s unfinished calls", self.__calls.in_flight
+            )
+        if self.__probe_job is not None:
+            # Задача не отменяется, чтобы не прервать переключение
+            # адреса посередине.
+            job, self.__probe_job = self.__probe_job, None
+            self.__probe_wakeup.set()
+            await job
+        await self.connectivity.stop()
+        closing = super().stop()
         if self.__renewal_token_call:  # type: ignore
             self.__renewal_token_call.cancel()  # type: ignore
             await self.__job  # type: ignore
             self.__renewal_token_call = None
             self.__job = None
-        if iscoroutine(coro):
-            await coro
+        for result in closing:
+            if iscoroutine(result):
+                await result
         self.logger.info("FinamClient has stopped")  # type: ignore
 
     @property
@@ -73,8 +188,285 @@ class FinamClient(
             ("authorization", self.session_token),
         )
 
-    def _create_channel(self):
-        return secure_channel(self.url, ssl_channel_credentials())
+    async def place_orders(
+        self,
+        orders: Iterable[Order],
+        *,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError | OrderValidationError]:
+        return await self.__pipeline(
+            self._orders_stub.PlaceOrder,  # type: ignore
+            self._validate_orders(orders),
+            max_in_flight,
+            timeout,
+        )
+
+    async def cancel_all(
+        self,
+        account_id: str,
+        filter: Callable[[OrderState], bool] | None = None,
+        *,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError]:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+            OrdersRequest,
+        )
+
+        response = await self.get_orders(
+            request=OrdersRequest(account_id=account_id), timeout=timeout
+        )
+        return await self.__pipeline(
+            self._orders_stub.CancelOrder,  # type: ignore
+            self._cancel_requests(account_id, response.orders, filter),
+            max_in_flight,
+            timeout,
+        )
+
+    async def instrument_rules(
+        self, symbol: str, account_id: str, *, with_schedule: bool = True
+    ) -> InstrumentRules:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+            GetAssetParamsRequest,
+            GetAssetRequest,
+            ScheduleRequest,
+        )
+        from finam_grpc_client.validation import InstrumentRules
+
+        requests = [
+            self.get_asset(
+                request=GetAssetRequest(symbol=symbol, account_id=account_id)
+            ),
+            self.get_asset_params(
+                request=GetAssetParamsRequest(
+                    symbol=symbol, account_id=account_id
+                )
+            ),
+        ]
+        if with_schedule:
+            requests.append(
+                self.schedule(request=ScheduleRequest(symbol=symbol))
+            )
+        return InstrumentRules.from_responses(*await gather(*requests))
+
+    async def iter_trades(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+        window: datetime.timedelta = DEFAULT_HISTORY_WINDOW,
+    ) -> AsyncIterator[AccountTrade]:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+            TradesRequest,
+        )
+
+        windows = AdaptiveWindow(start, end, limit, window)
+        while not windows.done:
+            response = await self.trades(
+                request=TradesRequest(
+                    account_id=account_id,
+                    limit=limit,
+                    interval=windows.interval,
+                )
+            )
+            if windows.advance(len(response.trades)):
+                for trade in response.trades:
+                    yield trade
+
+    async def iter_transactions(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+        window: datetime.timedelta = DEFAULT_HISTORY_WINDOW,
+    ) -> AsyncIterator[Transaction]:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+            TransactionsRequest,
+        )
+
+        windows = AdaptiveWindow(start, end, limit, window)
+        while not windows.done:
+            response = await self.transactions(
+                request=TransactionsRequest(
+                    account_id=account_id,
+                    limit=limit,
+                    interval=windows.interval,
+                )
+            )
+            if windows.advance(len(response.transactions)):
+                for transaction in response.transactions:
+                    yield transaction
+
+    def _create_channel(self, url):
+        if not self.share_channel:
+            return self.__new_channel(url)
+        # Перехватчики асинхронного канала задаются при его создании,
+        # поэтому канал общий для клиентов одного цикла событий
+        # с одинаковыми cache, coalesce и instrumentation.
+        key = self.__channel_keys[url] = (
+            asyncio.get_running_loop(),
+            url,
+            self.secure,
+            self.cache,
+            self._coalesced_methods,
+            self.instrumentation,
+        )
+        return shared_channels.acquire(key, partial(self.__new_channel, url))
+
+    def _prepare_call(self, method):
+        return partial(self.__call, method, metadata=self.metadata)
+
+    def _close_streams(self) -> None:
+        self.__calls.close_streams()
+
+    def _close_channel(self, url, channel):
+        key = self.__channel_keys.pop(url, None)
+        if key is None:
+            return channel.close()
+        return shared_channels.release(key)
+
+    def __call(self, method, *args, **kwargs):
+        calls = self.__calls
+        if isinstance(method, UnaryStreamMultiCallable):
+            calls.admit()
+            return calls.stream(method(*args, **kwargs))
+        calls.begin()
+        try:
+            call = method(*args, **kwargs)
+        except BaseException:
+            calls.end()
+            raise
+        call.add_done_callback(calls.end)
+        return call
+
+    def __new_channel(self, url: str) -> Channel:
+        interceptors = []
+        # Кэш и объединение вызовов - первыми в цепочке, чтобы метрики
+        # вызовов учитывали только запросы, отправленные на сервер.
+        if self.cache is not None:
+            from finam_grpc_client.asyncio.cache import CachingInterceptor
+
+            interceptors.append(CachingInterceptor(self.cache))
+        if self._coalesced_methods:
+            from finam_grpc_client.asyncio.coalescing import (
+                CoalescingInterceptor,
+            )
+
+            interceptors.append(
+                CoalescingInterceptor(
+                    self._coalesced_methods, self.instrumentation
+                )
+            )
+        if self.instrumentation is not None:
+            from finam_grpc_client.asyncio.instrumentation import (
+                instrumentation_interceptors,
+            )
+
+            interceptors += instrumentation_interceptors(self.instrumentation)
+        if not self.secure:
+            return insecure_channel(
+                url, CHANNEL_OPTIONS, interceptors=interceptors
+            )
+        return secure_channel(
+            url,
+            channel_credentials(),
+            CHANNEL_OPTIONS,
+            interceptors=interceptors,
+        )
+
+    async def __pipeline(
+        self,
+        method,
+        requests: Iterable,
+        max_in_flight: int,
+        timeout: float | None,
+    ) -> list:
+        from finam_grpc_client.validation import OrderValidationError
+
+        semaphore = Semaphore(max_in_flight)
+        rate_limiter = self.rate_limiter
+
+        async def call(request):
+            if isinstance(request, OrderValidationError):
+                return request
+            async with semaphore:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
+                try:
+                    # Метаданные читаются перед каждым запросом: пачка
+                    # с ограничением частоты может пережить обновление
+                    # токена сессии.
+                    return await self.__call(
+                        method,
+                        request=request,
+                        timeout=timeout,
+                        metadata=self.metadata,
+                    )
+                except RpcError as e:
+                    return e
+
+        return list(await gather(*(call(request) for request in requests)))
+
+    async def __probe_endpoints_job(self):
+        self.logger.info("Launching an endpoint probe task")
+        while self.__probe_job is not None:
+            self.__probe_wakeup.clear()
+            await self.__probe_endpoints()
+            try:
+                await asyncio.wait_for(
+                    self.__probe_wakeup.wait(), self.probe_interval
+                )
+            except TimeoutError:
+                pass
+        self.logger.info("Stopping an endpoint probe task")
+
+    async def __probe_endpoints(self):
+        from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+            ClockRequest,
+        )
+
+        # До получения токена сервер ответит ошибкой авторизации,
+        # но и она подтверждает, что адрес доступен.
+        metadata = self.metadata if self.session_token is not None else None
+
+        async def probe(url: str) -> float | None:
+            start = perf_counter()
+            try:
+                with internal_calls():
+                    await self._probe_method(url)(
+                        ClockRequest(),
+                        timeout=PROBE_TIMEOUT,
+                        metadata=metadata,
+                    )
+            except RpcError as e:
+                if probe_failed(e):
+                    return None
+            return perf_counter() - start
+
+        latencies = await gather(*(probe(url) for url in self.urls))
+        for url, latency in zip(self.urls, latencies):
+            self.endpoints.record(url, latency)
+        url = self.endpoints.select(self.url)
+        if url != self.url:
+            await self.__switch_endpoint(url)
+
+    async def __switch_endpoint(self, url: str):
+        available = self.endpoints.available(self.url)
+        self.logger.warning("Switching from %s to %s", self.url, url)
+        await self.connectivity.stop()
+        previous = self._switch_endpoint(url)
+        self.connectivity.start(self._channel)
+        if not available:
+            # Вызовы недоступного адреса отменяются, чтобы стримы
+            # переподключились уже к новому адресу.
+            closing = self._close_endpoint(previous)
+            if iscoroutine(closing):
+                await closing
 
     async def __update_token_job(self):
         response: SubscribeJwtRenewalResponse
@@ -82,24 +474,30 @@ class FinamClient(
         timezone = datetime.datetime.now().astimezone().tzinfo
         self.logger.info("Launching a session token renewal task")
         while self.started:
+            generation = self.connectivity.generation
             try:
                 self.__renewal_token_call = self.subscribe_jwt_renewal(
                     request=SubscribeJwtRenewalRequest(secret=self.secret)
                 )
                 async for response in self.__renewal_token_call:
                     self.session_token = response.token
+                    # Срок действия нужен только для отладочного лога:
+                    # без него токен не запрашивается повторно.
+                    if not self.logger.isEnabledFor(logging.DEBUG):
+                        continue
                     token_details = await self.token_details(
                         request=TokenDetailsRequest(token=response.token)
                     )
                     self.logger.debug(
                         "New auth token received. Expiration: %s",
-                        token_details.expires_at.ToDatetime(
-                            tzinfo=timezone
+                        to_datetime(
+                            timestamp_ns(token_details.expires_at), timezone
                         ).isoformat(),
                     )
             except RpcError as e:
                 self.logger.exception(e.details(), exc_info=e)
-                await sleep(10)
+                await self.connectivity.wait(generation, 10)
+                self._record_retry(SUBSCRIBE_JWT_RENEWAL_METHOD)
             except asyncio.CancelledError:
                 break
         self.logger.info("Stopping a session token renewal task")
@@ -1,13 +1,23 @@
-from typing import Any, AsyncIterator, Callable, Self
+import datetime
+from typing import Any, AsyncIterator, Callable, Iterable, Self, Sequence
 
-from grpc import StatusCode
+from grpc import RpcError, StatusCode
 from grpc.aio import Metadata
 
+from finam_grpc_client.asyncio.connectivity import ConnectivityMonitor
+from finam_grpc_client.asyncio.rate_limit import AsyncRateLimiter
+from finam_grpc_client.cache import ResponseCache
+from finam_grpc_client.endpoints import (
+    DEFAULT_PROBE_INTERVAL,
+    EndpointSelector,
+)
+from finam_grpc_client.instrumentation import Instrumentation
 from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
     GetAccountRequest,
     GetAccountResponse,
     TradesRequest,
     TradesResponse,
+    Transaction,
     TransactionsRequest,
     TransactionsResponse,
 )
@@ -69,6 +79,13 @@ from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
     SubscribeTradesRequest,
     SubscribeTradesResponse,
 )
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+from finam_grpc_client.rate_limit import DEFAULT_RATE_LIMIT
+from finam_grpc_client.validation import (
+    InstrumentRules,
+    OrderValidationError,
+    OrderValidator,
+)
 
 class UnaryStreamCall[R]:
     """
@@ -91,7 +108,51 @@ class UnaryStreamCall[R]:
     def add_done_callback(self, callback: Callable[[Any], None]) -> None: ...
 
 class FinamClient:
-    def __init__(self, secret: str, *, url: str = "api.finam.ru:443"):
+    validator: OrderValidator | None
+    """Локальная проверка заявок перед отправкой."""
+    secure: bool
+    """Подключение по TLS."""
+    share_channel: bool
+    """Использование общего канала процесса."""
+    warm_up: bool
+    """Прогрев канала и стабов при start()."""
+    connectivity: ConnectivityMonitor
+    """
+    Состояние соединения канала. После потери соединения стримы токенов
+    и OrderBookkeeper переоткрываются сразу при его восстановлении.
+    """
+    instrumentation: Instrumentation | None
+    """Обработчик событий вызовов."""
+    require_fast_protobuf: bool
+    """Запрет запуска на чисто Python реализации protobuf."""
+    cache: ResponseCache | None
+    """Кэш ответов методов чтения."""
+    endpoints: EndpointSelector
+    """Результаты проверок адресов API."""
+    probe_interval: float
+    """Интервал проверки адресов, сек."""
+    rate_limiter: AsyncRateLimiter | None
+    """Ограничение частоты запросов пачек."""
+    require_uvloop: bool
+    """Запрет запуска вне цикла событий uvloop."""
+
+    def __init__(
+        self,
+        secret: str,
+        *,
+        url: str | Sequence[str] = "api.finam.ru:443",
+        validator: OrderValidator | None = None,
+        secure: bool = True,
+        share_channel: bool = False,
+        warm_up: bool = False,
+        instrumentation: Instrumentation | None = None,
+        require_fast_protobuf: bool = False,
+        coalesce: bool | Iterable[str] = False,
+        cache: ResponseCache | None = None,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        rate_limit: int | None = DEFAULT_RATE_LIMIT,
+        require_uvloop: bool = False,
+    ):
         """
         Клиент для асинхронного взаимодействия с Api Finam.
 
@@ -105,7 +166,54 @@ class FinamClient:
         Также можно воспользоваться асинхронным контекстным менеджером.
 
         :param secret: Токен, полученный на сайте Finam (https://tradeapi.finam.ru/docs/tokens/).
-        :param url: Адрес для подключения к API.
+        :param url: Адрес для подключения к API или несколько адресов
+            в порядке предпочтения. С несколькими адресами клиент
+            проверяет их вызовом Clock и переводит новые вызовы на
+            другой адрес, если текущий недоступен или другой отвечает
+            заметно быстрее. Стримы недоступного адреса отменяются
+            и переоткрываются на новом.
+        :param validator: Локальная проверка заявок. Если задана,
+            place_order и place_orders не отправляют заявки,
+            не прошедшие проверку, а выбрасывают (возвращают)
+            OrderValidationError.
+        :param secure: Подключение по TLS. False - без шифрования,
+            например к локальному FakeFinamServer.
+        :param share_channel: Использовать общий канал с другими
+            клиентами процесса с тем же url и secure вместо отдельного
+            соединения. Токен сессии у каждого клиента свой.
+            Канал общий для клиентов одного цикла событий с одинаковыми
+            cache, coalesce и instrumentation.
+        :param warm_up: При start() загрузить модули всех сервисов,
+            создать стабы и дождаться готовности канала (не дольше
+            WARM_UP_TIMEOUT), чтобы первый вызов, например заявка,
+            не тратил время на подготовку.
+        :param instrumentation: Обработчик событий вызовов: задержки,
+            размеры сообщений, коды ответов, переподключения.
+            Например, MetricsRegistry. Подключается при start(),
+            без него вызовы не перехватываются.
+        :param require_fast_protobuf: При start() выбросить
+            SlowProtobufBackendError, если protobuf работает на чисто
+            Python реализации. По умолчанию в этом случае в лог
+            пишется предупреждение.
+        :param coalesce: Объединение одновременных вызовов с одинаковым
+            запросом в один запрос к серверу: True - для всех методов
+            чтения, либо имена методов, например ("last_quote",
+            "get_asset"). Объединенные вызовы получают общий ответ
+            или ошибку и учитываются в instrumentation.on_coalesce.
+        :param cache: Кэш ответов методов чтения, например
+            ResponseCache({"get_asset": 3600}). Ответы из кэша
+            не отправляются на сервер. Подключается при start().
+        :param probe_interval: Интервал проверки адресов, сек, если
+            их несколько. При потере соединения проверка выполняется
+            сразу.
+        :param rate_limit: Сколько запросов place_orders, cancel_all
+            и map отправляется за минуту, по умолчанию - лимит API.
+            None - без ограничения. Другие вызовы не учитываются.
+        :param require_uvloop: При start() выбросить
+            UvloopRequiredError, если клиент запущен не в цикле
+            событий uvloop. Цикл пишется в лог при каждом start().
+            Работа grpc.aio в цикле проверяется при первом start()
+            в нем, при ошибке - UnsupportedEventLoopError.
         """
 
     async def __aenter__(self) -> Self: ...
@@ -126,11 +234,23 @@ class FinamClient:
     def url(self) -> str:
         """Адрес для отправки запросов."""
 
+    @property
+    def urls(self) -> tuple[str, ...]:
+        """Все адреса API в порядке предпочтения."""
+
     async def start(self) -> None:
         """Создание нового канала и подключение сервисов."""
 
-    async def stop(self) -> None:
-        """Закрытие канала и отключение сервисов."""
+    async def stop(self, grace: float | None = None) -> None:
+        """
+        Закрытие канала и отключение сервисов.
+
+        Открытые стримы завершаются без ошибки.
+
+        :param grace: Сколько секунд ждать завершения отправленных
+            унарных вызовов. Новые вызовы при этом отклоняются
+            с ClientStoppingError. По умолчанию вызовы отменяются сразу.
+        """
     ######################### Auth #########################
     async def auth(self, request: AuthRequest) -> AuthResponse:
         """Получение JWT токена из API токена."""
@@ -157,6 +277,43 @@ class FinamClient:
         self, request: TransactionsRequest
     ) -> TransactionsResponse:
         """Получение списка транзакций аккаунта."""
+
+    def iter_trades(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = 1000,
+        window: datetime.timedelta = datetime.timedelta(days=1),
+    ) -> AsyncIterator[AccountTrade]:
+        """
+        Постраничная выгрузка истории сделок аккаунта.
+
+        Интервал [start, end) разбивается на окна. Если ответ содержит
+        limit записей, окно уменьшается и запрос повторяется.
+
+        :param account_id: Идентификатор аккаунта.
+        :param start: Начало интервала.
+        :param end: Конец интервала.
+        :param limit: Лимит записей в одном запросе.
+        :param window: Начальный (и максимальный) размер окна.
+        """
+
+    def iter_transactions(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = 1000,
+        window: datetime.timedelta = datetime.timedelta(days=1),
+    ) -> AsyncIterator[Transaction]:
+        """
+        Постраничная выгрузка транзакций аккаунта.
+
+        Работает так же, как iter_trades.
+        """
     ######################## Assets ########################
     async def assets(self, request: AssetsRequest) -> AssetsResponse:
         """Получение списка доступных инструментов, их описание."""
@@ -175,6 +332,16 @@ class FinamClient:
     ) -> GetAssetParamsResponse:
         """Получение торговых параметров по инструменту."""
 
+    async def instrument_rules(
+        self, symbol: str, account_id: str, *, with_schedule: bool = True
+    ) -> InstrumentRules:
+        """
+        Получение параметров инструмента для OrderValidator.
+
+        Запросы get_asset, get_asset_params и schedule
+        отправляются параллельно.
+        """
+
     async def options_chain(
         self, request: OptionsChainRequest
     ) -> OptionsChainResponse:
@@ -195,6 +362,15 @@ class FinamClient:
     async def place_order(self, request: Order) -> OrderState:
         """Выставление биржевой заявки."""
 
+    async def place_order_bytes(self, request: bytes) -> OrderState:
+        """
+        Выставление заранее сериализованной биржевой заявки.
+
+        Используется вместе с OrderTemplate.build(). Если задан
+        validator, заявка разбирается и проверяется перед отправкой,
+        как в place_order.
+        """
+
     def subscribe_orders(
         self, request: SubscribeOrdersRequest
     ) -> UnaryStreamCall[SubscribeOrdersResponse]:
@@ -204,6 +380,48 @@ class FinamClient:
         self, request: SubscribeTradesRequest
     ) -> UnaryStreamCall[SubscribeTradesResponse]:
         """Подписка на собственные сделки. Стрим метод."""
+
+    async def place_orders(
+        self,
+        orders: Iterable[Order],
+        *,
+        max_in_flight: int = 20,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError | OrderValidationError]:
+        """
+        Выставление пачки заявок.
+
+        Запросы отправляются параллельно, одновременно не больше
+        max_in_flight и не чаще rate_limit в минуту. Результаты
+        возвращаются в порядке заявок:
+        OrderState, ошибка RpcError для отклоненной заявки или
+        OrderValidationError для заявки, не прошедшей локальную проверку.
+
+        :param orders: Заявки.
+        :param max_in_flight: Максимальное число одновременных запросов.
+        :param timeout: Таймаут каждого запроса, сек.
+        """
+
+    async def cancel_all(
+        self,
+        account_id: str,
+        filter: Callable[[OrderState], bool] | None = None,
+        *,
+        max_in_flight: int = 20,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError]:
+        """
+        Отмена всех активных заявок счета.
+
+        Список заявок запрашивается через get_orders, отмены отправляются
+        параллельно, одновременно не больше max_in_flight и не чаще
+        rate_limit в минуту.
+
+        :param account_id: Идентификатор счета.
+        :param filter: Отбор заявок для отмены, например по символу.
+        :param max_in_flight: Максимальное число одновременных запросов.
+        :param timeout: Таймаут каждого запроса, сек.
+        """
     ###################### Market Data ######################
     async def bars(self, request: BarsRequest) -> BarsResponse:
         """Получение исторических данных по инструменту (агрегированные свечи)."""
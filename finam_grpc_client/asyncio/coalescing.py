@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, Iterable
+
+from grpc.aio import UnaryUnaryClientInterceptor
+
+from finam_grpc_client.coalescing import CallKey, call_key, deadline, joinable
+from finam_grpc_client.instrumentation import Instrumentation, method_name
+
+
+class _Flight:
+    __slots__ = ("task", "deadline", "waiters")
+
+    def __init__(self, task: asyncio.Task, deadline: float | None) -> None:
+        self.task = task
+        self.deadline = deadline
+        self.waiters = 0
+
+
+class CoalescingInterceptor(UnaryUnaryClientInterceptor):
+    """
+    Объединение одинаковых одновременных унарных вызовов асинхронного
+    канала.
+
+    Пока вызов метода из methods выполняется, вызовы того же метода
+    с побайтно совпадающим сериализованным запросом ждут его ответ
+    или ошибку, не отправляя запрос на сервер. Ответ общий для всех
+    вызовов, изменять его нельзя. Запрос отменяется, только когда
+    отменены все ожидающие его вызовы.
+
+    Объединяются только вызовы с одинаковым токеном авторизации.
+    Вызов, таймаут которого истекает раньше выполняющегося, отправляется
+    на сервер отдельно.
+    """
+
+    def __init__(
+        self,
+        methods: Iterable[str],
+        instrumentation: Instrumentation | None = None,
+    ) -> None:
+        """
+        :param methods: Полные имена методов, например
+            /grpc.tradeapi.v1.marketdata.MarketDataService/LastQuote.
+        :param instrumentation: Получатель событий on_coalesce.
+        """
+        self.__methods = frozenset(methods)
+        self.__instrumentation = instrumentation
+        self.__flights: dict[CallKey, _Flight] = {}
+
+    async def intercept_unary_unary(
+        self, continuation, client_call_details, request
+    ):
+        method = method_name(client_call_details.method)
+        if method not in self.__methods:
+            return await continuation(client_call_details, request)
+        key = call_key(method, client_call_details, request)
+        call_deadline = deadline(client_call_details.timeout)
+        flight = self.__flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(
+                self.__call(continuation, client_call_details, request)
+            )
+            flight = self.__flights[key] = _Flight(task, call_deadline)
+            task.add_done_callback(lambda _: self.__land(key, flight))
+        elif not joinable(flight.deadline, call_deadline):
+            return await self.__call(
+                continuation, client_call_details, request
+            )
+        elif self.__instrumentation is not None:
+            self.__instrumentation.on_coalesce(method)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and self.__flights.get(key) is flight:
+                del self.__flights[key]
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    @staticmethod
+    async def __call(continuation, client_call_details, request) -> Any:
+        call = await continuation(client_call_details, request)
+        return await call
+
+    def __land(self, key: CallKey, flight: _Flight) -> None:
+        if self.__flights.get(key) is flight:
+            del self.__flights[key]
+        if not flight.task.cancelled():
+            # Ошибку получают ожидающие вызовы, если они еще есть.
+            flight.task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся объединяемых вызовов."""
+        return len(self.__flights)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from google.protobuf.message import Message
+from grpc import ChannelConnectivity, RpcError
+
+from finam_grpc_client.base import method_path
+from finam_grpc_client.connectivity import ConnectivityState
+from finam_grpc_client.instrumentation import Instrumentation
+
+if TYPE_CHECKING:
+    from finam_grpc_client.asyncio.client import FinamClient
+
+logger = logging.getLogger("finam_grpc_client.asyncio.connectivity")
+
+
+class ConnectivityMonitor(ConnectivityState):
+    """Отслеживание состояния асинхронного канала."""
+
+    def __init__(self, instrumentation: Instrumentation | None = None):
+        super().__init__(instrumentation)
+        self.__condition = asyncio.Condition()
+        self.__task: asyncio.Task | None = None
+
+    def start(self, channel: Any) -> None:
+        self._reset()
+        self.__task = asyncio.create_task(
+            self.__watch(channel), name="ConnectivityMonitor"
+        )
+
+    async def stop(self) -> None:
+        task, self.__task = self.__task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        async with self.__condition:
+            self.__condition.notify_all()
+
+    async def wait(self, generation: int, timeout: float) -> bool:
+        """
+        Ожидание восстановления соединения.
+
+        :param generation: Значение generation до ошибки.
+        :param timeout: Максимальное время ожидания, сек.
+        :return: Восстановлено ли соединение.
+        """
+        async with self.__condition:
+            try:
+                await asyncio.wait_for(
+                    self.__condition.wait_for(
+                        lambda: self.generation > generation
+                        or self.__task is None
+                    ),
+                    timeout,
+                )
+            except TimeoutError:
+                pass
+            return self.generation > generation
+
+    async def __watch(self, channel: Any) -> None:
+        state = channel.get_state(try_to_connect=True)
+        while True:
+            if self._update(state):
+                async with self.__condition:
+                    self.__condition.notify_all()
+            await channel.wait_for_state_change(state)
+            # Канал в IDLE не подключается до следующего вызова,
+            # поэтому подключение запрашивается сразу.
+            state = channel.get_state(try_to_connect=True)
+
+
+class ResubscribingStream:
+    """
+    Стрим асинхронного клиента, который открывается заново после обрыва.
+
+    После ошибки или закрытия стрима сервером запрос повторяется, как
+    только соединение канала восстановится (в том числе после
+    переключения на другой адрес), но не позже чем через delay.
+    Итерация заканчивается после cancel() или остановки клиента.
+    Сообщения, отправленные сервером во время обрыва, теряются.
+    """
+
+    def __init__(
+        self,
+        client: "FinamClient",
+        method: str,
+        request: Message,
+        delay: float,
+    ) -> None:
+        self.__client = client
+        self.__method = method
+        self.__method_path = method_path(method)
+        self.__request = request
+        self.__delay = delay
+        self.__call: Any = None
+        self.__cancelled = False
+
+    def cancel(self) -> None:
+        """Отмена стрима."""
+        self.__cancelled = True
+        if self.__call is not None:
+            self.__call.cancel()
+
+    async def __aiter__(self) -> AsyncIterator[Message]:
+        client = self.__client
+        while not self.__cancelled:
+            generation = client.connectivity.generation
+            try:
+                # Метод берется заново: в метаданных текущий токен.
+                self.__call = getattr(client, self.__method)(
+                    request=self.__request
+                )
+                async for response in self.__call:
+                    yield response
+            except RpcError as e:
+                if not (self.__cancelled or client.stopped):
+                    logger.warning(
+                        "%s stream failed: %s", self.__method, e.code()
+                    )
+            except asyncio.CancelledError:
+                # Отмена вызова через cancel(), а не задачи.
+                if self.__cancelled and not _task_cancelling():
+                    return
+                raise
+            if self.__cancelled or client.stopped:
+                return
+            await client.connectivity.wait(generation, self.__delay)
+            if self.__cancelled or client.stopped:
+                return
+            client._record_retry(self.__method_path)
+
+
+def _task_cancelling() -> bool:
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
+
+
+def resubscribing(
+    client: "FinamClient",
+    method: str,
+    request: Message,
+    *,
+    delay: float = 10,
+) -> ResubscribingStream:
+    """
+    Подписка асинхронного клиента, которая переживает обрывы соединения
+    и смену адреса.
+
+    :param client: Запущенный асинхронный клиент.
+    :param method: Имя Subscribe* метода клиента, например "subscribe_quote".
+    :param request: Запрос подписки.
+    :param delay: Максимальная пауза перед повторной подпиской, сек.
+    """
+    return ResubscribingStream(client, method, request, delay)
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+from asyncio import Task, create_task
+from collections import defaultdict, deque
+from inspect import isawaitable
+from typing import Any, Awaitable, Callable, Iterable, Self
+
+from grpc import RpcError
+
+from finam_grpc_client.asyncio.client import FinamClient
+from finam_grpc_client.base import (
+    SUBSCRIBE_ORDER_BOOK_METHOD,
+    SUBSCRIBE_ORDERS_METHOD,
+    SUBSCRIBE_QUOTE_METHOD,
+    SUBSCRIBE_TRADES_METHOD,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    SubscribeOrderBookRequest,
+    SubscribeQuoteRequest,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    SubscribeOrdersRequest,
+    SubscribeTradesRequest,
+)
+
+type Handler = Callable[[Any], Awaitable[None] | None]
+
+ORDER = "order"
+TRADE = "trade"
+QUOTE = "quote"
+ORDER_BOOK = "order_book"
+EXECUTION_EVENTS = frozenset({ORDER, TRADE})
+
+# Стрим по виду события: метод клиента, поле ответа со списком событий,
+# полное имя метода для instrumentation.on_retry.
+_STREAMS = {
+    ORDER: ("subscribe_orders", "orders", SUBSCRIBE_ORDERS_METHOD),
+    TRADE: ("subscribe_trades", "trades", SUBSCRIBE_TRADES_METHOD),
+    QUOTE: ("subscribe_quote", "quote", SUBSCRIBE_QUOTE_METHOD),
+    ORDER_BOOK: (
+        "subscribe_order_book",
+        "order_book",
+        SUBSCRIBE_ORDER_BOOK_METHOD,
+    ),
+}
+
+
+def _symbol(kind: str, event: Any) -> str:
+    if kind == ORDER:
+        return event.order.symbol
+    return event.symbol
+
+
+class _Lane:
+    """Очереди событий одного инструмента."""
+
+    __slots__ = (
+        "execution",
+        "market_data",
+        "busy",
+        "in_execution_ready",
+        "in_market_data_ready",
+    )
+
+    def __init__(self) -> None:
+        self.execution: deque[tuple[str, Any]] = deque()
+        self.market_data: deque[tuple[str, Any]] = deque()
+        self.busy = False
+        self.in_execution_ready = False
+        self.in_market_data_ready = False
+
+
+class EventDispatcher:
+    """
+    Обработка событий нескольких стримов асинхронного клиента.
+
+    Заявки и сделки (события исполнения) имеют строгий приоритет над
+    рыночными данными: освободившийся обработчик всегда сначала берет
+    событие исполнения. События разных инструментов обрабатываются
+    параллельно, не больше concurrency одновременно, события одного
+    инструмента - по одному в порядке поступления; при этом исполнение
+    инструмента опережает его еще не обработанные рыночные данные.
+
+    В очереди не больше max_pending рыночных событий. При переполнении
+    чтение стримов рыночных данных приостанавливается, и сервер
+    замедляет их по управлению потоком gRPC. События исполнения
+    не ограничиваются.
+    """
+
+    logger = logging.getLogger("finam_grpc_client.asyncio.EventDispatcher")
+
+    def __init__(
+        self,
+        client: FinamClient,
+        *,
+        concurrency: int = 8,
+        max_pending: int = 10_000,
+        reconnect_delay: float = 10,
+    ) -> None:
+        """
+        :param client: Запущенный асинхронный клиент.
+        :param concurrency: Сколько инструментов обрабатывается
+            одновременно.
+        :param max_pending: Максимум необработанных рыночных событий.
+        :param reconnect_delay: Пауза перед переподключением стрима, сек.
+            Если соединение канала восстановилось раньше, стрим
+            переподключается сразу.
+        """
+        self.__client = client
+        self.__concurrency = concurrency
+        self.__reconnect_delay = reconnect_delay
+        self.__handlers: defaultdict[str, list[Handler]] = defaultdict(list)
+        self.__subscriptions: list[tuple[str, Any]] = []
+        self.__lanes: defaultdict[str, _Lane] = defaultdict(_Lane)
+        self.__execution_ready: deque[str] = deque()
+        self.__market_data_ready: deque[str] = deque()
+        self.__ready = asyncio.Event()
+        self.__max_pending = max_pending
+        self.__slots = asyncio.Semaphore(max_pending)
+        self.__pending = 0
+        self.__readers: list[Task] = []
+        self.__workers: list[Task] = []
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    @property
+    def started(self) -> bool:
+        """Запущен ли диспетчер."""
+        return bool(self.__workers)
+
+    @property
+    def pending(self) -> int:
+        """Количество необработанных событий."""
+        return self.__pending
+
+    def on_order(self, handler: Handler) -> Handler:
+        """Обработчик OrderState из subscribe_orders."""
+        return self.__add_handler(ORDER, handler)
+
+    def on_trade(self, handler: Handler) -> Handler:
+        """Обработчик AccountTrade из subscribe_trades."""
+        return self.__add_handler(TRADE, handler)
+
+    def on_quote(self, handler: Handler) -> Handler:
+        """Обработчик Quote из subscribe_quote."""
+        return self.__add_handler(QUOTE, handler)
+
+    def on_order_book(self, handler: Handler) -> Handler:
+        """Обработчик StreamOrderBook из subscribe_order_book."""
+        return self.__add_handler(ORDER_BOOK, handler)
+
+    def subscribe_orders(self, account_id: str) -> None:
+        """Подписка на заявки счета."""
+        self.__subscribe(ORDER, SubscribeOrdersRequest(account_id=account_id))
+
+    def subscribe_trades(self, account_id: str) -> None:
+        """Подписка на сделки счета."""
+        self.__subscribe(TRADE, SubscribeTradesRequest(account_id=account_id))
+
+    def subscribe_quote(self, symbols: Iterable[str]) -> None:
+        """Подписка на котировки инструментов."""
+        self.__subscribe(QUOTE, SubscribeQuoteRequest(symbols=symbols))
+
+    def subscribe_order_book(self, symbol: str) -> None:
+        """Подписка на стакан инструмента."""
+        self.__subscribe(ORDER_BOOK, SubscribeOrderBookRequest(symbol=symbol))
+
+    async def start(self) -> None:
+        """Запуск обработчиков и подписок."""
+        if self.started:
+            return
+        self.__workers = [
+            create_task(self.__work(), name=f"EventDispatcherWorker-{i}")
+            for i in range(self.__concurrency)
+        ]
+        for kind, request in self.__subscriptions:
+            self.__start_reader(kind, request)
+        self.logger.info("EventDispatcher has started")
+
+    async def stop(self) -> None:
+        """Отмена подписок и обработчиков. Необработанные события
+        отбрасываются."""
+        tasks = self.__readers + self.__workers
+        self.__readers, self.__workers = [], []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.__pending:
+            self.logger.warning("Dropped %s pending events", self.__pending)
+        # Отмененные обработчики уже вернули свои места, а события
+        # исполнения мест не занимают: проще создать семафор заново.
+        self.__slots = asyncio.Semaphore(self.__max_pending)
+        self.__pending = 0
+        self.__lanes.clear()
+        self.__execution_ready.clear()
+        self.__market_data_ready.clear()
+        self.logger.info("EventDispatcher has stopped")
+
+    async def dispatch(self, kind: str, event: Any) -> None:
+        """
+        Постановка события в очередь.
+
+        Вызывается чтением стримов, но подходит и для событий из других
+        источников, например AsyncReplayClient.
+
+        :param kind: ORDER, TRADE, QUOTE или ORDER_BOOK.
+        :param event: Сообщение события.
+        """
+        execution = kind in EXECUTION_EVENTS
+        if not execution:
+            await self.__slots.acquire()
+        symbol = _symbol(kind, event)
+        lane = self.__lanes[symbol]
+        if execution:
+            lane.execution.append((kind, event))
+        else:
+            lane.market_data.append((kind, event))
+        self.__pending += 1
+        if not lane.busy:
+            self.__schedule(symbol, lane)
+
+    def __add_handler(self, kind: str, handler: Handler) -> Handler:
+        self.__handlers[kind].append(handler)
+        return handler
+
+    def __subscribe(self, kind: str, request: Any) -> None:
+        self.__subscriptions.append((kind, request))
+        if self.started:
+            self.__start_reader(kind, request)
+
+    def __start_reader(self, kind: str, request: Any) -> None:
+        self.__readers.append(
+            create_task(
+                self.__read(kind, request), name=f"EventDispatcher-{kind}"
+            )
+        )
+
+    def __schedule(self, symbol: str, lane: _Lane) -> None:
+        if lane.execution and not lane.in_execution_ready:
+            lane.in_execution_ready = True
+            self.__execution_ready.append(symbol)
+        elif lane.market_data and not lane.in_market_data_ready:
+            lane.in_market_data_ready = True
+            self.__market_data_ready.append(symbol)
+        else:
+            return
+        self.__ready.set()
+
+    def __next_lane(self) -> tuple[str, _Lane] | None:
+        while self.__execution_ready or self.__market_data_ready:
+            if self.__execution_ready:
+                symbol = self.__execution_ready.popleft()
+                lane = self.__lanes[symbol]
+                lane.in_execution_ready = False
+            else:
+                symbol = self.__market_data_ready.popleft()
+                lane = self.__lanes[symbol]
+                lane.in_market_data_ready = False
+            # Инструмент мог попасть в обе очереди: пока его событие
+            # обрабатывается, вторая запись пропускается.
+            if not lane.busy and (lane.execution or lane.market_data):
+                return symbol, lane
+        return None
+
+    async def __work(self) -> None:
+        while True:
+            item = self.__next_lane()
+            if item is None:
+                self.__ready.clear()
+                await self.__ready.wait()
+                continue
+            symbol, lane = item
+            lane.busy = True
+            market_data = not lane.execution
+            if market_data:
+                kind, event = lane.market_data.popleft()
+            else:
+                kind, event = lane.execution.popleft()
+            try:
+                await self.__handle(kind, event)
+            finally:
+                lane.busy = False
+                self.__pending -= 1
+                if market_data:
+                    self.__slots.release()
+                self.__schedule(symbol, lane)
+
+    async def __handle(self, kind: str, event: Any) -> None:
+        for handler in self.__handlers[kind]:
+            try:
+                result = handler(event)
+                if isawaitable(result):
+                    await result
+            except Exception:
+                self.logger.exception("%s handler %r failed", kind, handler)
+
+    async def __read(self, kind: str, request: Any) -> None:
+        client = self.__client
+        method, field, method_path = _STREAMS[kind]
+        while True:
+            generation = client.connectivity.generation
+            try:
+                async for response in getattr(client, method)(request=request):
+                    if kind == QUOTE and response.HasField("error"):
+                        self.logger.warning(
+                            "Quote stream error: %s", response.error
+                        )
+                    for event in getattr(response, field):
+                        await self.dispatch(kind, event)
+            except RpcError as e:
+                self.logger.exception(e.details(), exc_info=e)
+            except asyncio.CancelledError:
+                break
+            if client.stopped:
+                break
+            await client.connectivity.wait(generation, self.__reconnect_delay)
+            client._record_retry(method_path)
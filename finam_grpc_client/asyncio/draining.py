@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+from grpc import RpcError
+
+from finam_grpc_client.draining import ClientStoppingError
+
+
+class ClosableStream:
+    """
+    Стрим, который при закрытии клиентом завершается без ошибки.
+
+    Остальные атрибуты и методы - атрибуты и методы вызова gRPC.
+    """
+
+    def __init__(self, call: Any, tracker: "CallTracker") -> None:
+        self.__call = call
+        self.__tracker = tracker
+        self.closed = False
+        call.add_done_callback(self.__done)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__call, name)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self.__responses()
+
+    async def __responses(self) -> AsyncIterator[Any]:
+        try:
+            async for response in self.__call:
+                yield response
+        except (RpcError, asyncio.CancelledError):
+            if not self.closed:
+                raise
+
+    def close(self) -> None:
+        """Отмена вызова: итерация по стриму завершается."""
+        self.closed = True
+        self.__call.cancel()
+
+    def __done(self, _: Any) -> None:
+        self.__tracker._discard(self)
+
+
+class CallTracker:
+    """
+    Учет выполняющихся вызовов асинхронного клиента для stop(grace).
+
+    Считает незавершенные унарные вызовы и хранит открытые стримы.
+    После drain() новые вызовы отклоняются с ClientStoppingError.
+    """
+
+    def __init__(self) -> None:
+        self.__unary = 0
+        self.__idle = asyncio.Event()
+        self.__idle.set()
+        self.__streams: set[ClosableStream] = set()
+        self.draining = False
+
+    @property
+    def in_flight(self) -> int:
+        """Количество незавершенных унарных вызовов."""
+        return self.__unary
+
+    def open(self) -> None:
+        self.draining = False
+
+    def admit(self) -> None:
+        if self.draining:
+            raise ClientStoppingError("Client is stopping")
+
+    def begin(self) -> None:
+        """Начало унарного вызова."""
+        self.admit()
+        self.__unary += 1
+        self.__idle.clear()
+
+    def end(self, *_: Any) -> None:
+        """Завершение унарного вызова. Подходит как done callback."""
+        self.__unary -= 1
+        if not self.__unary:
+            self.__idle.set()
+
+    def stream(self, call: Any) -> ClosableStream:
+        stream = ClosableStream(call, self)
+        if not call.done():
+            self.__streams.add(stream)
+        return stream
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Прекращение приема вызовов и ожидание завершения унарных.
+
+        :param timeout: Максимальное время ожидания, сек.
+        :return: Завершились ли все унарные вызовы.
+        """
+        self.draining = True
+        try:
+            await asyncio.wait_for(self.__idle.wait(), timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def close_streams(self) -> None:
+        self.draining = True
+        streams = list(self.__streams)
+        self.__streams.clear()
+        for stream in streams:
+            stream.close()
+
+    def _discard(self, stream: ClosableStream) -> None:
+        self.__streams.discard(stream)
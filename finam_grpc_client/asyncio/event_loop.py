@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Any, Callable, Coroutine
+from weakref import WeakSet
+
+from grpc import RpcError
+from grpc.aio import insecure_channel
+
+logger = logging.getLogger("finam_grpc_client.asyncio.event_loop")
+
+# Адрес без сервера: вызов на него завершается ошибкой UNAVAILABLE
+# через несколько миллисекунд, если grpc.aio работает в цикле.
+_CHECK_TARGET = "127.0.0.1:1"
+_CHECK_METHOD = "/finam_grpc_client.EventLoopCheck/Check"
+GRPC_AIO_CHECK_TIMEOUT = 5.0
+
+_checked_loops: WeakSet[asyncio.AbstractEventLoop] = WeakSet()
+
+
+class UvloopRequiredError(RuntimeError):
+    """Клиент запущен не в цикле событий uvloop."""
+
+
+class UnsupportedEventLoopError(RuntimeError):
+    """grpc.aio не работает в текущем цикле событий."""
+
+
+def uvloop_factory() -> Callable[[], asyncio.AbstractEventLoop]:
+    """
+    Фабрика циклов событий uvloop.
+
+    Передается в asyncio.run(loop_factory=...) или asyncio.Runner.
+    Требует установленного uvloop.
+    """
+    try:
+        import uvloop
+    except ImportError as e:
+        raise ImportError("uvloop is not installed: pip install uvloop") from e
+    return uvloop.new_event_loop
+
+
+def run[T](main: Coroutine[Any, Any, T], *, use_uvloop: bool = True) -> T:
+    """
+    asyncio.run в цикле событий uvloop.
+
+    grpc.aio привязывает каналы к циклу, в котором они созданы, поэтому
+    клиент нужно создавать и запускать внутри main.
+
+    :param main: Корутина.
+    :param use_uvloop: False - стандартный цикл asyncio.
+    """
+    try:
+        factory = uvloop_factory() if use_uvloop else None
+    except ImportError:
+        # Иначе при сборке мусора main выдаст RuntimeWarning
+        # "was never awaited", заслоняющий причину ошибки.
+        main.close()
+        raise
+    return asyncio.run(_checked(main), loop_factory=factory)
+
+
+async def _checked[T](main: Coroutine[Any, Any, T]) -> T:
+    try:
+        await check_grpc_aio()
+    except BaseException:
+        main.close()
+        raise
+    return await main
+
+
+def event_loop_implementation(
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> str:
+    """
+    Реализация цикла событий: uvloop, asyncio или модуль другого цикла.
+
+    :param loop: Цикл. По умолчанию - текущий.
+    """
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    return type(loop).__module__.split(".")[0]
+
+
+def check_event_loop(require_uvloop: bool = False) -> str:
+    """
+    Проверка текущего цикла событий.
+
+    :param require_uvloop: Выбросить UvloopRequiredError, если цикл
+        не uvloop.
+    :return: Реализация цикла.
+    """
+    implementation = event_loop_implementation()
+    logger.info("Event loop: %s", implementation)
+    if require_uvloop and implementation != "uvloop":
+        raise UvloopRequiredError(
+            f"The client runs on the {implementation!r} event loop, "
+            "uvloop is required. Start it with "
+            "finam_grpc_client.asyncio.run() or "
+            "asyncio.run(main, loop_factory=uvloop.new_event_loop)"
+        )
+    return implementation
+
+
+async def check_grpc_aio(timeout: float = GRPC_AIO_CHECK_TIMEOUT) -> None:
+    """
+    Проверка работы grpc.aio в текущем цикле событий.
+
+    Класс цикла не гарантирует, что grpc.aio получает в нем результаты
+    вызовов, поэтому выполняется вызов на адрес без сервера: он должен
+    завершиться RpcError. Проверка выполняется один раз для цикла.
+
+    :param timeout: Время ожидания ответа, сек.
+    :raises UnsupportedEventLoopError: Вызов не завершился за timeout
+        или завершился не RpcError.
+    """
+    loop = asyncio.get_running_loop()
+    if loop in _checked_loops:
+        return
+    implementation = event_loop_implementation(loop)
+    try:
+        async with insecure_channel(_CHECK_TARGET) as channel:
+            await asyncio.wait_for(
+                channel.unary_unary(_CHECK_METHOD)(b"", timeout=timeout),
+                timeout * 2,
+            )
+    except RpcError:
+        pass
+    except Exception as e:
+        raise UnsupportedEventLoopError(
+            f"grpc.aio does not work on the {implementation!r} event loop"
+        ) from e
+    _checked_loops.add(loop)
+    logger.debug("grpc.aio works on the %s event loop", implementation)
@@ -0,0 +1,37 @@
+from typing import AsyncIterable
+
+from google.protobuf.message import Message
+
+from finam_grpc_client.history import CsvWriter, ParquetWriter
+
+
+async def write_csv(messages: AsyncIterable[Message], path: str) -> int:
+    """
+    Запись сообщений асинхронного итератора в CSV с постоянным расходом
+    памяти.
+
+    :return: Количество записанных сообщений.
+    """
+    count = 0
+    with CsvWriter(path) as writer:
+        async for message in messages:
+            writer.write(message)
+            count += 1
+    return count
+
+
+async def write_parquet(
+    messages: AsyncIterable[Message], path: str, batch_size: int = 10_000
+) -> int:
+    """
+    Запись сообщений асинхронного итератора в Parquet. В памяти держится
+    не больше batch_size строк.
+
+    :return: Количество записанных сообщений.
+    """
+    count = 0
+    with ParquetWriter(path, batch_size) as writer:
+        async for message in messages:
+            writer.write(message)
+            count += 1
+    return count
@@ -0,0 +1,142 @@
+import asyncio
+from time import perf_counter
+from typing import Any, AsyncIterator
+
+from grpc import RpcError, StatusCode
+from grpc.aio import (
+    ClientInterceptor,
+    UnaryStreamClientInterceptor,
+    UnaryUnaryClientInterceptor,
+)
+
+from finam_grpc_client.instrumentation import (
+    Instrumentation,
+    is_internal_call,
+    message_size,
+    method_name,
+)
+
+
+class UnaryInstrumentationInterceptor(UnaryUnaryClientInterceptor):
+    """Передача событий унарных вызовов асинхронного канала."""
+
+    def __init__(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+
+    async def intercept_unary_unary(
+        self, continuation, client_call_details, request
+    ):
+        if is_internal_call():
+            return await continuation(client_call_details, request)
+        start = perf_counter()
+        call = await continuation(client_call_details, request)
+        code = StatusCode.OK
+        response_size = 0
+        try:
+            response_size = message_size(await call)
+        except RpcError as e:
+            code = e.code()
+        except asyncio.CancelledError:
+            code = StatusCode.CANCELLED
+            raise
+        finally:
+            self.__instrumentation.on_call(
+                method_name(client_call_details.method),
+                code,
+                perf_counter() - start,
+                message_size(request),
+                response_size,
+            )
+        return call
+
+
+class _InstrumentedResponses:
+    """
+    Сообщения стрима с передачей событий. Завершение учитывается
+    один раз: по окончании чтения или по отмене вызова, после которой
+    чтение не продолжается.
+    """
+
+    def __init__(
+        self,
+        call: Any,
+        method: str,
+        start: float,
+        instrumentation: Instrumentation,
+    ) -> None:
+        self.__call = call
+        self.__method = method
+        self.__start = start
+        self.__instrumentation = instrumentation
+        self.__messages = 0
+        self.__ended = False
+        call.add_done_callback(self.__done)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        instrumentation = self.__instrumentation
+        code = StatusCode.OK
+        try:
+            async for response in self.__call:
+                self.__messages += 1
+                instrumentation.on_stream_message(
+                    self.__method, response.ByteSize()
+                )
+                yield response
+        except RpcError as e:
+            code = e.code()
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            code = StatusCode.CANCELLED
+            raise
+        finally:
+            self.__end(code)
+
+    def __done(self, call: Any) -> None:
+        if call.cancelled():
+            self.__end(StatusCode.CANCELLED)
+
+    def __end(self, code: StatusCode) -> None:
+        if self.__ended:
+            return
+        self.__ended = True
+        self.__instrumentation.on_stream_end(
+            self.__method,
+            code,
+            perf_counter() - self.__start,
+            self.__messages,
+        )
+
+
+class StreamInstrumentationInterceptor(UnaryStreamClientInterceptor):
+    """Передача событий стримов асинхронного канала."""
+
+    def __init__(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+
+    async def intercept_unary_stream(
+        self, continuation, client_call_details, request
+    ):
+        if is_internal_call():
+            return await continuation(client_call_details, request)
+        start = perf_counter()
+        method = method_name(client_call_details.method)
+        self.__instrumentation.on_stream_start(method, message_size(request))
+        call = await continuation(client_call_details, request)
+        return _InstrumentedResponses(
+            call, method, start, self.__instrumentation
+        )
+
+
+def instrumentation_interceptors(
+    instrumentation: Instrumentation,
+) -> list[ClientInterceptor]:
+    """
+    Перехватчики для grpc.aio канала.
+
+    grpc.aio относит перехватчик только к одному типу вызовов,
+    поэтому унарные вызовы и стримы обрабатываются разными объектами.
+    """
+    return [
+        UnaryInstrumentationInterceptor(instrumentation),
+        StreamInstrumentationInterceptor(instrumentation),
+    ]
@@ -0,0 +1,57 @@
+import datetime
+from typing import AsyncIterator, Callable, Iterable
+
+from finam_grpc_client.asyncio.client import FinamClient
+from finam_grpc_client.journal import TRADES, TRANSACTIONS, TradeJournal
+
+_BATCH_SIZE = 1000
+
+
+class AsyncTradeJournal(TradeJournal):
+    """Журнал сделок и транзакций с загрузкой через асинхронный клиент."""
+
+    async def update(  # type: ignore[override]
+        self,
+        client: FinamClient,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> tuple[int, int]:
+        """
+        Загрузка новых сделок и транзакций.
+
+        :param client: Запущенный асинхронный клиент.
+        :param since: Начало загрузки для пустого журнала.
+        :param until: Конец загрузки. По умолчанию - текущее время.
+        :return: Количество новых сделок и транзакций.
+        """
+        trades_start, transactions_start, until = self._update_bounds(
+            since, until
+        )
+        trades = await self.__add(
+            client.iter_trades(self.account_id, trades_start, until),
+            self.add_trades,
+        )
+        self._mark_synced(TRADES, until)
+        transactions = await self.__add(
+            client.iter_transactions(
+                self.account_id, transactions_start, until
+            ),
+            self.add_transactions,
+        )
+        self._mark_synced(TRANSACTIONS, until)
+        return trades, transactions
+
+    @staticmethod
+    async def __add[
+        T
+    ](records: AsyncIterator[T], add: Callable[[Iterable[T]], int]) -> int:
+        count = 0
+        batch: list[T] = []
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= _BATCH_SIZE:
+                count += add(batch)
+                batch.clear()
+        if batch:
+            count += add(batch)
+        return count
@@ -0,0 +1,13 @@
+import asyncio
+
+from finam_grpc_client.rate_limit import RateLimiter
+
+
+class AsyncRateLimiter(RateLimiter):
+    """Ограничение количества запросов для асинхронного клиента."""
+
+    async def acquire(self) -> None:  # type: ignore[override]
+        """Ожидание места в окне."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,49 @@
+from asyncio import sleep
+from typing import AsyncIterator, Callable
+
+from google.protobuf.message import Message
+
+from finam_grpc_client.recording import (
+    RecordReader,
+    ReplayClient,
+    replay_schedule,
+)
+
+
+class AsyncReplayClient(ReplayClient):
+    """
+    Воспроизведение записанных стримов через интерфейс асинхронного
+    FinamClient.
+    """
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self) -> None:  # type: ignore[override]
+        """Запуск клиента. Нужен для совместимости с FinamClient."""
+        super().start()
+
+    async def stop(self) -> None:  # type: ignore[override]
+        """Остановка клиента."""
+        super().stop()
+
+    def __getattr__(self, name: str) -> Callable[..., AsyncIterator[Message]]:
+        if name.startswith("_") or name not in self.records:
+            raise AttributeError(name)
+        path = self.records[name]
+
+        def call(request: Message | None = None, **kwargs):
+            return self.__replay(path)
+
+        return call
+
+    async def __replay(self, path: str) -> AsyncIterator[Message]:
+        with RecordReader(path) as reader:
+            for delay, message in replay_schedule(reader, self.speed):
+                if delay > 0:
+                    await sleep(delay)
+                yield message
@@ -1,28 +1,140 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from functools import partial
-from typing import Any
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Sequence
 
 from grpc import Channel, UnaryStreamMultiCallable, UnaryUnaryMultiCallable
 from grpc.aio import Channel as AsyncChannel
 from grpc.aio import UnaryStreamMultiCallable as AsyncUnaryStreamMultiCallable
 from grpc.aio import UnaryUnaryMultiCallable as AsyncUnaryUnaryMultiCallable
 
-from .proto.grpc.tradeapi.v1.accounts.accounts_service_pb2_grpc import (
-    AccountsServiceStub,
+from .endpoints import EndpointSelector
+from .proto.grpc.tradeapi.v1.auth.auth_service_pb2_grpc import AuthServiceStub
+from .protobuf_backend import check_protobuf_backend
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
+    from .instrumentation import Instrumentation
+    from .proto.grpc.tradeapi.v1.accounts.accounts_service_pb2_grpc import (
+        AccountsServiceStub,
+    )
+    from .proto.grpc.tradeapi.v1.assets.assets_service_pb2_grpc import (
+        AssetsServiceStub,
+    )
+    from .proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2_grpc import (
+        MarketDataServiceStub,
+    )
+    from .proto.grpc.tradeapi.v1.metrics.usage_metrics_service_pb2_grpc import (
+        UsageMetricsServiceStub,
+    )
+    from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+        CancelOrderRequest,
+        Order,
+        OrderState,
+    )
+    from .proto.grpc.tradeapi.v1.orders.orders_service_pb2_grpc import (
+        OrdersServiceStub,
+    )
+    from .validation import OrderValidationError, OrderValidator
+
+PLACE_ORDER_METHOD = "/grpc.tradeapi.v1.orders.OrdersService/PlaceOrder"
+SUBSCRIBE_JWT_RENEWAL_METHOD = (
+    "/grpc.tradeapi.v1.auth.AuthService/SubscribeJwtRenewal"
 )
-from .proto.grpc.tradeapi.v1.assets.assets_service_pb2_grpc import (
-    AssetsServiceStub,
+SUBSCRIBE_ORDERS_METHOD = (
+    "/grpc.tradeapi.v1.orders.OrdersService/SubscribeOrders"
 )
-from .proto.grpc.tradeapi.v1.auth.auth_service_pb2_grpc import AuthServiceStub
-from .proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2_grpc import (
-    MarketDataServiceStub,
+SUBSCRIBE_TRADES_METHOD = (
+    "/grpc.tradeapi.v1.orders.OrdersService/SubscribeTrades"
 )
-from .proto.grpc.tradeapi.v1.metrics.usage_metrics_service_pb2_grpc import (
-    UsageMetricsServiceStub,
+SUBSCRIBE_QUOTE_METHOD = (
+    "/grpc.tradeapi.v1.marketdata.MarketDataService/SubscribeQuote"
 )
-from .proto.grpc.tradeapi.v1.orders.orders_service_pb2_grpc import (
-    OrdersServiceStub,
+SUBSCRIBE_ORDER_BOOK_METHOD = (
+    "/grpc.tradeapi.v1.marketdata.MarketDataService/SubscribeOrderBook"
 )
+# Время ожидания готовности канала при прогреве, сек.
+WARM_UP_TIMEOUT = 10.0
+# Сколько запросов пачки отправляется одновременно. Ограничивает только
+# параллельность, лимит запросов в минуту соблюдает rate_limit клиента.
+DEFAULT_MAX_IN_FLIGHT = 20
+
+# Модули и классы стабов сервисов. Загружаются при первом обращении
+# к методу сервиса, а не при импорте клиента.
+_API_PACKAGE = "grpc.tradeapi.v1"
+_PROTO_PACKAGE = f"{__package__}.proto.{_API_PACKAGE}"
+_STUBS = {
+    "accounts": ("accounts.accounts_service_pb2_grpc", "AccountsServiceStub"),
+    "assets": ("assets.assets_service_pb2_grpc", "AssetsServiceStub"),
+    "orders": ("orders.orders_service_pb2_grpc", "OrdersServiceStub"),
+    "market_data": (
+        "marketdata.marketdata_service_pb2_grpc",
+        "MarketDataServiceStub",
+    ),
+    "metrics": (
+        "metrics.usage_metrics_service_pb2_grpc",
+        "UsageMetricsServiceStub",
+    ),
+}
+# Унарные методы API по имени свойства клиента: сервис и метод стаба.
+_UNARY_METHODS = {
+    "get_account": ("accounts", "GetAccount"),
+    "trades": ("accounts", "Trades"),
+    "transactions": ("accounts", "Transactions"),
+    "assets": ("assets", "Assets"),
+    "clock": ("assets", "Clock"),
+    "exchanges": ("assets", "Exchanges"),
+    "get_asset": ("assets", "GetAsset"),
+    "get_asset_params": ("assets", "GetAssetParams"),
+    "options_chain": ("assets", "OptionsChain"),
+    "schedule": ("assets", "Schedule"),
+    "cancel_order": ("orders", "CancelOrder"),
+    "get_order": ("orders", "GetOrder"),
+    "get_orders": ("orders", "GetOrders"),
+    "place_order": ("orders", "PlaceOrder"),
+    "bars": ("market_data", "Bars"),
+    "last_quote": ("market_data", "LastQuote"),
+    "latest_trades": ("market_data", "LatestTrades"),
+    "order_book": ("market_data", "OrderBook"),
+    "get_usage_metrics": ("metrics", "GetUsageMetrics"),
+}
+# Стримы API по имени свойства клиента: сервис и метод стаба.
+_STREAM_METHODS = {
+    "subscribe_orders": ("orders", "SubscribeOrders"),
+    "subscribe_trades": ("orders", "SubscribeTrades"),
+    "subscribe_bars": ("market_data", "SubscribeBars"),
+    "subscribe_latest_trades": ("market_data", "SubscribeLatestTrades"),
+    "subscribe_order_book": ("market_data", "SubscribeOrderBook"),
+    "subscribe_quote": ("market_data", "SubscribeQuote"),
+}
+# Методы, не изменяющие состояние: их одинаковые вызовы можно объединять.
+READ_ONLY_METHODS = frozenset(_UNARY_METHODS) - {"place_order", "cancel_order"}
+
+
+def method_path(name: str) -> str:
+    """Полное имя gRPC метода по имени метода клиента."""
+    try:
+        service, method = _UNARY_METHODS.get(name) or _STREAM_METHODS[name]
+    except KeyError:
+        raise ValueError(f"Unknown method: {name!r}") from None
+    module, stub = _STUBS[service]
+    package = f"{_API_PACKAGE}.{module.split('.')[0]}"
+    return f"/{package}.{stub.removesuffix('Stub')}/{method}"
+
+
+def _coalesced_methods(coalesce: bool | Iterable[str]) -> frozenset[str]:
+    if coalesce is True:
+        names = READ_ONLY_METHODS
+    elif not coalesce:
+        return frozenset()
+    else:
+        names = frozenset(coalesce)
+    if not names <= READ_ONLY_METHODS:
+        unsupported = sorted(names - READ_ONLY_METHODS)
+        raise ValueError(f"Methods can not be coalesced: {unsupported}")
+    return frozenset(method_path(name) for name in names)
 
 
 class AbstractFinamClient[
@@ -31,48 +143,104 @@ class AbstractFinamClient[
     US: UnaryStreamMultiCallable | AsyncUnaryStreamMultiCallable,
 ](ABC):
 
-    def __init__(self, secret: str, url: str) -> None:
+    def __init__(
+        self,
+        secret: str,
+        url: str | Sequence[str],
+        validator: OrderValidator | None = None,
+        instrumentation: Instrumentation | None = None,
+        require_fast_protobuf: bool = False,
+        coalesce: bool | Iterable[str] = False,
+        cache: ResponseCache | None = None,
+    ) -> None:
         self.__secret = secret
-        self.__url = url
+        self.endpoints = EndpointSelector(
+            (url,) if isinstance(url, str) else url
+        )
+        self.__url = self.endpoints.urls[0]
+        self.validator = validator
+        self.instrumentation = instrumentation
+        self.require_fast_protobuf = require_fast_protobuf
+        self._coalesced_methods = _coalesced_methods(coalesce)
+        self.cache = cache
         self.__channel: C | None = None
+        self.__channels: dict[str, C] = {}
         self.session_token: str | None = None
         self._auth_stub: AuthServiceStub | None = None
-        self._accounts_stub: AccountsServiceStub | None = None
-        self._assets_stub: AssetsServiceStub | None = None
-        self._orders_stub: OrdersServiceStub | None = None
-        self._market_data_stub: MarketDataServiceStub | None = None
-        self._metrics_stub: UsageMetricsServiceStub | None = None
+        self.__stubs: dict[str, Any] = {}
+        self.__place_order_bytes: UU | None = None
 
     @property
     @abstractmethod
     def metadata(self) -> Any: ...
 
     @abstractmethod
-    def _create_channel(self) -> C: ...
+    def _create_channel(self, url: str) -> C: ...
+
+    def _close_channel(self, url: str, channel: C) -> Any:
+        return channel.close()
+
+    def _close_streams(self) -> None:
+        """Завершение открытых стримов перед закрытием канала."""
 
     def start(self) -> None:
-        channel = self._create_channel()
+        check_protobuf_backend(self.require_fast_protobuf)
+        channel = self._endpoint_channel(self.__url)
         self._auth_stub = AuthServiceStub(channel)
-        self._accounts_stub = AccountsServiceStub(channel)
-        self._assets_stub = AssetsServiceStub(channel)
-        self._orders_stub = OrdersServiceStub(channel)
-        self._market_data_stub = MarketDataServiceStub(channel)
-        self._metrics_stub = UsageMetricsServiceStub(channel)
         self.__channel = channel
 
-    def stop(self):
+    def _record_retry(self, method: str) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.on_retry(method)
+
+    def stop(self) -> list[Any]:
         channel = self.__channel
         self.__channel = None
         self._auth_stub = None
-        self._accounts_stub = None
-        self._assets_stub = None
-        self._orders_stub = None
-        self._market_data_stub = None
-        self._metrics_stub = None
+        self.__stubs = {}
+        self.__place_order_bytes = None
         self.session_token = None
         if not channel:
+            return []
+        self._close_streams()
+        return [self._close_endpoint(url) for url in list(self.__channels)]
+
+    def _endpoint_channel(self, url: str) -> C:
+        """Канал адреса. Создается при первом обращении."""
+        channel = self.__channels.get(url)
+        if channel is None:
+            channel = self.__channels[url] = self._create_channel(url)
+        return channel
+
+    def _close_endpoint(self, url: str) -> Any:
+        """Закрытие канала адреса, если он открыт."""
+        channel = self.__channels.pop(url, None)
+        if channel is None:
             return None
-        return channel.close()
+        return self._close_channel(url, channel)
+
+    def _switch_endpoint(self, url: str) -> str:
+        """
+        Переход новых вызовов на другой адрес.
+
+        Вызовы и стримы, начатые через прежний адрес, продолжаются
+        в его канале.
+
+        :return: Прежний адрес.
+        """
+        previous, self.__url = self.__url, url
+        channel = self._endpoint_channel(url)
+        self._auth_stub = AuthServiceStub(channel)
+        # Канал меняется до стабов: __stub, прочитавший новый словарь,
+        # создаст стаб уже для нового канала.
+        self.__channel = channel
+        self.__stubs = {}
+        self.__place_order_bytes = None
+        return previous
+
+    @property
+    def _channel(self) -> C | None:
+        return self.__channel
 
     @property
     def stopped(self) -> bool:
@@ -82,10 +250,88 @@ class AbstractFinamClient[
     def started(self) -> bool:
         return not self.stopped
 
+    @property
+    def _accounts_stub(self) -> AccountsServiceStub | None:
+        return self.__stub("accounts")
+
+    @property
+    def _assets_stub(self) -> AssetsServiceStub | None:
+        return self.__stub("assets")
+
+    @property
+    def _orders_stub(self) -> OrdersServiceStub | None:
+        return self.__stub("orders")
+
+    @property
+    def _market_data_stub(self) -> MarketDataServiceStub | None:
+        return self.__stub("market_data")
+
+    @property
+    def _metrics_stub(self) -> UsageMetricsServiceStub | None:
+        return self.__stub("metrics")
+
+    @property
+    def _place_order_bytes(self) -> UU | None:
+        if self.__place_order_bytes is None and self.__channel is not None:
+            from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+                OrderState,
+            )
+
+            self.__place_order_bytes = self.__channel.unary_unary(
+                PLACE_ORDER_METHOD,
+                response_deserializer=OrderState.FromString,
+            )
+        return self.__place_order_bytes
+
+    def _probe_method(self, url: str) -> UU:
+        """Метод Clock в канале адреса для проверки его доступности."""
+        from .proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+            ClockRequest,
+            ClockResponse,
+        )
+
+        return self._endpoint_channel(url).unary_unary(
+            method_path("clock"),
+            request_serializer=ClockRequest.SerializeToString,
+            response_deserializer=ClockResponse.FromString,
+        )
+
+    def _unary_method(self, name: str) -> UU:
+        try:
+            service, method = _UNARY_METHODS[name]
+        except KeyError:
+            raise ValueError(f"Unknown unary method: {name!r}") from None
+        return getattr(self.__stub(service), method)
+
+    def _warm_up(self) -> C:
+        # Загрузка модулей сервисов и создание стабов заранее, чтобы
+        # первая заявка не тратила на это время.
+        for name in _STUBS:
+            self.__stub(name)
+        if self._place_order_bytes is None:
+            raise RuntimeError("Client is not started")
+        return self.__channel
+
+    def __stub(self, name: str) -> Any:
+        stubs = self.__stubs
+        stub = stubs.get(name)
+        channel = self.__channel
+        if stub is None and channel is not None:
+            module, cls = _STUBS[name]
+            stub_class = getattr(
+                import_module(f"{_PROTO_PACKAGE}.{module}"), cls
+            )
+            stub = stubs[name] = stub_class(channel)
+        return stub
+
     @property
     def url(self) -> str:
         return self.__url
 
+    @property
+    def urls(self) -> tuple[str, ...]:
+        return self.endpoints.urls
+
     @property
     def secret(self) -> str:
         return self.__secret
@@ -160,7 +406,17 @@ class AbstractFinamClient[
 
     @property
     def place_order(self) -> partial[UU]:
-        return self._prepare_call(self._orders_stub.PlaceOrder)
+        call = self._prepare_call(self._orders_stub.PlaceOrder)
+        if self.validator is None:
+            return call
+        return partial(self._validated_call, call)
+
+    @property
+    def place_order_bytes(self) -> partial[UU]:
+        call = self._prepare_call(self._place_order_bytes)
+        if self.validator is None:
+            return call
+        return partial(self._validated_bytes_call, call)
 
     @property
     def subscribe_orders(self) -> partial[US]:
@@ -209,5 +465,52 @@ class AbstractFinamClient[
     def get_usage_metrics(self) -> partial[UU]:
         return self._prepare_call(self._metrics_stub.GetUsageMetrics)
 
+    @staticmethod
+    def _cancel_requests(
+        account_id: str,
+        orders: Iterable[OrderState],
+        filter: Callable[[OrderState], bool] | None,
+    ) -> list[CancelOrderRequest]:
+        from .order_status import FINAL_STATUSES
+        from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+            CancelOrderRequest,
+        )
+
+        return [
+            CancelOrderRequest(account_id=account_id, order_id=state.order_id)
+            for state in orders
+            if state.status not in FINAL_STATUSES
+            and (filter is None or filter(state))
+        ]
+
+    def _validated_call(self, call, request: Order, **kwargs):
+        self.validator.validate(request)
+        return call(request=request, **kwargs)
+
+    def _validated_bytes_call(self, call, request: bytes, **kwargs):
+        # Проверка требует разбора заявки, поэтому выполняется только
+        # при заданном validator.
+        from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import Order
+
+        self.validator.validate(Order.FromString(request))
+        return call(request=request, **kwargs)
+
+    def _validate_orders(
+        self, orders: Iterable[Order]
+    ) -> list[Order | OrderValidationError]:
+        if self.validator is None:
+            return list(orders)
+        from .validation import OrderValidationError
+
+        result: list[Order | OrderValidationError] = []
+        for order in orders:
+            try:
+                self.validator.validate(order)
+            except OrderValidationError as e:
+                result.append(e)
+            else:
+                result.append(order)
+        return result
+
     def _prepare_call(self, method):
         return partial(method, metadata=self.metadata)
@@ -0,0 +1,291 @@
+import threading
+from collections import OrderedDict
+from functools import partial
+from time import monotonic
+from typing import Any, Mapping
+
+from grpc import Call, Future, StatusCode, UnaryUnaryClientInterceptor
+
+from finam_grpc_client.base import READ_ONLY_METHODS, method_path
+from finam_grpc_client.instrumentation import method_name
+
+# Время жизни ответов по умолчанию, сек: справочники меняются редко,
+# параметры инструмента (ставки риска, доступность шорта) - в течение дня.
+DEFAULT_CACHE_TTL = {
+    "exchanges": 3600.0,
+    "get_asset": 3600.0,
+    "schedule": 600.0,
+    "get_asset_params": 60.0,
+    "options_chain": 60.0,
+}
+
+type _Key = tuple[str, bytes]
+
+
+class CacheStats:
+    """Счетчики кэша одного метода."""
+
+    __slots__ = ("hits", "stale_hits", "misses", "evictions", "refreshes")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Доля запросов, получивших ответ из кэша."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class _Entry:
+    __slots__ = ("response", "expires_at", "stale_until")
+
+    def __init__(self, response: Any, expires_at: float, stale_until: float):
+        self.response = response
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """
+    Кэш ответов унарных методов чтения.
+
+    Ключ - метод и детерминированно сериализованный запрос. Ответ
+    хранится ttl секунд своего метода; при превышении max_size
+    вытесняется дольше всего не запрашивавшийся ответ. Если задан
+    stale_while_revalidate, то в течение этого времени после истечения
+    ttl возвращается устаревший ответ, а запрос обновляется в фоне.
+
+    Кэшируются только успешные ответы. Ответы общие для всех вызовов,
+    изменять их нельзя. Один кэш можно передать нескольким клиентам,
+    в том числе синхронным и асинхронным одновременно.
+    """
+
+    def __init__(
+        self,
+        ttl: Mapping[str, float] | None = None,
+        *,
+        max_size: int = 1024,
+        stale_while_revalidate: float = 0.0,
+    ) -> None:
+        """
+        :param ttl: Время жизни ответа, сек, по имени метода клиента,
+            например {"get_asset": 3600}. По умолчанию DEFAULT_CACHE_TTL.
+        :param max_size: Максимальное количество ответов.
+        :param stale_while_revalidate: Сколько секунд после истечения
+            ttl отдавать устаревший ответ, обновляя его в фоне.
+        """
+        if ttl is None:
+            ttl = DEFAULT_CACHE_TTL
+        if not ttl.keys() <= READ_ONLY_METHODS:
+            unsupported = sorted(ttl.keys() - READ_ONLY_METHODS)
+            raise ValueError(f"Methods can not be cached: {unsupported}")
+        self.max_size = max_size
+        self.stale_while_revalidate = stale_while_revalidate
+        self.__ttl = {method_path(name): value for name, value in ttl.items()}
+        self.__names = {method_path(name): name for name in ttl}
+        self.__stats = {name: CacheStats() for name in ttl}
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[_Key, _Entry] = OrderedDict()
+        self.__refreshing: set[_Key] = set()
+
+    def __contains__(self, method: str) -> bool:
+        return method in self.__ttl
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def lookup(self, method: str, request: bytes) -> tuple[Any, bool]:
+        """
+        Поиск ответа.
+
+        :param method: Полное имя метода.
+        :param request: Сериализованный запрос.
+        :return: Ответ или None и признак того, что вызывающий должен
+            обновить устаревший ответ.
+        """
+        key = (method, request)
+        now = monotonic()
+        with self.__lock:
+            stats = self.__stats[self.__names[method]]
+            entry = self.__entries.get(key)
+            if entry is None or entry.stale_until <= now:
+                if entry is not None:
+                    del self.__entries[key]
+                stats.misses += 1
+                return None, False
+            self.__entries.move_to_end(key)
+            stats.hits += 1
+            if entry.expires_at > now:
+                return entry.response, False
+            stats.stale_hits += 1
+            if key in self.__refreshing:
+                return entry.response, False
+            self.__refreshing.add(key)
+            stats.refreshes += 1
+            return entry.response, True
+
+    def store(self, method: str, request: bytes, response: Any) -> None:
+        """Сохранение успешного ответа."""
+        key = (method, request)
+        expires_at = monotonic() + self.__ttl[method]
+        entry = _Entry(
+            response, expires_at, expires_at + self.stale_while_revalidate
+        )
+        with self.__lock:
+            self.__refreshing.discard(key)
+            self.__entries[key] = entry
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                (evicted, _), _ = self.__entries.popitem(last=False)
+                self.__stats[self.__names[evicted]].evictions += 1
+
+    def release(self, method: str, request: bytes) -> None:
+        """Завершение неудачного запроса: обновление можно повторить."""
+        with self.__lock:
+            self.__refreshing.discard((method, request))
+
+    def invalidate(self, name: str | None = None) -> None:
+        """
+        Удаление ответов.
+
+        :param name: Имя метода клиента. По умолчанию - все ответы.
+        """
+        with self.__lock:
+            if name is None:
+                self.__entries.clear()
+                return
+            method = method_path(name)
+            for key in [key for key in self.__entries if key[0] == method]:
+                del self.__entries[key]
+
+    @property
+    def hit_ratio(self) -> float:
+        """Доля запросов, получивших ответ из кэша, по всем методам."""
+        with self.__lock:
+            hits = sum(stats.hits for stats in self.__stats.values())
+            misses = sum(stats.misses for stats in self.__stats.values())
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Счетчики по именам методов клиента."""
+        with self.__lock:
+            return {
+                name: stats.as_dict() for name, stats in self.__stats.items()
+            }
+
+
+class _CachedCall(Call, Future):
+    """Завершенный вызов с ответом из кэша."""
+
+    def __init__(self, response: Any) -> None:
+        self.__response = response
+
+    def initial_metadata(self):
+        return ()
+
+    def trailing_metadata(self):
+        return ()
+
+    def code(self):
+        return StatusCode.OK
+
+    def details(self):
+        return ""
+
+    def is_active(self):
+        return False
+
+    def time_remaining(self):
+        return None
+
+    def cancel(self):
+        return False
+
+    def add_callback(self, callback):
+        return False
+
+    def cancelled(self):
+        return False
+
+    def running(self):
+        return False
+
+    def done(self):
+        return True
+
+    def result(self, timeout=None):
+        return self.__response
+
+    def exception(self, timeout=None):
+        return None
+
+    def traceback(self, timeout=None):
+        return None
+
+    def add_done_callback(self, fn):
+        fn(self)
+
+
+class CachingInterceptor(UnaryUnaryClientInterceptor):
+    """Ответы из ResponseCache для синхронного канала."""
+
+    def __init__(self, cache: ResponseCache) -> None:
+        self.__cache = cache
+
+    def intercept_unary_unary(
+        self, continuation, client_call_details, request
+    ):
+        method = method_name(client_call_details.method)
+        if method not in self.__cache:
+            return continuation(client_call_details, request)
+        key = request.SerializeToString(deterministic=True)
+        response, refresh = self.__cache.lookup(method, key)
+        if response is None:
+            return self.__fetch(
+                continuation, client_call_details, request, method, key
+            )
+        if refresh:
+            threading.Thread(
+                target=self.__fetch,
+                args=(continuation, client_call_details, request, method, key),
+                name="ResponseCacheRefresh",
+                daemon=True,
+            ).start()
+        return _CachedCall(response)
+
+    def __fetch(
+        self,
+        continuation,
+        client_call_details,
+        request,
+        method: str,
+        key: bytes,
+    ):
+        try:
+            call = continuation(client_call_details, request)
+        except BaseException:
+            self.__cache.release(method, key)
+            raise
+        call.add_done_callback(partial(self.__done, method, key))
+        return call
+
+    def __done(self, method: str, key: bytes, call: Any) -> None:
+        if call.code() == StatusCode.OK:
+            self.__cache.store(method, key, call.result())
+        else:
+            self.__cache.release(method, key)
@@ -0,0 +1,86 @@
+import logging
+import threading
+from functools import cache
+from typing import Any, Callable, Hashable
+
+from grpc import ChannelCredentials, ssl_channel_credentials
+
+logger = logging.getLogger("finam_grpc_client.channels")
+
+
+class ChannelRegistry:
+    """
+    Общие каналы с подсчетом ссылок.
+
+    Клиенты с share_channel=True получают канал по ключу (адрес, TLS и
+    для асинхронных клиентов - цикл событий и перехватчики) и
+    возвращают его при stop(). Канал закрывается, когда его вернул
+    последний клиент. Токен сессии передается в метаданных каждого
+    вызова, поэтому клиенты с разными секретами могут делить канал.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__channels: dict[Hashable, list[Any]] = {}
+
+    def acquire[C](self, key: Hashable, factory: Callable[[], C]) -> C:
+        """
+        Канал по ключу. Если его нет - создается вызовом factory.
+
+        Каждый acquire должен завершаться release с тем же ключом.
+        """
+        with self.__lock:
+            entry = self.__channels.get(key)
+            if entry is None:
+                entry = self.__channels[key] = [factory(), 0]
+                logger.debug("Shared channel created: %s", key)
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key: Hashable) -> Any:
+        """
+        Возврат канала.
+
+        :return: Результат close() канала, если он больше никем
+            не используется (для асинхронного канала - корутина),
+            иначе None.
+        """
+        with self.__lock:
+            entry = self.__channels[key]
+            entry[1] -= 1
+            if entry[1]:
+                return None
+            del self.__channels[key]
+        logger.debug("Shared channel closed: %s", key)
+        return entry[0].close()
+
+    def references(self, key: Hashable) -> int:
+        """Количество клиентов, использующих канал."""
+        entry = self.__channels.get(key)
+        return entry[1] if entry is not None else 0
+
+    def __len__(self) -> int:
+        return len(self.__channels)
+
+
+# Пауза между попытками подключения gRPC по умолчанию растет до 120 сек,
+# что слишком долго для торгового клиента.
+CHANNEL_OPTIONS = (
+    ("grpc.initial_reconnect_backoff_ms", 250),
+    ("grpc.max_reconnect_backoff_ms", 5000),
+)
+
+shared_channels = ChannelRegistry()
+"""Реестр общих каналов процесса."""
+
+
+@cache
+def channel_credentials() -> ChannelCredentials:
+    """
+    TLS учетные данные с системными корневыми сертификатами.
+
+    Создаются один раз на процесс: сертификаты не читаются заново для
+    каждого канала, а каналы с одинаковыми учетными данными могут
+    использовать общие соединения gRPC.
+    """
+    return ssl_channel_credentials()
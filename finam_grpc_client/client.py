@@ -1,24 +1,76 @@
+from __future__ import annotations
+
 import datetime
 import logging
-from threading import Thread
-from time import sleep
+from collections import deque
+from functools import partial
+from threading import Event, Thread
+from time import perf_counter, sleep
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Sequence
 
 from grpc import (
     Channel,
+    Future,
     RpcError,
     UnaryStreamMultiCallable,
     UnaryUnaryMultiCallable,
+    channel_ready_future,
+    insecure_channel,
+    intercept_channel,
     secure_channel,
-    ssl_channel_credentials,
 )
 
-from finam_grpc_client.base import AbstractFinamClient
+from finam_grpc_client.base import (
+    DEFAULT_MAX_IN_FLIGHT,
+    SUBSCRIBE_JWT_RENEWAL_METHOD,
+    WARM_UP_TIMEOUT,
+    AbstractFinamClient,
+)
+from finam_grpc_client.channels import (
+    CHANNEL_OPTIONS,
+    channel_credentials,
+    shared_channels,
+)
+from finam_grpc_client.connectivity import ConnectivityMonitor
+from finam_grpc_client.draining import CallTracker
+from finam_grpc_client.endpoints import (
+    DEFAULT_PROBE_INTERVAL,
+    PROBE_TIMEOUT,
+    probe_failed,
+)
+from finam_grpc_client.history import (
+    DEFAULT_HISTORY_LIMIT,
+    DEFAULT_HISTORY_WINDOW,
+    AdaptiveWindow,
+)
+from finam_grpc_client.instrumentation import internal_calls
 from finam_grpc_client.proto.grpc.tradeapi.v1.auth.auth_service_pb2 import (
     SubscribeJwtRenewalRequest,
     SubscribeJwtRenewalResponse,
     TokenDetailsRequest,
     TokenDetailsResponse,
 )
+from finam_grpc_client.rate_limit import DEFAULT_RATE_LIMIT, RateLimiter
+from finam_grpc_client.timestamps import timestamp_ns, to_datetime
+
+if TYPE_CHECKING:
+    from google.protobuf.message import Message
+
+    from finam_grpc_client.cache import ResponseCache
+    from finam_grpc_client.instrumentation import Instrumentation
+    from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+        Transaction,
+    )
+    from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+        Order,
+        OrderState,
+    )
+    from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+    from finam_grpc_client.validation import (
+        InstrumentRules,
+        OrderValidationError,
+        OrderValidator,
+    )
 
 
 class FinamClient(
@@ -30,8 +82,43 @@ class FinamClient(
 ):
     logger = logging.getLogger("finam_grpc_client.FinamClient")
 
-    def __init__(self, secret: str, *, url: str = "api.finam.ru:443"):
-        super().__init__(secret, url)
+    def __init__(
+        self,
+        secret: str,
+        *,
+        url: str | Sequence[str] = "api.finam.ru:443",
+        validator: OrderValidator | None = None,
+        secure: bool = True,
+        share_channel: bool = False,
+        warm_up: bool = False,
+        instrumentation: Instrumentation | None = None,
+        require_fast_protobuf: bool = False,
+        coalesce: bool | Iterable[str] = False,
+        cache: ResponseCache | None = None,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        rate_limit: int | None = DEFAULT_RATE_LIMIT,
+    ):
+        super().__init__(
+            secret,
+            url,
+            validator,
+            instrumentation,
+            require_fast_protobuf,
+            coalesce,
+            cache,
+        )
+        self.secure = secure
+        self.share_channel = share_channel
+        self.warm_up = warm_up
+        self.probe_interval = probe_interval
+        self.rate_limiter = (
+            RateLimiter(rate_limit) if rate_limit is not None else None
+        )
+        self.connectivity = ConnectivityMonitor(instrumentation)
+        self.__calls = CallTracker()
+        self.__probe_wakeup = Event()
+        self.connectivity.on_lost = self.__probe_wakeup.set
+        self.__probe_job: Thread | None = None
         self.__job: Thread | None = None
         self.__renewal_token_call: UnaryStreamMultiCallable | None = None
 
@@ -46,6 +133,15 @@ class FinamClient(
         if self.started:
             return
         super().start()
+        self.__calls.open()
+        self.connectivity.start(self._channel)
+        if len(self.urls) > 1:
+            self.__probe_job = Thread(
+                target=self.__probe_endpoints_job,
+                name="EndpointProbeJob",
+                daemon=True,
+            )
+            self.__probe_job.start()
         self.__job = Thread(
             target=self.__update_token_job,  # type: ignore
             name="UpdateTokenJob",
@@ -55,16 +151,27 @@ class FinamClient(
         self.logger.debug("Waiting for the session token to be updated")  # type: ignore
         while self.session_token is None:  # type: ignore
             sleep(1)
+        if self.warm_up:
+            channel_ready_future(self._warm_up()).result(WARM_UP_TIMEOUT)
         self.logger.info("FinamClient has started")  # type: ignore
 
-    def stop(self):
+    def stop(self, grace: float | None = None):
         if self.stopped:
             return
+        if grace is not None and not self.__calls.drain(grace):
+            self.logger.warning(
+                "Stopping with %s unfinished calls", self.__calls.in_flight
+            )
+        if self.__probe_job is not None:
+            job, self.__probe_job = self.__probe_job, None
+            self.__probe_wakeup.set()
+            job.join()
+        self.connectivity.stop()
         super().stop()
         if self.__renewal_token_call:  # type: ignore
             self.__renewal_token_call.cancel()  # type: ignore
             self.__renewal_token_call = None
-            self.__job.join() # type: ignore
+            self.__job.join()  # type: ignore
             self.__job = None
         self.logger.info("FinamClient has stopped")  # type: ignore
 
@@ -72,8 +179,301 @@ class FinamClient(
     def metadata(self) -> tuple[tuple[str, str], ...]:
         return (("authorization", self.session_token),)
 
-    def _create_channel(self):
-        return secure_channel(self.url, ssl_channel_credentials())
+    def place_orders(
+        self,
+        orders: Iterable[Order],
+        *,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError | OrderValidationError]:
+        return self.__pipeline(
+            self._orders_stub.PlaceOrder,  # type: ignore
+            self._validate_orders(orders),
+            max_in_flight,
+            timeout,
+        )
+
+    def map(
+        self,
+        method: str,
+        requests: Iterable[Message],
+        *,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float | None = None,
+    ) -> list:
+        call = self._unary_method(method)
+        if method == "place_order":
+            requests = self._validate_orders(requests)
+        return self.__pipeline(call, requests, max_in_flight, timeout)
+
+    def submit(
+        self, method: str, request: Message, *, timeout: float | None = None
+    ) -> Future:
+        if method == "place_order" and self.validator is not None:
+            self.validator.validate(request)
+        return self.__future(self._unary_method(method), request, timeout)
+
+    def cancel_all(
+        self,
+        account_id: str,
+        filter: Callable[[OrderState], bool] | None = None,
+        *,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError]:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+            OrdersRequest,
+        )
+
+        response = self.get_orders(
+            request=OrdersRequest(account_id=account_id), timeout=timeout
+        )
+        return self.__pipeline(
+            self._orders_stub.CancelOrder,  # type: ignore
+            self._cancel_requests(account_id, response.orders, filter),
+            max_in_flight,
+            timeout,
+        )
+
+    def instrument_rules(
+        self, symbol: str, account_id: str, *, with_schedule: bool = True
+    ) -> InstrumentRules:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+            GetAssetParamsRequest,
+            GetAssetRequest,
+            ScheduleRequest,
+        )
+        from finam_grpc_client.validation import InstrumentRules
+
+        asset = self._prepare_call(self._assets_stub.GetAsset.future)(
+            request=GetAssetRequest(symbol=symbol, account_id=account_id)
+        )
+        params = self._prepare_call(
+            self._assets_stub.GetAssetParams.future  # type: ignore
+        )(request=GetAssetParamsRequest(symbol=symbol, account_id=account_id))
+        schedule = None
+        if with_schedule:
+            schedule = self._prepare_call(
+                self._assets_stub.Schedule.future  # type: ignore
+            )(request=ScheduleRequest(symbol=symbol))
+        return InstrumentRules.from_responses(
+            asset.result(),
+            params.result(),
+            schedule.result() if schedule is not None else None,
+        )
+
+    def iter_trades(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+        window: datetime.timedelta = DEFAULT_HISTORY_WINDOW,
+    ) -> Iterator[AccountTrade]:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+            TradesRequest,
+        )
+
+        windows = AdaptiveWindow(start, end, limit, window)
+        while not windows.done:
+            response = self.trades(
+                request=TradesRequest(
+                    account_id=account_id,
+                    limit=limit,
+                    interval=windows.interval,
+                )
+            )
+            if windows.advance(len(response.trades)):
+                yield from response.trades
+
+    def iter_transactions(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+        window: datetime.timedelta = DEFAULT_HISTORY_WINDOW,
+    ) -> Iterator[Transaction]:
+        from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+            TransactionsRequest,
+        )
+
+        windows = AdaptiveWindow(start, end, limit, window)
+        while not windows.done:
+            response = self.transactions(
+                request=TransactionsRequest(
+                    account_id=account_id,
+                    limit=limit,
+                    interval=windows.interval,
+                )
+            )
+            if windows.advance(len(response.transactions)):
+                yield from response.transactions
+
+    def _create_channel(self, url):
+        if self.share_channel:
+            # Перехватчики у каждого клиента свои, поэтому общим
+            # является только канал без них.
+            channel = shared_channels.acquire(
+                (url, self.secure), partial(self.__new_channel, url)
+            )
+        else:
+            channel = self.__new_channel(url)
+        interceptors = []
+        # Кэш и объединение вызовов - первыми в цепочке, чтобы метрики
+        # вызовов учитывали только запросы, отправленные на сервер.
+        if self.cache is not None:
+            from finam_grpc_client.cache import CachingInterceptor
+
+            interceptors.append(CachingInterceptor(self.cache))
+        if self._coalesced_methods:
+            from finam_grpc_client.coalescing import CoalescingInterceptor
+
+            interceptors.append(
+                CoalescingInterceptor(
+                    self._coalesced_methods, self.instrumentation
+                )
+            )
+        if self.instrumentation is not None:
+            from finam_grpc_client.instrumentation import (
+                InstrumentationInterceptor,
+            )
+
+            interceptors.append(
+                InstrumentationInterceptor(self.instrumentation)
+            )
+        if not interceptors:
+            return channel
+        return intercept_channel(channel, *interceptors)
+
+    def _prepare_call(self, method):
+        return partial(self.__call, method, metadata=self.metadata)
+
+    def _close_streams(self) -> None:
+        self.__calls.close_streams()
+
+    def _close_channel(self, url, channel):
+        if self.share_channel:
+            return shared_channels.release((url, self.secure))
+        return channel.close()
+
+    def __call(self, method, *args, **kwargs):
+        calls = self.__calls
+        if isinstance(method, UnaryStreamMultiCallable):
+            calls.admit()
+            return calls.stream(method(*args, **kwargs))
+        calls.begin()
+        try:
+            result = method(*args, **kwargs)
+        except BaseException:
+            calls.end()
+            raise
+        # Методы future возвращают незавершенный вызов, остальные - ответ.
+        if isinstance(result, Future):
+            return calls.future(result)
+        calls.end()
+        return result
+
+    def __new_channel(self, url: str) -> Channel:
+        if self.secure:
+            return secure_channel(url, channel_credentials(), CHANNEL_OPTIONS)
+        return insecure_channel(url, CHANNEL_OPTIONS)
+
+    def __pipeline(
+        self,
+        method: UnaryUnaryMultiCallable,
+        requests: Iterable,
+        max_in_flight: int,
+        timeout: float | None,
+    ) -> list:
+        from finam_grpc_client.validation import OrderValidationError
+
+        results = []
+        window: deque[Future | OrderValidationError] = deque()
+        for request in requests:
+            if len(window) >= max_in_flight:
+                results.append(self.__result(window.popleft()))
+            if isinstance(request, OrderValidationError):
+                window.append(request)
+                continue
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            window.append(self.__future(method, request, timeout))
+        while window:
+            results.append(self.__result(window.popleft()))
+        return results
+
+    def __future(
+        self,
+        method: UnaryUnaryMultiCallable,
+        request: Message,
+        timeout: float | None,
+    ) -> Future:
+        self.__calls.begin()
+        try:
+            future = method.future(
+                request, timeout=timeout, metadata=self.metadata
+            )
+        except BaseException:
+            self.__calls.end()
+            raise
+        return self.__calls.future(future)
+
+    @staticmethod
+    def __result(future: Future | OrderValidationError):
+        if not isinstance(future, Future):
+            return future
+        try:
+            return future.result()
+        except RpcError as e:
+            return e
+
+    def __probe_endpoints_job(self):
+        self.logger.info("Launching an endpoint probe task")
+        while self.__probe_job is not None:
+            self.__probe_wakeup.clear()
+            self.__probe_endpoints()
+            self.__probe_wakeup.wait(self.probe_interval)
+        self.logger.info("Stopping an endpoint probe task")
+
+    def __probe_endpoints(self):
+        from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+            ClockRequest,
+        )
+
+        # До получения токена сервер ответит ошибкой авторизации,
+        # но и она подтверждает, что адрес доступен.
+        metadata = self.metadata if self.session_token is not None else None
+        for url in self.urls:
+            start = perf_counter()
+            try:
+                with internal_calls():
+                    self._probe_method(url)(
+                        ClockRequest(),
+                        timeout=PROBE_TIMEOUT,
+                        metadata=metadata,
+                    )
+            except RpcError as e:
+                if probe_failed(e):
+                    self.endpoints.record(url, None)
+                    continue
+            self.endpoints.record(url, perf_counter() - start)
+        url = self.endpoints.select(self.url)
+        if url != self.url:
+            self.__switch_endpoint(url)
+
+    def __switch_endpoint(self, url: str):
+        available = self.endpoints.available(self.url)
+        self.logger.warning("Switching from %s to %s", self.url, url)
+        self.connectivity.stop()
+        previous = self._switch_endpoint(url)
+        self.connectivity.start(self._channel)
+        if not available:
+            # Вызовы недоступного адреса отменяются, чтобы стримы
+            # переподключились уже к новому адресу.
+            self._close_endpoint(previous)
 
     def __update_token_job(self):
         response: SubscribeJwtRenewalResponse
@@ -81,24 +481,30 @@ class FinamClient(
         timezone = datetime.datetime.now().astimezone().tzinfo
         self.logger.info("Launching a session token renewal task")
         while self.started:
+            generation = self.connectivity.generation
             try:
                 self.__renewal_token_call = self.subscribe_jwt_renewal(
                     request=SubscribeJwtRenewalRequest(secret=self.secret)
                 )
                 for response in self.__renewal_token_call:
                     self.session_token = response.token
+                    # Срок действия нужен только для отладочного лога:
+                    # без него токен не запрашивается повторно.
+                    if not self.logger.isEnabledFor(logging.DEBUG):
+                        continue
                     token_details = self.token_details(
                         request=TokenDetailsRequest(token=response.token)
                     )
                     self.logger.debug(
                         "New auth token received. Expiration: %s",
-                        token_details.expires_at.ToDatetime(
-                            tzinfo=timezone
+                        to_datetime(
+                            timestamp_ns(token_details.expires_at), timezone
                         ).isoformat(),
                     )
             except RpcError as e:
                 if self.stopped:
                     break
                 self.logger.exception(e.details(), exc_info=e)
-                sleep(10)
+                self.connectivity.wait(generation, 10)
+                self._record_retry(SUBSCRIBE_JWT_RENEWAL_METHOD)
         self.logger.info("Stopping a session token renewal task")
@@ -1,12 +1,19 @@
-from typing import Callable, Iterator, Self
+import datetime
+from typing import Callable, Iterable, Iterator, Self, Sequence
 
-from grpc import StatusCode
+from google.protobuf.message import Message
+from grpc import Future, RpcError, StatusCode
 
+from .cache import ResponseCache
+from .connectivity import ConnectivityMonitor
+from .endpoints import DEFAULT_PROBE_INTERVAL, EndpointSelector
+from .instrumentation import Instrumentation
 from .proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
     GetAccountRequest,
     GetAccountResponse,
     TradesRequest,
     TradesResponse,
+    Transaction,
     TransactionsRequest,
     TransactionsResponse,
 )
@@ -68,6 +75,9 @@ from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
     SubscribeTradesRequest,
     SubscribeTradesResponse,
 )
+from .proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+from .rate_limit import DEFAULT_RATE_LIMIT, RateLimiter
+from .validation import InstrumentRules, OrderValidationError, OrderValidator
 
 class CallIterator[R]:
     """
@@ -87,7 +97,48 @@ class CallIterator[R]:
     def time_remaining(self) -> float: ...
 
 class FinamClient:
-    def __init__(self, secret: str, *, url: str = "api.finam.ru:443"):
+    validator: OrderValidator | None
+    """Локальная проверка заявок перед отправкой."""
+    secure: bool
+    """Подключение по TLS."""
+    share_channel: bool
+    """Использование общего канала процесса."""
+    warm_up: bool
+    """Прогрев канала и стабов при start()."""
+    connectivity: ConnectivityMonitor
+    """
+    Состояние соединения канала. После потери соединения стрим токенов
+    переоткрывается сразу при его восстановлении.
+    """
+    instrumentation: Instrumentation | None
+    """Обработчик событий вызовов."""
+    require_fast_protobuf: bool
+    """Запрет запуска на чисто Python реализации protobuf."""
+    cache: ResponseCache | None
+    """Кэш ответов методов чтения."""
+    endpoints: EndpointSelector
+    """Результаты проверок адресов API."""
+    probe_interval: float
+    """Интервал проверки адресов, сек."""
+    rate_limiter: RateLimiter | None
+    """Ограничение частоты запросов пачек."""
+
+    def __init__(
+        self,
+        secret: str,
+        *,
+        url: str | Sequence[str] = "api.finam.ru:443",
+        validator: OrderValidator | None = None,
+        secure: bool = True,
+        share_channel: bool = False,
+        warm_up: bool = False,
+        instrumentation: Instrumentation | None = None,
+        require_fast_protobuf: bool = False,
+        coalesce: bool | Iterable[str] = False,
+        cache: ResponseCache | None = None,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        rate_limit: int | None = DEFAULT_RATE_LIMIT,
+    ):
         """
         Клиент для взаимодействия с Api Finam.
 
@@ -101,7 +152,49 @@ class FinamClient:
         Также можно воспользоваться контекстным менеджером.
 
         :param secret: Токен, полученный на сайте Finam (https://tradeapi.finam.ru/docs/tokens/).
-        :param url: Адрес для подключения к API.
+        :param url: Адрес для подключения к API или несколько адресов
+            в порядке предпочтения. С несколькими адресами клиент
+            проверяет их вызовом Clock и переводит новые вызовы на
+            другой адрес, если текущий недоступен или другой отвечает
+            заметно быстрее. Стримы недоступного адреса отменяются
+            и переоткрываются на новом.
+        :param validator: Локальная проверка заявок. Если задана,
+            place_order и place_orders не отправляют заявки,
+            не прошедшие проверку, а выбрасывают (возвращают)
+            OrderValidationError.
+        :param secure: Подключение по TLS. False - без шифрования,
+            например к локальному FakeFinamServer.
+        :param share_channel: Использовать общий канал с другими
+            клиентами процесса с тем же url и secure вместо отдельного
+            соединения. Токен сессии у каждого клиента свой.
+            Клиенты с разными секретами и перехватчиками (cache,
+            coalesce, instrumentation) делят одно соединение.
+        :param warm_up: При start() загрузить модули всех сервисов,
+            создать стабы и дождаться готовности канала (не дольше
+            WARM_UP_TIMEOUT), чтобы первый вызов, например заявка,
+            не тратил время на подготовку.
+        :param instrumentation: Обработчик событий вызовов: задержки,
+            размеры сообщений, коды ответов, переподключения.
+            Например, MetricsRegistry. Подключается при start(),
+            без него вызовы не перехватываются.
+        :param require_fast_protobuf: При start() выбросить
+            SlowProtobufBackendError, если protobuf работает на чисто
+            Python реализации. По умолчанию в этом случае в лог
+            пишется предупреждение.
+        :param coalesce: Объединение одновременных вызовов с одинаковым
+            запросом в один запрос к серверу: True - для всех методов
+            чтения, либо имена методов, например ("last_quote",
+            "get_asset"). Объединенные вызовы получают общий ответ
+            или ошибку и учитываются в instrumentation.on_coalesce.
+        :param cache: Кэш ответов методов чтения, например
+            ResponseCache({"get_asset": 3600}). Ответы из кэша
+            не отправляются на сервер. Подключается при start().
+        :param probe_interval: Интервал проверки адресов, сек, если
+            их несколько. При потере соединения проверка выполняется
+            сразу.
+        :param rate_limit: Сколько запросов place_orders, cancel_all
+            и map отправляется за минуту, по умолчанию - лимит API.
+            None - без ограничения. Другие вызовы не учитываются.
         """
 
     def __enter__(self) -> Self: ...
@@ -122,11 +215,23 @@ class FinamClient:
     def url(self) -> str:
         """Адрес для отправки запросов."""
 
+    @property
+    def urls(self) -> tuple[str, ...]:
+        """Все адреса API в порядке предпочтения."""
+
     def start(self) -> None:
         """Создание нового канала и подключение сервисов."""
 
-    def stop(self) -> None:
-        """Закрытие канала и отключение сервисов."""
+    def stop(self, grace: float | None = None) -> None:
+        """
+        Закрытие канала и отключение сервисов.
+
+        Открытые стримы завершаются без ошибки.
+
+        :param grace: Сколько секунд ждать завершения отправленных
+            унарных вызовов. Новые вызовы при этом отклоняются
+            с ClientStoppingError. По умолчанию вызовы отменяются сразу.
+        """
     ######################### Auth #########################
     def auth(self, request: AuthRequest) -> AuthResponse:
         """Получение JWT токена из API токена."""
@@ -151,6 +256,43 @@ class FinamClient:
         self, request: TransactionsRequest
     ) -> TransactionsResponse:
         """Получение списка транзакций аккаунта."""
+
+    def iter_trades(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = 1000,
+        window: datetime.timedelta = datetime.timedelta(days=1),
+    ) -> Iterator[AccountTrade]:
+        """
+        Постраничная выгрузка истории сделок аккаунта.
+
+        Интервал [start, end) разбивается на окна. Если ответ содержит
+        limit записей, окно уменьшается и запрос повторяется.
+
+        :param account_id: Идентификатор аккаунта.
+        :param start: Начало интервала.
+        :param end: Конец интервала.
+        :param limit: Лимит записей в одном запросе.
+        :param window: Начальный (и максимальный) размер окна.
+        """
+
+    def iter_transactions(
+        self,
+        account_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        *,
+        limit: int = 1000,
+        window: datetime.timedelta = datetime.timedelta(days=1),
+    ) -> Iterator[Transaction]:
+        """
+        Постраничная выгрузка транзакций аккаунта.
+
+        Работает так же, как iter_trades.
+        """
     ######################## Assets ########################
     def assets(self, request: AssetsRequest) -> AssetsResponse:
         """Получение списка доступных инструментов, их описание."""
@@ -169,6 +311,16 @@ class FinamClient:
     ) -> GetAssetParamsResponse:
         """Получение торговых параметров по инструменту."""
 
+    def instrument_rules(
+        self, symbol: str, account_id: str, *, with_schedule: bool = True
+    ) -> InstrumentRules:
+        """
+        Получение параметров инструмента для OrderValidator.
+
+        Запросы get_asset, get_asset_params и schedule
+        отправляются параллельно.
+        """
+
     def options_chain(
         self, request: OptionsChainRequest
     ) -> OptionsChainResponse:
@@ -189,6 +341,15 @@ class FinamClient:
     def place_order(self, request: Order) -> OrderState:
         """Выставление биржевой заявки."""
 
+    def place_order_bytes(self, request: bytes) -> OrderState:
+        """
+        Выставление заранее сериализованной биржевой заявки.
+
+        Используется вместе с OrderTemplate.build(). Если задан
+        validator, заявка разбирается и проверяется перед отправкой,
+        как в place_order.
+        """
+
     def subscribe_orders(
         self, request: SubscribeOrdersRequest
     ) -> CallIterator[SubscribeOrdersResponse]:
@@ -198,6 +359,88 @@ class FinamClient:
         self, request: SubscribeTradesRequest
     ) -> CallIterator[SubscribeTradesResponse]:
         """Подписка на собственные сделки. Стрим метод."""
+
+    def place_orders(
+        self,
+        orders: Iterable[Order],
+        *,
+        max_in_flight: int = 20,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError | OrderValidationError]:
+        """
+        Выставление пачки заявок.
+
+        Запросы отправляются параллельно, одновременно не больше
+        max_in_flight и не чаще rate_limit в минуту. Результаты
+        возвращаются в порядке заявок:
+        OrderState, ошибка RpcError для отклоненной заявки или
+        OrderValidationError для заявки, не прошедшей локальную проверку.
+
+        :param orders: Заявки.
+        :param max_in_flight: Максимальное число одновременных запросов.
+        :param timeout: Таймаут каждого запроса, сек.
+        """
+
+    def cancel_all(
+        self,
+        account_id: str,
+        filter: Callable[[OrderState], bool] | None = None,
+        *,
+        max_in_flight: int = 20,
+        timeout: float | None = None,
+    ) -> list[OrderState | RpcError]:
+        """
+        Отмена всех активных заявок счета.
+
+        Список заявок запрашивается через get_orders, отмены отправляются
+        параллельно, одновременно не больше max_in_flight и не чаще
+        rate_limit в минуту.
+
+        :param account_id: Идентификатор счета.
+        :param filter: Отбор заявок для отмены, например по символу.
+        :param max_in_flight: Максимальное число одновременных запросов.
+        :param timeout: Таймаут каждого запроса, сек.
+        """
+
+    def map(
+        self,
+        method: str,
+        requests: Iterable[Message],
+        *,
+        max_in_flight: int = 20,
+        timeout: float | None = None,
+    ) -> list:
+        """
+        Параллельный вызов унарного метода для каждого запроса.
+
+        Запросы отправляются через .future() без отдельных потоков,
+        одновременно не больше max_in_flight и не чаще rate_limit
+        в минуту. Результаты возвращаются в порядке запросов: ответ
+        или ошибка RpcError. Для place_order заявки проходят локальную
+        проверку, как в place_orders.
+
+        client.map("get_asset", [GetAssetRequest(...), ...])
+
+        :param method: Имя унарного метода клиента, например "last_quote".
+        :param requests: Запросы.
+        :param max_in_flight: Максимальное число одновременных запросов.
+        :param timeout: Таймаут каждого запроса, сек.
+        """
+
+    def submit(
+        self, method: str, request: Message, *, timeout: float | None = None
+    ) -> Future:
+        """
+        Асинхронный вызов унарного метода.
+
+        Возвращает grpc.Future: результат - future.result(), ошибка
+        запроса выбрасывается из result(). Число одновременных запросов
+        не ограничивается.
+
+        :param method: Имя унарного метода клиента, например "last_quote".
+        :param request: Запрос.
+        :param timeout: Таймаут запроса, сек.
+        """
     ###################### Market Data ######################
     def bars(self, request: BarsRequest) -> BarsResponse:
         """Получение исторических данных по инструменту (агрегированные свечи)."""
@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from typing import Any, Iterable
+
+from grpc import UnaryUnaryClientInterceptor
+
+from finam_grpc_client.instrumentation import Instrumentation, method_name
+
+type CallKey = tuple[str, str | None, bytes]
+
+
+def call_key(method: str, client_call_details: Any, request: Any) -> CallKey:
+    """
+    Ключ объединения вызова: метод, токен из метаданных и сериализованный
+    запрос. Вызовы с разными токенами не объединяются, даже если клиенты
+    используют общий канал.
+    """
+    authorization = None
+    for key, value in client_call_details.metadata or ():
+        if key == "authorization":
+            authorization = value
+            break
+    return method, authorization, request.SerializeToString(deterministic=True)
+
+
+def deadline(timeout: float | None) -> float | None:
+    """Момент истечения таймаута по time.monotonic()."""
+    return None if timeout is None else monotonic() + timeout
+
+
+def joinable(leader: float | None, follower: float | None) -> bool:
+    """
+    Может ли вызов с дедлайном follower ждать ответ вызова с дедлайном
+    leader: ожидание не должно пережить собственный таймаут вызова.
+    """
+    if leader is None:
+        return follower is None
+    return follower is None or leader <= follower
+
+
+class _Flight(Future):
+    def __init__(self, deadline: float | None) -> None:
+        super().__init__()
+        self.deadline = deadline
+
+
+class CoalescingInterceptor(UnaryUnaryClientInterceptor):
+    """
+    Объединение одинаковых одновременных унарных вызовов.
+
+    Пока вызов метода из methods выполняется, вызовы того же метода
+    с побайтно совпадающим сериализованным запросом не отправляются
+    на сервер, а получают тот же объект вызова: тот же ответ или ту же
+    ошибку. Ответ общий для всех вызовов, изменять его нельзя.
+
+    Объединяются только вызовы с одинаковым токеном авторизации.
+    Вызов, таймаут которого истекает раньше выполняющегося, отправляется
+    на сервер отдельно.
+    """
+
+    def __init__(
+        self,
+        methods: Iterable[str],
+        instrumentation: Instrumentation | None = None,
+    ) -> None:
+        """
+        :param methods: Полные имена методов, например
+            /grpc.tradeapi.v1.marketdata.MarketDataService/LastQuote.
+        :param instrumentation: Получатель событий on_coalesce.
+        """
+        self.__methods = frozenset(methods)
+        self.__instrumentation = instrumentation
+        self.__lock = threading.Lock()
+        self.__flights: dict[CallKey, _Flight] = {}
+
+    def intercept_unary_unary(
+        self, continuation, client_call_details, request
+    ):
+        method = method_name(client_call_details.method)
+        if method not in self.__methods:
+            return continuation(client_call_details, request)
+        key = call_key(method, client_call_details, request)
+        timeout = client_call_details.timeout
+        call_deadline = deadline(timeout)
+        with self.__lock:
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = _Flight(call_deadline)
+            elif not joinable(flight.deadline, call_deadline):
+                flight = None
+        if flight is None:
+            return continuation(client_call_details, request)
+        if not leader:
+            if self.__instrumentation is not None:
+                self.__instrumentation.on_coalesce(method)
+            return flight.result(timeout)
+        try:
+            call = continuation(client_call_details, request)
+        except BaseException as e:
+            self.__land(key, flight)
+            flight.set_exception(e)
+            raise
+        flight.set_result(call)
+        call.add_done_callback(lambda _: self.__land(key, flight))
+        return call
+
+    def __land(self, key: CallKey, flight: _Flight) -> None:
+        with self.__lock:
+            if self.__flights.get(key) is flight:
+                del self.__flights[key]
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся объединяемых вызовов."""
+        return len(self.__flights)
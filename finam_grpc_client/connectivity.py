@@ -0,0 +1,196 @@
+import logging
+import threading
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from google.protobuf.message import Message
+from grpc import ChannelConnectivity, RpcError, channel_ready_future
+
+from finam_grpc_client.base import method_path
+from finam_grpc_client.instrumentation import Instrumentation
+
+if TYPE_CHECKING:
+    from finam_grpc_client.client import FinamClient
+
+logger = logging.getLogger("finam_grpc_client.connectivity")
+
+# Состояния, из которых монитор сразу запрашивает подключение.
+_RECONNECT_STATES = (
+    ChannelConnectivity.IDLE,
+    ChannelConnectivity.TRANSIENT_FAILURE,
+)
+
+
+class ConnectivityState:
+    """
+    Учет состояний канала.
+
+    generation увеличивается при каждом переходе в READY. Цикл
+    переподключения стрима запоминает generation перед вызовом и после
+    ошибки ждет его увеличения: если соединение восстановилось, стрим
+    открывается сразу, а не после полной паузы. Если ошибка не связана
+    с соединением, generation не меняется и выдерживается вся пауза.
+    """
+
+    def __init__(self, instrumentation: Instrumentation | None = None):
+        self.instrumentation = instrumentation
+        self.state: ChannelConnectivity | None = None
+        self.generation = 0
+        # Вызывается при потере соединения.
+        self.on_lost: Callable[[], None] | None = None
+        self.__lost_at: float | None = None
+
+    def _reset(self) -> None:
+        self.state = None
+        self.__lost_at = None
+
+    def _update(self, state: ChannelConnectivity) -> bool:
+        """
+        Новое состояние канала.
+
+        :return: Стал ли канал готов (READY) после другого состояния.
+        """
+        previous, self.state = self.state, state
+        if state == previous:
+            return False
+        if state == ChannelConnectivity.READY:
+            self.generation += 1
+            if self.__lost_at is not None:
+                duration = monotonic() - self.__lost_at
+                self.__lost_at = None
+                logger.info("Channel reconnected in %.3f s", duration)
+                if self.instrumentation is not None:
+                    self.instrumentation.on_reconnect(duration)
+            return True
+        if previous == ChannelConnectivity.READY:
+            self.__lost_at = monotonic()
+            logger.warning("Channel connection lost: %s", state.name)
+            if self.on_lost is not None:
+                self.on_lost()
+        return False
+
+
+class ConnectivityMonitor(ConnectivityState):
+    """Отслеживание состояния синхронного канала."""
+
+    def __init__(self, instrumentation: Instrumentation | None = None):
+        super().__init__(instrumentation)
+        self.__condition = threading.Condition()
+        self.__channel: Any = None
+        self.__connect: Any = None
+
+    def start(self, channel: Any) -> None:
+        self._reset()
+        self.__channel = channel
+        channel.subscribe(self.__on_state, try_to_connect=True)
+
+    def stop(self) -> None:
+        channel, self.__channel = self.__channel, None
+        if channel is not None:
+            channel.unsubscribe(self.__on_state)
+        if self.__connect is not None:
+            self.__connect.cancel()
+            self.__connect = None
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def wait(self, generation: int, timeout: float) -> bool:
+        """
+        Ожидание восстановления соединения.
+
+        :param generation: Значение generation до ошибки.
+        :param timeout: Максимальное время ожидания, сек.
+        :return: Восстановлено ли соединение.
+        """
+        with self.__condition:
+            self.__condition.wait_for(
+                lambda: self.generation > generation or self.__channel is None,
+                timeout,
+            )
+            return self.generation > generation
+
+    def __on_state(self, state: ChannelConnectivity) -> None:
+        with self.__condition:
+            if self._update(state):
+                self.__condition.notify_all()
+        if state not in _RECONNECT_STATES or self.__channel is None:
+            return
+        # Канал в IDLE не подключается до следующего вызова,
+        # поэтому подключение запрашивается сразу.
+        if self.__connect is None or self.__connect.done():
+            self.__connect = channel_ready_future(self.__channel)
+
+
+class ResubscribingStream:
+    """
+    Стрим клиента, который открывается заново после обрыва.
+
+    После ошибки или закрытия стрима сервером запрос повторяется, как
+    только соединение канала восстановится (в том числе после
+    переключения на другой адрес), но не позже чем через delay.
+    Итерация заканчивается после cancel() или остановки клиента.
+    Сообщения, отправленные сервером во время обрыва, теряются.
+    """
+
+    def __init__(
+        self,
+        client: "FinamClient",
+        method: str,
+        request: Message,
+        delay: float,
+    ) -> None:
+        self.__client = client
+        self.__method = method
+        self.__method_path = method_path(method)
+        self.__request = request
+        self.__delay = delay
+        self.__call: Any = None
+        self.__cancelled = False
+
+    def cancel(self) -> None:
+        """Отмена стрима."""
+        self.__cancelled = True
+        if self.__call is not None:
+            self.__call.cancel()
+
+    def __iter__(self) -> Iterator[Message]:
+        client = self.__client
+        while True:
+            generation = client.connectivity.generation
+            try:
+                # Метод берется заново: в метаданных текущий токен.
+                self.__call = getattr(client, self.__method)(
+                    request=self.__request
+                )
+                if self.__cancelled:
+                    self.__call.cancel()
+                yield from self.__call
+            except RpcError as e:
+                if not (self.__cancelled or client.stopped):
+                    logger.warning(
+                        "%s stream failed: %s", self.__method, e.code()
+                    )
+            if self.__cancelled or client.stopped:
+                return
+            client.connectivity.wait(generation, self.__delay)
+            if self.__cancelled or client.stopped:
+                return
+            client._record_retry(self.__method_path)
+
+
+def resubscribing(
+    client: "FinamClient",
+    method: str,
+    request: Message,
+    *,
+    delay: float = 10,
+) -> ResubscribingStream:
+    """
+    Подписка, которая переживает обрывы соединения и смену адреса.
+
+    :param client: Запущенный клиент.
+    :param method: Имя Subscribe* метода клиента, например "subscribe_quote".
+    :param request: Запрос подписки.
+    :param delay: Максимальная пауза перед повторной подпиской, сек.
+    """
+    return ResubscribingStream(client, method, request, delay)
@@ -0,0 +1,119 @@
+import threading
+from typing import Any
+
+from grpc import Future, RpcError, StatusCode
+
+
+class ClientStoppingError(RuntimeError):
+    """Клиент останавливается и не принимает новые вызовы."""
+
+
+class ClosableStream:
+    """
+    Стрим, который при закрытии клиентом завершается без ошибки.
+
+    Остальные атрибуты и методы - атрибуты и методы вызова gRPC.
+    """
+
+    def __init__(self, call: Any, tracker: "CallTracker") -> None:
+        self.__call = call
+        self.__tracker = tracker
+        self.closed = False
+        call.add_done_callback(self.__done)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__call, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.__call)
+        except RpcError as e:
+            if self.closed and e.code() == StatusCode.CANCELLED:
+                raise StopIteration from None
+            raise
+
+    def close(self) -> None:
+        """Отмена вызова: итерация по стриму завершается."""
+        self.closed = True
+        self.__call.cancel()
+
+    def __done(self, _: Any) -> None:
+        self.__tracker._discard(self)
+
+
+class CallTracker:
+    """
+    Учет выполняющихся вызовов синхронного клиента для stop(grace).
+
+    Считает незавершенные унарные вызовы и хранит открытые стримы.
+    После drain() новые вызовы отклоняются с ClientStoppingError.
+    """
+
+    def __init__(self) -> None:
+        self.__condition = threading.Condition()
+        self.__unary = 0
+        self.__streams: set[ClosableStream] = set()
+        self.draining = False
+
+    @property
+    def in_flight(self) -> int:
+        """Количество незавершенных унарных вызовов."""
+        return self.__unary
+
+    def open(self) -> None:
+        self.draining = False
+
+    def admit(self) -> None:
+        if self.draining:
+            raise ClientStoppingError("Client is stopping")
+
+    def begin(self) -> None:
+        """Начало унарного вызова."""
+        with self.__condition:
+            self.admit()
+            self.__unary += 1
+
+    def end(self, *_: Any) -> None:
+        """Завершение унарного вызова. Подходит как done callback."""
+        with self.__condition:
+            self.__unary -= 1
+            if not self.__unary:
+                self.__condition.notify_all()
+
+    def future(self, future: Future) -> Future:
+        """Учет вызова, начатого после begin(), до его завершения."""
+        future.add_done_callback(self.end)
+        return future
+
+    def stream(self, call: Any) -> ClosableStream:
+        stream = ClosableStream(call, self)
+        with self.__condition:
+            if not call.done():
+                self.__streams.add(stream)
+        return stream
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Прекращение приема вызовов и ожидание завершения унарных.
+
+        :param timeout: Максимальное время ожидания, сек.
+        :return: Завершились ли все унарные вызовы.
+        """
+        with self.__condition:
+            self.draining = True
+            return self.__condition.wait_for(lambda: not self.__unary, timeout)
+
+    def close_streams(self) -> None:
+        self.draining = True
+        with self.__condition:
+            streams = list(self.__streams)
+            self.__streams.clear()
+        for stream in streams:
+            stream.close()
+
+    def _discard(self, stream: ClosableStream) -> None:
+        with self.__condition:
+            self.__streams.discard(stream)
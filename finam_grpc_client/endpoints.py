@@ -0,0 +1,133 @@
+import logging
+from typing import Any, Sequence
+
+from grpc import RpcError, StatusCode
+
+logger = logging.getLogger("finam_grpc_client.endpoints")
+
+# Интервал проверки адресов, сек. При потере соединения с текущим
+# адресом проверка запускается сразу.
+DEFAULT_PROBE_INTERVAL = 30.0
+# Таймаут проверочного вызова Clock, сек.
+PROBE_TIMEOUT = 2.0
+# Количество успешных проверок, после которого адреса сравниваются
+# по задержке.
+_MIN_SAMPLES = 3
+# Коды, при которых адрес считается недоступным. Любой другой ответ,
+# в том числе ошибка авторизации, означает, что сервер отвечает.
+_FAILURE_CODES = frozenset(
+    {
+        StatusCode.UNAVAILABLE,
+        StatusCode.DEADLINE_EXCEEDED,
+        StatusCode.CANCELLED,
+    }
+)
+
+
+def probe_failed(error: RpcError) -> bool:
+    """Означает ли ошибка проверочного вызова недоступность адреса."""
+    return error.code() in _FAILURE_CODES
+
+
+class EndpointSelector:
+    """
+    Выбор адреса API по результатам проверок.
+
+    Задержка адреса - экспоненциальное скользящее среднее времени
+    вызова Clock. Адрес с неудачной последней проверкой недоступен.
+    Клиент переходит на другой адрес, если текущий недоступен или
+    задержка другого меньше задержки текущего в switch_ratio раз
+    и не меньше чем на min_gain. По задержке адреса сравниваются
+    только после нескольких проверок: первая включает подключение.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        *,
+        switch_ratio: float = 0.5,
+        min_gain: float = 0.01,
+        smoothing: float = 0.3,
+    ) -> None:
+        """
+        :param urls: Адреса в порядке предпочтения.
+        :param switch_ratio: Во сколько раз задержка другого адреса
+            должна быть меньше, чтобы на него перейти.
+        :param min_gain: На сколько секунд как минимум задержка другого
+            адреса должна быть меньше.
+        :param smoothing: Вес новой проверки в средней задержке.
+        """
+        if not urls:
+            raise ValueError("At least one url is required")
+        self.urls = tuple(urls)
+        self.switch_ratio = switch_ratio
+        self.min_gain = min_gain
+        self.smoothing = smoothing
+        self.__latency: dict[str, float | None] = dict.fromkeys(self.urls)
+        self.__available = dict.fromkeys(self.urls, True)
+        self.__failures = dict.fromkeys(self.urls, 0)
+        self.__samples = dict.fromkeys(self.urls, 0)
+
+    def record(self, url: str, latency: float | None) -> None:
+        """
+        Результат проверки.
+
+        :param url: Адрес.
+        :param latency: Время ответа, сек, или None, если адрес
+            недоступен.
+        """
+        if latency is None:
+            if self.__available[url]:
+                logger.warning("Endpoint %s is unavailable", url)
+            self.__available[url] = False
+            self.__failures[url] += 1
+            return
+        if not self.__available[url]:
+            logger.info("Endpoint %s is available again", url)
+        self.__available[url] = True
+        self.__samples[url] += 1
+        previous = self.__latency[url]
+        if previous is not None:
+            latency = previous + self.smoothing * (latency - previous)
+        self.__latency[url] = latency
+
+    def available(self, url: str) -> bool:
+        return self.__available[url]
+
+    def latency(self, url: str) -> float | None:
+        """Средняя задержка адреса, сек, или None до первой проверки."""
+        return self.__latency[url]
+
+    def select(self, current: str) -> str:
+        """Адрес для новых вызовов с учетом текущего."""
+        candidates = [
+            url
+            for url in self.urls
+            if self.__available[url] and self.__latency[url] is not None
+        ]
+        if not candidates:
+            return current
+        best = min(candidates, key=self.__latency.__getitem__)
+        if not self.__available[current]:
+            return best
+        if min(self.__samples[best], self.__samples[current]) < _MIN_SAMPLES:
+            return current
+        latency = self.__latency[current]
+        gain = latency - self.__latency[best]
+        if (
+            latency * self.switch_ratio > self.__latency[best]
+            and gain >= self.min_gain
+        ):
+            return best
+        return current
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Состояние адресов."""
+        return {
+            url: {
+                "available": self.__available[url],
+                "latency": self.__latency[url],
+                "failures": self.__failures[url],
+            }
+            for url in self.urls
+        }
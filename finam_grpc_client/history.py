@@ -0,0 +1,254 @@
+import csv
+import datetime
+import logging
+from typing import Any, Iterable, Self
+
+from google.protobuf.message import Message
+from google.protobuf.timestamp_pb2 import Timestamp
+from google.type.interval_pb2 import Interval
+
+DEFAULT_HISTORY_LIMIT = 1000
+DEFAULT_HISTORY_WINDOW = datetime.timedelta(days=1)
+MIN_HISTORY_WINDOW = datetime.timedelta(seconds=1)
+
+logger = logging.getLogger("finam_grpc_client.history")
+
+_TIMESTAMP = Timestamp.DESCRIPTOR.full_name
+_DECIMAL = "google.type.Decimal"
+_MONEY = "google.type.Money"
+
+
+def _to_ns(value: datetime.datetime) -> int:
+    timestamp = Timestamp()
+    timestamp.FromDatetime(value)
+    return timestamp.ToNanoseconds()
+
+
+def _delta_ns(value: datetime.timedelta) -> int:
+    return value // datetime.timedelta(microseconds=1) * 1000
+
+
+class AdaptiveWindow:
+    """
+    Разбиение интервала истории на окна для постраничной выгрузки.
+
+    Если ответ пришел с количеством записей, равным лимиту, он мог быть
+    обрезан: окно уменьшается вдвое и запрос повторяется. Если записей
+    мало, следующее окно увеличивается вдвое.
+    """
+
+    def __init__(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        limit: int,
+        window: datetime.timedelta = DEFAULT_HISTORY_WINDOW,
+        min_window: datetime.timedelta = MIN_HISTORY_WINDOW,
+    ) -> None:
+        """
+        :param start: Начало интервала.
+        :param end: Конец интервала.
+        :param limit: Лимит записей в запросе.
+        :param window: Начальный размер окна.
+        :param min_window: Минимальный размер окна.
+        """
+        self.__cursor = _to_ns(start)
+        self.__end = _to_ns(end)
+        self.__limit = limit
+        self.__window = self.__max_window = _delta_ns(window)
+        self.__min_window = _delta_ns(min_window)
+
+    @property
+    def done(self) -> bool:
+        """Выгружен ли весь интервал."""
+        return self.__cursor >= self.__end
+
+    @property
+    def interval(self) -> Interval:
+        """Интервал для следующего запроса."""
+        interval = Interval()
+        interval.start_time.FromNanoseconds(self.__cursor)
+        interval.end_time.FromNanoseconds(
+            min(self.__cursor + self.__window, self.__end)
+        )
+        return interval
+
+    def advance(self, count: int) -> bool:
+        """
+        Обработка ответа на запрос interval.
+
+        :param count: Количество записей в ответе.
+        :return: True, если записи ответа нужно использовать,
+            False - если запрос нужно повторить с меньшим окном.
+        """
+        if count >= self.__limit:
+            if self.__window > self.__min_window:
+                self.__window = max(self.__window // 2, self.__min_window)
+                return False
+            logger.warning(
+                "The response may be truncated: %s records in %s ns window",
+                count,
+                self.__window,
+            )
+        self.__cursor = min(self.__cursor + self.__window, self.__end)
+        if count < self.__limit // 4:
+            self.__window = min(self.__window * 2, self.__max_window)
+        return True
+
+
+def to_row(message: Message, prefix: str = "") -> dict[str, Any]:
+    """
+    Плоское представление сообщения для записи в таблицу.
+
+    Decimal и Money превращаются в строки с числом, Timestamp -
+    в строку ISO 8601, enum - в имя значения (неизвестное значение -
+    в число). Вложенные сообщения разворачиваются в поля с префиксом
+    через точку.
+    """
+    row: dict[str, Any] = {}
+    for field in message.DESCRIPTOR.fields:
+        if field.is_repeated:
+            continue
+        name = prefix + field.name
+        value = getattr(message, field.name)
+        if field.message_type is None:
+            if field.enum_type is not None:
+                # Значение, которого нет в сгенерированном enum (новое
+                # на сервере), записывается числом.
+                enum_value = field.enum_type.values_by_number.get(value)
+                if enum_value is not None:
+                    value = enum_value.name
+            row[name] = value
+            continue
+        full_name = field.message_type.full_name
+        if full_name == _TIMESTAMP:
+            row[name] = (
+                value.ToJsonString() if message.HasField(field.name) else ""
+            )
+        elif full_name == _DECIMAL:
+            row[name] = value.value
+        elif full_name == _MONEY:
+            row[name] = _money(value) if message.HasField(field.name) else ""
+            row[f"{name}.currency_code"] = value.currency_code
+        else:
+            row.update(to_row(value, f"{name}."))
+    return row
+
+
+def _money(value: Message) -> str:
+    units, nanos = value.units, value.nanos
+    sign = "-" if units < 0 or nanos < 0 else ""
+    return f"{sign}{abs(units)}.{abs(nanos):09d}".rstrip("0").rstrip(".")
+
+
+class CsvWriter:
+    """Потоковая запись сообщений в CSV."""
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: Путь к файлу.
+        """
+        self.__file = open(path, "w", newline="", encoding="utf-8")
+        self.__writer: csv.DictWriter | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def write(self, message: Message) -> None:
+        """Запись одного сообщения."""
+        row = to_row(message)
+        if self.__writer is None:
+            self.__writer = csv.DictWriter(self.__file, fieldnames=list(row))
+            self.__writer.writeheader()
+        self.__writer.writerow(row)
+
+    def close(self) -> None:
+        """Закрытие файла."""
+        self.__file.close()
+
+
+class ParquetWriter:
+    """
+    Потоковая запись сообщений в Parquet пачками по batch_size строк.
+
+    Требует установленного pyarrow.
+    """
+
+    def __init__(self, path: str, batch_size: int = 10_000) -> None:
+        """
+        :param path: Путь к файлу.
+        :param batch_size: Количество строк в одной группе строк Parquet.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "ParquetWriter requires pyarrow: pip install pyarrow"
+            ) from e
+        self.__pa = pyarrow
+        self.__pq = pyarrow.parquet
+        self.__path = path
+        self.__batch_size = batch_size
+        self.__rows: list[dict[str, Any]] = []
+        self.__writer = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def write(self, message: Message) -> None:
+        """Запись одного сообщения."""
+        self.__rows.append(to_row(message))
+        if len(self.__rows) >= self.__batch_size:
+            self.__flush()
+
+    def close(self) -> None:
+        """Запись оставшихся строк и закрытие файла."""
+        if self.__rows:
+            self.__flush()
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+    def __flush(self) -> None:
+        table = self.__pa.Table.from_pylist(self.__rows)
+        if self.__writer is None:
+            self.__writer = self.__pq.ParquetWriter(self.__path, table.schema)
+        self.__writer.write_table(table)
+        self.__rows.clear()
+
+
+def write_csv(messages: Iterable[Message], path: str) -> int:
+    """
+    Запись сообщений в CSV с постоянным расходом памяти.
+
+    :return: Количество записанных сообщений.
+    """
+    count = 0
+    with CsvWriter(path) as writer:
+        for message in messages:
+            writer.write(message)
+            count += 1
+    return count
+
+
+def write_parquet(
+    messages: Iterable[Message], path: str, batch_size: int = 10_000
+) -> int:
+    """
+    Запись сообщений в Parquet. В памяти держится не больше batch_size строк.
+
+    :return: Количество записанных сообщений.
+    """
+    count = 0
+    with ParquetWriter(path, batch_size) as writer:
+        for message in messages:
+            writer.write(message)
+            count += 1
+    return count
@@ -0,0 +1,583 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from time import perf_counter
+from typing import Any, Iterator
+
+from grpc import (
+    RpcError,
+    StatusCode,
+    UnaryStreamClientInterceptor,
+    UnaryUnaryClientInterceptor,
+)
+
+# Верхние границы интервалов гистограммы задержек, сек: от 50 мкс
+# до ~105 сек с шагом x2.
+LATENCY_BUCKETS = tuple(0.00005 * 2**i for i in range(22))
+
+_internal = ContextVar("finam_grpc_client_internal_call", default=False)
+
+
+@contextmanager
+def internal_calls() -> Iterator[None]:
+    """
+    Служебные вызовы клиента, например проверка адресов вызовом Clock.
+    Вызовы, начатые внутри блока, не передаются в Instrumentation.
+    """
+    token = _internal.set(True)
+    try:
+        yield
+    finally:
+        _internal.reset(token)
+
+
+def is_internal_call() -> bool:
+    """Начат ли вызов внутри internal_calls()."""
+    return _internal.get()
+
+
+def method_name(method: str | bytes) -> str:
+    """Полное имя метода в виде строки /package.Service/Method."""
+    return method.decode() if isinstance(method, bytes) else method
+
+
+def message_size(message: Any) -> int:
+    """Размер сериализованного сообщения в байтах."""
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return len(message)
+    return message.ByteSize()
+
+
+class Instrumentation:
+    """
+    Обработчик событий вызовов API.
+
+    Методы по умолчанию ничего не делают, наследники переопределяют
+    нужные. Вызываются из потоков grpc или из цикла событий, поэтому
+    должны быть быстрыми и потокобезопасными.
+
+    Служебные вызовы клиента (проверка резервных адресов) сюда
+    не попадают, их результаты - в client.endpoints.stats(). Вызовы,
+    получившие результат объединенного вызова, учитываются только
+    в on_coalesce.
+    """
+
+    def on_call(
+        self,
+        method: str,
+        code: StatusCode,
+        duration: float,
+        request_size: int,
+        response_size: int,
+    ) -> None:
+        """
+        Завершение унарного вызова.
+
+        :param method: Полное имя метода.
+        :param code: Код завершения.
+        :param duration: Длительность, сек.
+        :param request_size: Размер запроса, байт.
+        :param response_size: Размер ответа, байт. 0 при ошибке.
+        """
+
+    def on_stream_start(self, method: str, request_size: int) -> None:
+        """Открытие стрима запросом размером request_size байт."""
+
+    def on_stream_message(self, method: str, size: int) -> None:
+        """Получение сообщения стрима размером size байт."""
+
+    def on_stream_end(
+        self, method: str, code: StatusCode, duration: float, messages: int
+    ) -> None:
+        """
+        Завершение стрима.
+
+        :param method: Полное имя метода.
+        :param code: Код завершения.
+        :param duration: Длительность стрима, сек.
+        :param messages: Количество полученных сообщений.
+        """
+
+    def on_retry(self, method: str) -> None:
+        """Повторный вызов метода после ошибки."""
+
+    def on_coalesce(self, method: str) -> None:
+        """
+        Вызов получил результат одновременного вызова с тем же запросом
+        и не отправлялся на сервер.
+        """
+
+    def on_reconnect(self, duration: float) -> None:
+        """Канал восстановил соединение через duration сек после потери."""
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными интервалами LATENCY_BUCKETS."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Оценка квантиля линейной интерполяцией внутри интервала.
+
+        :param q: Квантиль от 0 до 1.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                low = LATENCY_BUCKETS[i - 1] if i else 0.0
+                high = LATENCY_BUCKETS[min(i, len(LATENCY_BUCKETS) - 1)]
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return LATENCY_BUCKETS[-1]
+
+
+class MethodMetrics:
+    """Накопленные метрики одного метода."""
+
+    __slots__ = (
+        "latency",
+        "codes",
+        "request_bytes",
+        "response_bytes",
+        "messages",
+        "message_bytes",
+        "first_message_at",
+        "last_message_at",
+        "retries",
+        "coalesced",
+    )
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.codes: Counter[str] = Counter()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.messages = 0
+        self.message_bytes = 0
+        self.first_message_at = 0.0
+        self.last_message_at = 0.0
+        self.retries = 0
+        self.coalesced = 0
+
+    @property
+    def calls(self) -> int:
+        """Количество завершенных вызовов."""
+        return self.latency.count
+
+    @property
+    def errors(self) -> int:
+        """Количество вызовов, завершенных с ошибкой. Отмена клиентом
+        (CANCELLED) ошибкой не считается."""
+        return self.calls - self.codes["OK"] - self.codes["CANCELLED"]
+
+    @property
+    def cancelled(self) -> int:
+        """Количество вызовов, отмененных клиентом."""
+        return self.codes["CANCELLED"]
+
+    @property
+    def messages_per_second(self) -> float:
+        """Средняя частота сообщений стрима."""
+        elapsed = self.last_message_at - self.first_message_at
+        return (self.messages - 1) / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "codes": dict(self.codes),
+            "latency_p50": self.latency.quantile(0.5),
+            "latency_p90": self.latency.quantile(0.9),
+            "latency_p99": self.latency.quantile(0.99),
+            "latency_sum": self.latency.sum,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "messages": self.messages,
+            "message_bytes": self.message_bytes,
+            "messages_per_second": self.messages_per_second,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+        }
+
+
+class MetricsRegistry(Instrumentation):
+    """
+    Метрики вызовов в памяти процесса.
+
+    Для стримов длительность и код учитываются по завершении стрима,
+    размер запроса - при открытии. Длительности восстановления
+    соединения канала - в reconnects.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__methods: dict[str, MethodMetrics] = {}
+        self.reconnects = LatencyHistogram()
+
+    def __getitem__(self, method: str) -> MethodMetrics:
+        return self.__methods[method]
+
+    def __contains__(self, method: str) -> bool:
+        return method in self.__methods
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.__methods))
+
+    def on_call(self, method, code, duration, request_size, response_size):
+        with self.__lock:
+            metrics = self.__metrics(method)
+            metrics.latency.observe(duration)
+            metrics.codes[code.name] += 1
+            metrics.request_bytes += request_size
+            metrics.response_bytes += response_size
+
+    def on_stream_start(self, method, request_size):
+        with self.__lock:
+            self.__metrics(method).request_bytes += request_size
+
+    def on_stream_message(self, method, size):
+        now = perf_counter()
+        with self.__lock:
+            metrics = self.__metrics(method)
+            if not metrics.messages:
+                metrics.first_message_at = now
+            metrics.last_message_at = now
+            metrics.messages += 1
+            metrics.message_bytes += size
+
+    def on_stream_end(self, method, code, duration, messages):
+        with self.__lock:
+            metrics = self.__metrics(method)
+            metrics.latency.observe(duration)
+            metrics.codes[code.name] += 1
+
+    def on_retry(self, method):
+        with self.__lock:
+            self.__metrics(method).retries += 1
+
+    def on_coalesce(self, method):
+        with self.__lock:
+            self.__metrics(method).coalesced += 1
+
+    def on_reconnect(self, duration):
+        with self.__lock:
+            self.reconnects.observe(duration)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Текущие значения метрик по методам."""
+        with self.__lock:
+            return {
+                method: metrics.as_dict()
+                for method, metrics in self.__methods.items()
+            }
+
+    def reset(self) -> None:
+        """Сброс всех метрик."""
+        with self.__lock:
+            self.__methods.clear()
+            self.reconnects = LatencyHistogram()
+
+    def __metrics(self, method: str) -> MethodMetrics:
+        metrics = self.__methods.get(method)
+        if metrics is None:
+            metrics = self.__methods[method] = MethodMetrics()
+        return metrics
+
+
+class CompositeInstrumentation(Instrumentation):
+    """Передача событий нескольким обработчикам."""
+
+    def __init__(self, *instrumentations: Instrumentation) -> None:
+        self.instrumentations = instrumentations
+
+    def on_call(self, method, code, duration, request_size, response_size):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_call(
+                method, code, duration, request_size, response_size
+            )
+
+    def on_stream_start(self, method, request_size):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_stream_start(method, request_size)
+
+    def on_stream_message(self, method, size):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_stream_message(method, size)
+
+    def on_stream_end(self, method, code, duration, messages):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_stream_end(method, code, duration, messages)
+
+    def on_retry(self, method):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_retry(method)
+
+    def on_coalesce(self, method):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_coalesce(method)
+
+    def on_reconnect(self, duration):
+        for instrumentation in self.instrumentations:
+            instrumentation.on_reconnect(duration)
+
+
+class PrometheusInstrumentation(Instrumentation):
+    """
+    Экспорт метрик в prometheus_client.
+
+    Требует установленного prometheus_client.
+    """
+
+    def __init__(
+        self, registry: Any = None, namespace: str = "finam_grpc_client"
+    ) -> None:
+        """
+        :param registry: CollectorRegistry. По умолчанию - глобальный.
+        :param namespace: Префикс имен метрик.
+        """
+        try:
+            import prometheus_client
+        except ImportError as e:
+            raise ImportError(
+                "PrometheusInstrumentation requires prometheus_client: "
+                "pip install prometheus-client"
+            ) from e
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        metric = partial(dict, namespace=namespace, registry=registry)
+        self.__duration = prometheus_client.Histogram(
+            "rpc_duration_seconds",
+            "RPC duration",
+            ["method", "code"],
+            buckets=LATENCY_BUCKETS,
+            **metric(),
+        )
+        self.__request_bytes = prometheus_client.Counter(
+            "rpc_request_bytes", "Request bytes", ["method"], **metric()
+        )
+        self.__response_bytes = prometheus_client.Counter(
+            "rpc_response_bytes", "Response bytes", ["method"], **metric()
+        )
+        self.__messages = prometheus_client.Counter(
+            "stream_messages", "Stream messages", ["method"], **metric()
+        )
+        self.__message_bytes = prometheus_client.Counter(
+            "stream_message_bytes", "Stream bytes", ["method"], **metric()
+        )
+        self.__retries = prometheus_client.Counter(
+            "rpc_retries", "Retries", ["method"], **metric()
+        )
+        self.__coalesced = prometheus_client.Counter(
+            "rpc_coalesced", "Coalesced calls", ["method"], **metric()
+        )
+        self.__reconnects = prometheus_client.Histogram(
+            "channel_reconnect_seconds",
+            "Channel reconnect duration",
+            buckets=LATENCY_BUCKETS,
+            **metric(),
+        )
+
+    def on_call(self, method, code, duration, request_size, response_size):
+        self.__duration.labels(method, code.name).observe(duration)
+        self.__request_bytes.labels(method).inc(request_size)
+        self.__response_bytes.labels(method).inc(response_size)
+
+    def on_stream_start(self, method, request_size):
+        self.__request_bytes.labels(method).inc(request_size)
+
+    def on_stream_message(self, method, size):
+        self.__messages.labels(method).inc()
+        self.__message_bytes.labels(method).inc(size)
+
+    def on_stream_end(self, method, code, duration, messages):
+        self.__duration.labels(method, code.name).observe(duration)
+
+    def on_retry(self, method):
+        self.__retries.labels(method).inc()
+
+    def on_coalesce(self, method):
+        self.__coalesced.labels(method).inc()
+
+    def on_reconnect(self, duration):
+        self.__reconnects.observe(duration)
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """
+    Экспорт метрик через OpenTelemetry Metrics API.
+
+    Требует установленного opentelemetry-api.
+    """
+
+    def __init__(self, meter_provider: Any = None) -> None:
+        """
+        :param meter_provider: MeterProvider. По умолчанию - глобальный.
+        """
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryInstrumentation requires opentelemetry-api: "
+                "pip install opentelemetry-api"
+            ) from e
+        meter = metrics.get_meter(
+            "finam_grpc_client", meter_provider=meter_provider
+        )
+        self.__duration = meter.create_histogram(
+            "rpc.client.duration", unit="s"
+        )
+        self.__request_size = meter.create_counter(
+            "rpc.client.request.size", unit="By"
+        )
+        self.__response_size = meter.create_counter(
+            "rpc.client.response.size", unit="By"
+        )
+        self.__messages = meter.create_counter(
+            "rpc.client.stream.messages", unit="{message}"
+        )
+        self.__message_size = meter.create_counter(
+            "rpc.client.stream.size", unit="By"
+        )
+        self.__retries = meter.create_counter(
+            "rpc.client.retries", unit="{retry}"
+        )
+        self.__coalesced = meter.create_counter(
+            "rpc.client.coalesced", unit="{call}"
+        )
+        self.__reconnects = meter.create_histogram(
+            "rpc.client.reconnect.duration", unit="s"
+        )
+
+    def on_call(self, method, code, duration, request_size, response_size):
+        attributes = {"rpc.method": method}
+        self.__duration.record(
+            duration, {**attributes, "rpc.grpc.status_code": code.value[0]}
+        )
+        self.__request_size.add(request_size, attributes)
+        self.__response_size.add(response_size, attributes)
+
+    def on_stream_start(self, method, request_size):
+        self.__request_size.add(request_size, {"rpc.method": method})
+
+    def on_stream_message(self, method, size):
+        attributes = {"rpc.method": method}
+        self.__messages.add(1, attributes)
+        self.__message_size.add(size, attributes)
+
+    def on_stream_end(self, method, code, duration, messages):
+        self.__duration.record(
+            duration,
+            {"rpc.method": method, "rpc.grpc.status_code": code.value[0]},
+        )
+
+    def on_retry(self, method):
+        self.__retries.add(1, {"rpc.method": method})
+
+    def on_coalesce(self, method):
+        self.__coalesced.add(1, {"rpc.method": method})
+
+    def on_reconnect(self, duration):
+        self.__reconnects.record(duration)
+
+
+class _InstrumentedStream:
+    def __init__(
+        self, call: Any, method: str, instrumentation: Instrumentation
+    ) -> None:
+        self.__call = call
+        self.__method = method
+        self.__instrumentation = instrumentation
+        self.messages = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__call, name)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        response = next(self.__call)
+        self.messages += 1
+        self.__instrumentation.on_stream_message(
+            self.__method, response.ByteSize()
+        )
+        return response
+
+
+class InstrumentationInterceptor(
+    UnaryUnaryClientInterceptor, UnaryStreamClientInterceptor
+):
+    """Передача событий вызовов синхронного канала в Instrumentation."""
+
+    def __init__(self, instrumentation: Instrumentation) -> None:
+        self.__instrumentation = instrumentation
+
+    def intercept_unary_unary(
+        self, continuation, client_call_details, request
+    ):
+        if _internal.get():
+            return continuation(client_call_details, request)
+        start = perf_counter()
+        call = continuation(client_call_details, request)
+        call.add_done_callback(
+            partial(
+                self.__call_done,
+                method_name(client_call_details.method),
+                start,
+                message_size(request),
+            )
+        )
+        return call
+
+    def intercept_unary_stream(
+        self, continuation, client_call_details, request
+    ):
+        if _internal.get():
+            return continuation(client_call_details, request)
+        start = perf_counter()
+        method = method_name(client_call_details.method)
+        self.__instrumentation.on_stream_start(method, message_size(request))
+        stream = _InstrumentedStream(
+            continuation(client_call_details, request),
+            method,
+            self.__instrumentation,
+        )
+        stream.add_done_callback(
+            lambda call: self.__instrumentation.on_stream_end(
+                method, call.code(), perf_counter() - start, stream.messages
+            )
+        )
+        return stream
+
+    def __call_done(
+        self, method: str, start: float, request_size: int, call: Any
+    ) -> None:
+        duration = perf_counter() - start
+        code = call.code()
+        response_size = 0
+        if code == StatusCode.OK:
+            try:
+                response_size = message_size(call.result())
+            except RpcError:
+                pass
+        self.__instrumentation.on_call(
+            method, code, duration, request_size, response_size
+        )
@@ -0,0 +1,280 @@
+import datetime
+import sqlite3
+from typing import TYPE_CHECKING, Iterable, Iterator, Self
+
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from .proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import Transaction
+from .proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+if TYPE_CHECKING:
+    from .client import FinamClient
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    account_id TEXT NOT NULL,
+    trade_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (account_id, trade_id)
+);
+CREATE INDEX IF NOT EXISTS trades_symbol
+    ON trades (account_id, symbol, ts_ns);
+CREATE INDEX IF NOT EXISTS trades_ts ON trades (account_id, ts_ns);
+CREATE TABLE IF NOT EXISTS transactions (
+    account_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    category INTEGER NOT NULL,
+    ts_ns INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (account_id, id)
+);
+CREATE INDEX IF NOT EXISTS transactions_symbol
+    ON transactions (account_id, symbol, ts_ns);
+CREATE INDEX IF NOT EXISTS transactions_category
+    ON transactions (account_id, category, ts_ns);
+CREATE INDEX IF NOT EXISTS transactions_ts
+    ON transactions (account_id, ts_ns);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    until_ns INTEGER NOT NULL,
+    PRIMARY KEY (account_id, source)
+);
+"""
+
+TRADES = "trades"
+TRANSACTIONS = "transactions"
+
+
+def _to_ns(value: datetime.datetime) -> int:
+    timestamp = Timestamp()
+    timestamp.FromDatetime(value)
+    return timestamp.ToNanoseconds()
+
+
+def _to_datetime(value: int) -> datetime.datetime:
+    timestamp = Timestamp()
+    timestamp.FromNanoseconds(value)
+    return timestamp.ToDatetime(tzinfo=datetime.timezone.utc)
+
+
+class TradeJournal:
+    """
+    Локальный журнал сделок и транзакций счета в SQLite.
+
+    Записи только добавляются, дубликаты по trade_id и id игнорируются.
+    Конец последней завершенной загрузки сохраняется для каждой таблицы
+    и счета: update() продолжает с него, в том числе если за прошлый
+    период записей не было.
+    """
+
+    def __init__(self, path: str, account_id: str) -> None:
+        """
+        :param path: Путь к файлу базы данных.
+        :param account_id: Идентификатор счета.
+        """
+        self.__account_id = account_id
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def account_id(self) -> str:
+        """Идентификатор счета."""
+        return self.__account_id
+
+    def close(self) -> None:
+        """Закрытие базы данных."""
+        self._connection.close()
+
+    def add_trades(self, trades: Iterable[AccountTrade]) -> int:
+        """
+        Добавление сделок.
+
+        :return: Количество новых сделок.
+        """
+        with self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        self.__account_id,
+                        trade.trade_id,
+                        trade.symbol,
+                        trade.timestamp.ToNanoseconds(),
+                        trade.SerializeToString(),
+                    )
+                    for trade in trades
+                ),
+            )
+        return cursor.rowcount
+
+    def add_transactions(self, transactions: Iterable[Transaction]) -> int:
+        """
+        Добавление транзакций.
+
+        :return: Количество новых транзакций.
+        """
+        with self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO transactions VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        self.__account_id,
+                        transaction.id,
+                        transaction.symbol,
+                        transaction.transaction_category,
+                        transaction.timestamp.ToNanoseconds(),
+                        transaction.SerializeToString(),
+                    )
+                    for transaction in transactions
+                ),
+            )
+        return cursor.rowcount
+
+    def trades_high_water_mark(self) -> datetime.datetime | None:
+        """Время последней сохраненной сделки."""
+        return self.__high_water_mark(TRADES)
+
+    def transactions_high_water_mark(self) -> datetime.datetime | None:
+        """Время последней сохраненной транзакции."""
+        return self.__high_water_mark(TRANSACTIONS)
+
+    def trades(
+        self,
+        symbol: str | None = None,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+    ) -> Iterator[AccountTrade]:
+        """
+        Сделки за интервал [start, end) в порядке времени.
+
+        :param symbol: Отбор по инструменту.
+        :param start: Начало интервала.
+        :param end: Конец интервала.
+        """
+        for (data,) in self.__select("trades", symbol, None, start, end):
+            yield AccountTrade.FromString(data)
+
+    def transactions(
+        self,
+        symbol: str | None = None,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        *,
+        category: int | None = None,
+    ) -> Iterator[Transaction]:
+        """
+        Транзакции за интервал [start, end) в порядке времени.
+
+        :param symbol: Отбор по инструменту.
+        :param start: Начало интервала.
+        :param end: Конец интервала.
+        :param category: Отбор по Transaction.TransactionCategory.
+        """
+        for (data,) in self.__select(
+            "transactions", symbol, category, start, end
+        ):
+            yield Transaction.FromString(data)
+
+    def update(
+        self,
+        client: "FinamClient",
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> tuple[int, int]:
+        """
+        Загрузка новых сделок и транзакций.
+
+        Запрашиваются записи с конца прошлой загрузки, повторно
+        полученные записи отбрасываются по trade_id и id.
+
+        :param client: Запущенный клиент.
+        :param since: Начало загрузки для пустого журнала.
+        :param until: Конец загрузки. По умолчанию - текущее время.
+        :return: Количество новых сделок и транзакций.
+        """
+        trades_start, transactions_start, until = self._update_bounds(
+            since, until
+        )
+        trades = self.add_trades(
+            client.iter_trades(self.__account_id, trades_start, until)
+        )
+        self._mark_synced(TRADES, until)
+        transactions = self.add_transactions(
+            client.iter_transactions(
+                self.__account_id, transactions_start, until
+            )
+        )
+        self._mark_synced(TRANSACTIONS, until)
+        return trades, transactions
+
+    def _update_bounds(
+        self, since: datetime.datetime | None, until: datetime.datetime | None
+    ) -> tuple[datetime.datetime, datetime.datetime, datetime.datetime]:
+        trades_start = self.__synced_until(TRADES) or since
+        transactions_start = self.__synced_until(TRANSACTIONS) or since
+        if trades_start is None or transactions_start is None:
+            raise ValueError("since is required for an empty journal")
+        if until is None:
+            until = datetime.datetime.now(datetime.timezone.utc)
+        return trades_start, transactions_start, until
+
+    def _mark_synced(self, table: str, until: datetime.datetime) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                (self.__account_id, table, _to_ns(until)),
+            )
+
+    def __synced_until(self, table: str) -> datetime.datetime | None:
+        row = self._connection.execute(
+            "SELECT until_ns FROM sync_state"
+            " WHERE account_id = ? AND source = ?",
+            (self.__account_id, table),
+        ).fetchone()
+        if row is not None:
+            return _to_datetime(row[0])
+        # Журналы без sync_state продолжают с последней записи.
+        return self.__high_water_mark(table)
+
+    def __high_water_mark(self, table: str) -> datetime.datetime | None:
+        (value,) = self._connection.execute(
+            f"SELECT MAX(ts_ns) FROM {table} WHERE account_id = ?",
+            (self.__account_id,),
+        ).fetchone()
+        return None if value is None else _to_datetime(value)
+
+    def __select(
+        self,
+        table: str,
+        symbol: str | None,
+        category: int | None,
+        start: datetime.datetime | None,
+        end: datetime.datetime | None,
+    ) -> sqlite3.Cursor:
+        query = [f"SELECT data FROM {table} WHERE account_id = ?"]
+        params: list = [self.__account_id]
+        if symbol is not None:
+            query.append("AND symbol = ?")
+            params.append(symbol)
+        if category is not None:
+            query.append("AND category = ?")
+            params.append(category)
+        if start is not None:
+            query.append("AND ts_ns >= ?")
+            params.append(_to_ns(start))
+        if end is not None:
+            query.append("AND ts_ns < ?")
+            params.append(_to_ns(end))
+        query.append("ORDER BY ts_ns")
+        return self._connection.execute(" ".join(query), params)
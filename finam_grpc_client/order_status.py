@@ -0,0 +1,34 @@
+from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    ORDER_STATUS_CANCELED,
+    ORDER_STATUS_DENIED_BY_BROKER,
+    ORDER_STATUS_DISABLED,
+    ORDER_STATUS_DONE_FOR_DAY,
+    ORDER_STATUS_EXECUTED,
+    ORDER_STATUS_EXPIRED,
+    ORDER_STATUS_FAILED,
+    ORDER_STATUS_FILLED,
+    ORDER_STATUS_REJECTED,
+    ORDER_STATUS_REJECTED_BY_EXCHANGE,
+    ORDER_STATUS_REPLACED,
+    ORDER_STATUS_SL_EXECUTED,
+    ORDER_STATUS_TP_EXECUTED,
+)
+
+# Статусы, после которых заявка больше не меняется.
+FINAL_STATUSES = frozenset(
+    (
+        ORDER_STATUS_FILLED,
+        ORDER_STATUS_DONE_FOR_DAY,
+        ORDER_STATUS_CANCELED,
+        ORDER_STATUS_REPLACED,
+        ORDER_STATUS_REJECTED,
+        ORDER_STATUS_EXPIRED,
+        ORDER_STATUS_FAILED,
+        ORDER_STATUS_DENIED_BY_BROKER,
+        ORDER_STATUS_REJECTED_BY_EXCHANGE,
+        ORDER_STATUS_EXECUTED,
+        ORDER_STATUS_DISABLED,
+        ORDER_STATUS_SL_EXECUTED,
+        ORDER_STATUS_TP_EXECUTED,
+    )
+)
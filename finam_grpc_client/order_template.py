@@ -0,0 +1,139 @@
+from decimal import Decimal as PyDecimal
+
+from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import Order
+
+# float не поддерживается: str(0.1 + 0.2) == "0.30000000000000004",
+# и сервер отклонит цену как некратную шагу.
+type DecimalLike = str | int | PyDecimal
+
+# Номера полей сообщения Order (orders_service.proto).
+_QUANTITY = 3
+_LIMIT_PRICE = 7
+_STOP_PRICE = 8
+_CLIENT_ORDER_ID = 11
+# Поле value сообщения google.type.Decimal.
+_DECIMAL_VALUE = 1
+_LENGTH_DELIMITED = 2
+
+
+def _varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    result = bytearray()
+    while value >= 0x80:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+
+def _tag(field_number: int) -> bytes:
+    return _varint(field_number << 3 | _LENGTH_DELIMITED)
+
+
+def _bytes_field(tag: bytes, data: bytes) -> bytes:
+    return tag + _varint(len(data)) + data
+
+
+_QUANTITY_TAG = _tag(_QUANTITY)
+_LIMIT_PRICE_TAG = _tag(_LIMIT_PRICE)
+_STOP_PRICE_TAG = _tag(_STOP_PRICE)
+_CLIENT_ORDER_ID_TAG = _tag(_CLIENT_ORDER_ID)
+_DECIMAL_VALUE_TAG = _tag(_DECIMAL_VALUE)
+
+
+def _decimal_field(tag: bytes, value: DecimalLike) -> bytes:
+    if isinstance(value, float):
+        raise TypeError(
+            f"float {value!r} is not supported, pass str or decimal.Decimal"
+        )
+    # str(Decimal("1E+1")) == "1E+1": экспоненциальную запись сервер
+    # может не принять.
+    text = format(value, "f") if isinstance(value, PyDecimal) else str(value)
+    return _bytes_field(tag, _bytes_field(_DECIMAL_VALUE_TAG, text.encode()))
+
+
+class OrderTemplate:
+    """
+    Шаблон заявки с заранее сериализованными постоянными полями.
+
+    Постоянная часть (account_id, symbol, side, type, time_in_force и т.д.)
+    сериализуется один раз при создании шаблона. При каждой отправке
+    кодируются только изменяемые поля, которые дописываются в конец
+    готового префикса. По правилам protobuf последнее значение поля
+    перекрывает предыдущее, поэтому сервер получает обычный Order.
+    """
+
+    __slots__ = ("__order", "__prefix")
+
+    def __init__(self, order: Order) -> None:
+        """
+        :param order: Заявка с постоянными полями.
+            Поля quantity, limit_price, stop_price и client_order_id
+            можно не заполнять - они передаются в build().
+        """
+        self.__order = Order()
+        self.__order.CopyFrom(order)
+        self.__prefix = order.SerializeToString()
+
+    @property
+    def order(self) -> Order:
+        """Копия заявки, из которой создан шаблон."""
+        order = Order()
+        order.CopyFrom(self.__order)
+        return order
+
+    @property
+    def prefix(self) -> bytes:
+        """Сериализованная постоянная часть заявки."""
+        return self.__prefix
+
+    def build(
+        self,
+        quantity: DecimalLike,
+        client_order_id: str | None = None,
+        *,
+        limit_price: DecimalLike | None = None,
+        stop_price: DecimalLike | None = None,
+    ) -> bytes:
+        """
+        Сериализованная заявка для place_order_bytes.
+
+        Поля не проверяются. OrderValidator проверяет заявку
+        в place_order_bytes клиента, если он задан в клиенте, или явно:
+        validator.validate(template.build_order(...)).
+
+        :param quantity: Количество в шт.
+        :param client_order_id: Уникальный идентификатор заявки.
+        :param limit_price: Цена для лимитной заявки.
+        :param stop_price: Цена для стоп заявки.
+        :raises TypeError: Количество или цена передана как float.
+        """
+        data = self.__prefix + _decimal_field(_QUANTITY_TAG, quantity)
+        if limit_price is not None:
+            data += _decimal_field(_LIMIT_PRICE_TAG, limit_price)
+        if stop_price is not None:
+            data += _decimal_field(_STOP_PRICE_TAG, stop_price)
+        if client_order_id is not None:
+            data += _bytes_field(
+                _CLIENT_ORDER_ID_TAG, client_order_id.encode()
+            )
+        return data
+
+    def build_order(
+        self,
+        quantity: DecimalLike,
+        client_order_id: str | None = None,
+        *,
+        limit_price: DecimalLike | None = None,
+        stop_price: DecimalLike | None = None,
+    ) -> Order:
+        """Заявка в виде сообщения Order. Удобно для логирования и отладки."""
+        return Order.FromString(
+            self.build(
+                quantity,
+                client_order_id,
+                limit_price=limit_price,
+                stop_price=stop_price,
+            )
+        )
@@ -0,0 +1,209 @@
+from array import array
+from dataclasses import dataclass
+from decimal import Decimal
+
+from .proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+    GetAccountResponse,
+)
+from .proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    Quote,
+    SubscribeQuoteResponse,
+)
+from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    SubscribeTradesResponse,
+)
+from .proto.grpc.tradeapi.v1.side_pb2 import SIDE_SELL
+from .proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+
+@dataclass(frozen=True, slots=True)
+class PositionSnapshot:
+    """Состояние позиции на момент запроса."""
+
+    symbol: str
+    quantity: float
+    average_price: float
+    last_price: float
+    realized_pnl: float
+    unrealized_pnl: float
+
+
+class PortfolioTracker:
+    """
+    Позиции и P&L счета, обновляемые по сделкам и котировкам.
+
+    Начальное состояние берется из get_account, далее применяются
+    сделки из subscribe_trades и котировки из subscribe_quote.
+    Данные хранятся в массивах float64, индекс инструмента
+    определяется один раз, поэтому каждое событие обрабатывается за O(1).
+
+    P&L считается как (цена - средняя цена) * количество, без учета
+    стоимости пункта и комиссий.
+    """
+
+    def __init__(self, account: GetAccountResponse) -> None:
+        """
+        :param account: Ответ get_account.
+        """
+        self.__account_id = account.account_id
+        self.__index: dict[str, int] = {}
+        self.symbols: list[str] = []
+        self.quantity = array("d")
+        self.average_price = array("d")
+        self.last_price = array("d")
+        self.realized_pnl = array("d")
+        self.__trade_ids: set[str] = set()
+        for position in account.positions:
+            i = self.__slot(position.symbol)
+            self.quantity[i] = _to_float(position.quantity.value)
+            self.average_price[i] = _to_float(position.average_price.value)
+            self.last_price[i] = _to_float(position.current_price.value)
+
+    @property
+    def account_id(self) -> str:
+        """Идентификатор счета."""
+        return self.__account_id
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.__index
+
+    def apply_trade(self, trade: AccountTrade) -> None:
+        """
+        Применение сделки по счету.
+
+        Сделки других счетов, повторно полученные сделки и сделки
+        без объема игнорируются.
+        """
+        if trade.account_id and trade.account_id != self.__account_id:
+            return
+        if trade.trade_id in self.__trade_ids:
+            return
+        size = _to_float(trade.size.value)
+        if size == 0:
+            return
+        self.__trade_ids.add(trade.trade_id)
+        i = self.__slot(trade.symbol)
+        if trade.side == SIDE_SELL:
+            size = -size
+        price = _to_float(trade.price.value)
+        position = self.quantity[i]
+        average = self.average_price[i]
+        new_position = position + size
+        if position == 0 or (position > 0) == (size > 0):
+            if new_position != 0:
+                self.average_price[i] = (
+                    average * position + price * size
+                ) / new_position
+        else:
+            closed = min(abs(size), abs(position))
+            direction = 1.0 if position > 0 else -1.0
+            self.realized_pnl[i] += closed * (price - average) * direction
+            if new_position == 0:
+                self.average_price[i] = 0.0
+            elif (new_position > 0) != (position > 0):
+                self.average_price[i] = price
+        self.quantity[i] = new_position
+        self.last_price[i] = price
+
+    def apply_trades(self, response: SubscribeTradesResponse) -> None:
+        """Применение сообщения subscribe_trades."""
+        for trade in response.trades:
+            self.apply_trade(trade)
+
+    def apply_quote(self, quote: Quote) -> None:
+        """
+        Переоценка позиции по котировке.
+
+        Используется цена последней сделки, а при ее отсутствии -
+        середина спреда. Котировки инструментов без позиции игнорируются.
+        """
+        i = self.__index.get(quote.symbol)
+        if i is None:
+            return
+        price = _to_float(quote.last.value)
+        if not price:
+            bid = _to_float(quote.bid.value)
+            ask = _to_float(quote.ask.value)
+            if not (bid and ask):
+                return
+            price = (bid + ask) / 2
+        self.last_price[i] = price
+
+    def apply_quotes(self, response: SubscribeQuoteResponse) -> None:
+        """Применение сообщения subscribe_quote."""
+        for quote in response.quote:
+            self.apply_quote(quote)
+
+    def unrealized_pnl(self, symbol: str) -> float:
+        """Нереализованный P&L по инструменту."""
+        i = self.__index.get(symbol)
+        if i is None:
+            return 0.0
+        return self.quantity[i] * (self.last_price[i] - self.average_price[i])
+
+    def total_unrealized_pnl(self) -> float:
+        """Нереализованный P&L по счету."""
+        return sum(
+            quantity * (last - average)
+            for quantity, last, average in zip(
+                self.quantity, self.last_price, self.average_price
+            )
+        )
+
+    def total_realized_pnl(self) -> float:
+        """Реализованный с момента запуска P&L по счету."""
+        return sum(self.realized_pnl)
+
+    def position(self, symbol: str) -> PositionSnapshot | None:
+        """Состояние позиции по инструменту."""
+        i = self.__index.get(symbol)
+        if i is None:
+            return None
+        return PositionSnapshot(
+            symbol=symbol,
+            quantity=self.quantity[i],
+            average_price=self.average_price[i],
+            last_price=self.last_price[i],
+            realized_pnl=self.realized_pnl[i],
+            unrealized_pnl=self.unrealized_pnl(symbol),
+        )
+
+    def positions(self) -> list[PositionSnapshot]:
+        """Состояние всех позиций."""
+        return [self.position(symbol) for symbol in self.symbols]
+
+    def position_quantity(self, account_id: str, symbol: str) -> Decimal:
+        """
+        Количество в позиции.
+
+        Подходит в качестве параметра position для OrderValidator.
+        """
+        if account_id != self.__account_id:
+            return Decimal(0)
+        i = self.__index.get(symbol)
+        if i is None:
+            return Decimal(0)
+        return Decimal(repr(self.quantity[i]))
+
+    def __slot(self, symbol: str) -> int:
+        i = self.__index.get(symbol)
+        if i is not None:
+            return i
+        i = len(self.symbols)
+        self.__index[symbol] = i
+        self.symbols.append(symbol)
+        for column in (
+            self.quantity,
+            self.average_price,
+            self.last_price,
+            self.realized_pnl,
+        ):
+            column.append(0.0)
+        return i
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
@@ -0,0 +1,44 @@
+import logging
+
+from google.protobuf.internal import api_implementation
+
+FAST_BACKENDS = frozenset({"upb", "cpp"})
+
+logger = logging.getLogger("finam_grpc_client.protobuf_backend")
+
+
+class SlowProtobufBackendError(RuntimeError):
+    """Активна чисто Python реализация protobuf."""
+
+
+def protobuf_backend() -> str:
+    """Активная реализация protobuf: upb, cpp или python."""
+    return api_implementation.Type()
+
+
+def check_protobuf_backend(require_fast: bool = False) -> str:
+    """
+    Проверка реализации protobuf.
+
+    Чисто Python реализация разбирает сообщения на порядок медленнее.
+    Обычно она включается переменной окружения
+    PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python или при установке
+    protobuf без бинарного колеса для платформы.
+
+    :param require_fast: Выбросить SlowProtobufBackendError вместо
+        предупреждения в лог.
+    :return: Активная реализация.
+    """
+    backend = protobuf_backend()
+    if backend in FAST_BACKENDS:
+        logger.info("Protobuf backend: %s", backend)
+        return backend
+    message = (
+        f"Protobuf uses the {backend!r} backend, message parsing is "
+        "an order of magnitude slower than with upb. Check "
+        "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION and the protobuf wheel"
+    )
+    if require_fast:
+        raise SlowProtobufBackendError(message)
+    logger.warning(message)
+    return backend
@@ -0,0 +1,54 @@
+import time
+from collections import deque
+from threading import Lock
+
+# Лимит API на количество запросов за RATE_LIMIT_PERIOD секунд.
+DEFAULT_RATE_LIMIT = 200
+RATE_LIMIT_PERIOD = 60.0
+
+
+class RateLimiter:
+    """
+    Ограничение количества запросов скользящим окном.
+
+    За любые period секунд отправляется не больше limit запросов:
+    время каждой отправки резервируется заранее, и запрос, для которого
+    в окне нет места, ждет, пока из окна не выйдет самый старый.
+    Потокобезопасен.
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_RATE_LIMIT,
+        period: float = RATE_LIMIT_PERIOD,
+    ) -> None:
+        """
+        :param limit: Количество запросов в окне.
+        :param period: Длина окна, сек.
+        """
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        self.limit = limit
+        self.period = period
+        self.__times: deque[float] = deque(maxlen=limit)
+        self.__lock = Lock()
+
+    def reserve(self) -> float:
+        """
+        Резервирование места в окне.
+
+        :return: Сколько секунд нужно подождать перед отправкой.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            at = now
+            if len(self.__times) == self.limit:
+                at = max(now, self.__times[0] + self.period)
+            self.__times.append(at)
+            return at - now
+
+    def acquire(self) -> None:
+        """Ожидание места в окне."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
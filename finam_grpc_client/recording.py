@@ -0,0 +1,329 @@
+import mmap
+import struct
+import time
+import zlib
+from typing import Any, AsyncIterator, Callable, Iterator, Mapping, Self
+
+from google.protobuf import descriptor_pool, message_factory
+from google.protobuf.message import Message
+
+MAGIC = b"FGRCLOG1"
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+# Заголовок блока: размер сжатых данных, размер исходных данных.
+_BLOCK = struct.Struct("<II")
+# Заголовок записи: время получения в наносекундах, размер сообщения.
+_RECORD = struct.Struct("<qI")
+_NAME = struct.Struct("<H")
+
+
+def _read_header(data: Any, offset: int, path: str) -> tuple[str, int]:
+    """Тип сообщения из заголовка по смещению offset и конец заголовка."""
+    if data[offset : offset + len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a stream record")
+    offset += len(MAGIC)
+    (size,) = _NAME.unpack_from(data, offset)
+    offset += _NAME.size
+    return bytes(data[offset : offset + size]).decode(), offset + size
+
+
+class RecordWriter:
+    """
+    Запись сообщений стрима в сжатый лог.
+
+    Формат файла: MAGIC, имя типа сообщения, затем блоки,
+    сжатые zlib. Блок содержит записи (время получения, размер,
+    сериализованное сообщение).
+
+    Существующий файл дописывается: новый сеанс начинается
+    с собственного заголовка, а RecordReader пропускает повторные
+    заголовки. Поэтому логи одного типа можно и склеивать.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        message_type: str,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        """
+        :param path: Путь к файлу.
+        :param message_type: Полное имя типа сообщения protobuf.
+        :param block_size: Размер блока до сжатия.
+        :raises ValueError: Файл существует и содержит другие записи.
+        """
+        self.__file = open(path, "ab+")
+        try:
+            if self.__file.tell():
+                self.__file.seek(0)
+                header = self.__file.read(len(MAGIC) + _NAME.size + 0xFFFF)
+                existing, _ = _read_header(header, 0, path)
+                if existing != message_type:
+                    raise ValueError(f"{path} contains {existing} records")
+        except BaseException:
+            self.__file.close()
+            raise
+        self.__block_size = block_size
+        self.__buffer = bytearray()
+        name = message_type.encode()
+        self.__file.write(MAGIC + _NAME.pack(len(name)) + name)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def write(self, data: bytes, timestamp_ns: int | None = None) -> None:
+        """
+        Запись сериализованного сообщения.
+
+        :param data: Сериализованное сообщение.
+        :param timestamp_ns: Время получения. По умолчанию - текущее.
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        self.__buffer += _RECORD.pack(timestamp_ns, len(data))
+        self.__buffer += data
+        if len(self.__buffer) >= self.__block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Сжатие и запись накопленного блока."""
+        if not self.__buffer:
+            return
+        compressed = zlib.compress(self.__buffer)
+        self.__file.write(_BLOCK.pack(len(compressed), len(self.__buffer)))
+        self.__file.write(compressed)
+        self.__file.flush()
+        self.__buffer.clear()
+
+    def close(self) -> None:
+        """Запись оставшихся данных и закрытие файла."""
+        if self.__file.closed:
+            return
+        self.flush()
+        self.__file.close()
+
+
+class RecordReader:
+    """
+    Чтение лога, записанного RecordWriter.
+
+    Файл отображается в память через mmap, блоки распаковываются
+    по одному по мере чтения.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: Путь к файлу.
+        """
+        self.__path = path
+        with open(path, "rb") as file:
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.message_type, self.__data_offset = _read_header(
+                self.__mmap, 0, path
+            )
+        except BaseException:
+            self.__mmap.close()
+            raise
+        self.message_class: type[Message] = message_factory.GetMessageClass(
+            descriptor_pool.Default().FindMessageTypeByName(self.message_type)
+        )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Закрытие файла."""
+        self.__mmap.close()
+
+    def raw(self) -> Iterator[tuple[int, bytes]]:
+        """Записи в виде (время получения, сериализованное сообщение)."""
+        data = self.__mmap
+        offset = self.__data_offset
+        while offset + _BLOCK.size <= len(data):
+            # Заголовок следующего сеанса записи. Блок так начинаться
+            # не может: размер его данных был бы больше 1 ГБ.
+            if data[offset : offset + len(MAGIC)] == MAGIC:
+                message_type, offset = _read_header(data, offset, self.__path)
+                if message_type != self.message_type:
+                    raise ValueError(
+                        f"{self.__path} mixes {self.message_type}"
+                        f" and {message_type} records"
+                    )
+                continue
+            compressed, _ = _BLOCK.unpack_from(data, offset)
+            offset += _BLOCK.size
+            block = zlib.decompress(data[offset : offset + compressed])
+            offset += compressed
+            position = 0
+            while position < len(block):
+                timestamp_ns, size = _RECORD.unpack_from(block, position)
+                position += _RECORD.size
+                yield timestamp_ns, block[position : position + size]
+                position += size
+
+    def __iter__(self) -> Iterator[tuple[int, Message]]:
+        """Записи в виде (время получения, сообщение)."""
+        from_string = self.message_class.FromString
+        for timestamp_ns, data in self.raw():
+            yield timestamp_ns, from_string(data)
+
+
+class _RecordingStream:
+    def __init__(self, call: Any, path: str) -> None:
+        self.__call = call
+        self.__path = path
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__call, name)
+
+    def __iter__(self) -> Iterator[Message]:
+        writer = None
+        try:
+            for message in self.__call:
+                if writer is None:
+                    writer = RecordWriter(
+                        self.__path, message.DESCRIPTOR.full_name
+                    )
+                writer.write(message.SerializeToString())
+                yield message
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def __aiter__(self) -> AsyncIterator[Message]:
+        writer = None
+        try:
+            async for message in self.__call:
+                if writer is None:
+                    writer = RecordWriter(
+                        self.__path, message.DESCRIPTOR.full_name
+                    )
+                writer.write(message.SerializeToString())
+                yield message
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+def recording(method: Callable[..., Any], path: str) -> Callable[..., Any]:
+    """
+    Обертка над Subscribe* методом клиента, записывающая стрим в файл.
+
+    Работает и с синхронным, и с асинхронным клиентом. Файл открывается
+    при получении первого сообщения и закрывается по окончании стрима.
+    Существующий файл дописывается, поэтому повторная подписка
+    с тем же path не затирает уже записанные сообщения.
+
+    :param method: Метод клиента, например client.subscribe_quote.
+    :param path: Путь к файлу.
+    """
+
+    def call(*args, **kwargs):
+        return _RecordingStream(method(*args, **kwargs), path)
+
+    return call
+
+
+class ReplayClient:
+    """
+    Воспроизведение записанных стримов через интерфейс FinamClient.
+
+    Subscribe* методы возвращают сообщения из файлов, записанных
+    recording(). Запрос игнорируется.
+    """
+
+    def __init__(
+        self,
+        records: Mapping[str, str],
+        *,
+        speed: float | None = 1.0,
+    ) -> None:
+        """
+        :param records: Путь к файлу для каждого метода,
+            например {"subscribe_quote": "quotes.log"}.
+        :param speed: Скорость воспроизведения: 1 - исходная,
+            10 - в 10 раз быстрее, None - без пауз.
+        """
+        self.__records = dict(records)
+        self.__speed = speed
+        self.__started = False
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def started(self) -> bool:
+        """Запущен ли клиент."""
+        return self.__started
+
+    @property
+    def stopped(self) -> bool:
+        """Остановлен ли клиент."""
+        return not self.__started
+
+    def start(self) -> None:
+        """Запуск клиента. Нужен для совместимости с FinamClient."""
+        self.__started = True
+
+    def stop(self) -> None:
+        """Остановка клиента."""
+        self.__started = False
+
+    @property
+    def speed(self) -> float | None:
+        """Скорость воспроизведения."""
+        return self.__speed
+
+    @property
+    def records(self) -> dict[str, str]:
+        """Файлы записей по методам."""
+        return self.__records
+
+    def __getattr__(self, name: str) -> Callable[..., Iterator[Message]]:
+        if name.startswith("_") or name not in self.__records:
+            raise AttributeError(name)
+        path = self.__records[name]
+
+        def call(request: Message | None = None, **kwargs):
+            return self._replay(path)
+
+        return call
+
+    def _replay(self, path: str) -> Iterator[Message]:
+        with RecordReader(path) as reader:
+            for delay, message in replay_schedule(reader, self.__speed):
+                if delay > 0:
+                    time.sleep(delay)
+                yield message
+
+
+def replay_schedule(
+    reader: RecordReader, speed: float | None
+) -> Iterator[tuple[float, Message]]:
+    """
+    Сообщения лога с паузой перед каждым из них в секундах.
+
+    Паузы отсчитываются от реального времени начала воспроизведения,
+    поэтому время обработки сообщений не накапливает отставание.
+    """
+    first_ns = None
+    started_ns = time.monotonic_ns()
+    for timestamp_ns, message in reader:
+        if not speed:
+            yield 0.0, message
+            continue
+        if first_ns is None:
+            first_ns = timestamp_ns
+        target_ns = started_ns + (timestamp_ns - first_ns) / speed
+        yield (target_ns - time.monotonic_ns()) / 1e9, message
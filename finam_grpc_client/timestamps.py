@@ -0,0 +1,157 @@
+import datetime
+from array import array
+from operator import attrgetter
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
+
+from google.protobuf.message import Message
+from google.protobuf.timestamp_pb2 import Timestamp
+
+NANOS_PER_SECOND = 1_000_000_000
+
+# Поле ответа со списком событий и поле времени события для стримов,
+# которые timestamped распознает без явных параметров.
+STREAM_TIMESTAMPS = {
+    "grpc.tradeapi.v1.marketdata.SubscribeQuoteResponse": (
+        "quote",
+        "timestamp",
+    ),
+    "grpc.tradeapi.v1.marketdata.SubscribeBarsResponse": (
+        "bars",
+        "timestamp",
+    ),
+    "grpc.tradeapi.v1.marketdata.SubscribeLatestTradesResponse": (
+        "trades",
+        "timestamp",
+    ),
+    "grpc.tradeapi.v1.orders.SubscribeTradesResponse": (
+        "trades",
+        "timestamp",
+    ),
+    "grpc.tradeapi.v1.orders.SubscribeOrdersResponse": (
+        "orders",
+        "transact_at",
+    ),
+}
+
+
+def timestamp_ns(timestamp: Timestamp) -> int:
+    """Timestamp в наносекундах с начала эпохи."""
+    return timestamp.seconds * NANOS_PER_SECOND + timestamp.nanos
+
+
+def timestamps_ns(
+    messages: Iterable[Message], field: str = "timestamp"
+) -> array:
+    """
+    Время сообщений в наносекундах одним массивом int64.
+
+    Быстрее, чем Timestamp.ToNanoseconds() или ToDatetime() для каждого
+    сообщения: объекты datetime не создаются. Массив можно передать
+    в numpy.frombuffer(..., dtype="int64") без копирования.
+
+    :param messages: Сообщения, например SubscribeQuoteResponse.quote.
+    :param field: Поле Timestamp, можно через точку: "order.timestamp".
+    """
+    get = attrgetter(field)
+    return array(
+        "q",
+        [t.seconds * NANOS_PER_SECOND + t.nanos for t in map(get, messages)],
+    )
+
+
+def to_datetime(
+    ts_ns: int, tz: datetime.tzinfo = datetime.timezone.utc
+) -> datetime.datetime:
+    """
+    datetime по времени в наносекундах. Наносекунды отбрасываются
+    до микросекунд.
+
+    :param ts_ns: Время в наносекундах с начала эпохи.
+    :param tz: Часовой пояс результата.
+    """
+    return datetime.datetime.fromtimestamp(
+        ts_ns // NANOS_PER_SECOND, tz
+    ) + datetime.timedelta(microseconds=ts_ns % NANOS_PER_SECOND // 1000)
+
+
+class TimestampedBatch:
+    """
+    Ответ стрима с временем событий в наносекундах.
+
+    Итерация возвращает пары (ts_ns, событие).
+    """
+
+    __slots__ = ("response", "items", "ts_ns")
+
+    def __init__(self, response: Message, items: str, field: str) -> None:
+        """
+        :param response: Ответ стрима.
+        :param items: Поле ответа со списком событий.
+        :param field: Поле Timestamp события.
+        """
+        self.response = response
+        self.items = getattr(response, items)
+        self.ts_ns = timestamps_ns(self.items, field)
+
+    def __len__(self) -> int:
+        return len(self.ts_ns)
+
+    def __iter__(self) -> Iterator[tuple[int, Any]]:
+        return zip(self.ts_ns, self.items)
+
+    def datetime(
+        self, index: int, tz: datetime.tzinfo = datetime.timezone.utc
+    ) -> datetime.datetime:
+        """datetime события с индексом index."""
+        return to_datetime(self.ts_ns[index], tz)
+
+
+class _TimestampedStream:
+    def __init__(self, call: Any, items: str | None, field: str) -> None:
+        self.__call = call
+        self.__items = items
+        self.__field = field
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__call, name)
+
+    def __iter__(self) -> Iterator[TimestampedBatch]:
+        for response in self.__call:
+            yield self.__batch(response)
+
+    async def __aiter__(self) -> AsyncIterator[TimestampedBatch]:
+        async for response in self.__call:
+            yield self.__batch(response)
+
+    def __batch(self, response: Message) -> TimestampedBatch:
+        if self.__items is None:
+            name = response.DESCRIPTOR.full_name
+            if name not in STREAM_TIMESTAMPS:
+                raise ValueError(
+                    f"Unknown stream response {name}, pass items and field"
+                )
+            self.__items, self.__field = STREAM_TIMESTAMPS[name]
+        return TimestampedBatch(response, self.__items, self.__field)
+
+
+def timestamped(
+    method: Callable[..., Any],
+    items: str | None = None,
+    field: str = "timestamp",
+) -> Callable[..., Any]:
+    """
+    Обертка над Subscribe* методом клиента, возвращающая ответы
+    как TimestampedBatch.
+
+    Работает и с синхронным, и с асинхронным клиентом. Для стримов
+    из STREAM_TIMESTAMPS поля определяются по первому ответу.
+
+    :param method: Метод клиента, например client.subscribe_quote.
+    :param items: Поле ответа со списком событий.
+    :param field: Поле Timestamp события.
+    """
+
+    def call(*args, **kwargs):
+        return _TimestampedStream(method(*args, **kwargs), items, field)
+
+    return call
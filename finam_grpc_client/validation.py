@@ -0,0 +1,207 @@
+import time
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Iterable
+
+from .proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+    GetAssetParamsResponse,
+    GetAssetResponse,
+    Longable,
+    ScheduleResponse,
+    Shortable,
+)
+from .proto.grpc.tradeapi.v1.orders.orders_service_pb2 import Order
+from .proto.grpc.tradeapi.v1.side_pb2 import SIDE_BUY, SIDE_SELL
+
+# Типы сессий расписания, в которые торговля не ведется.
+CLOSED_SESSION_TYPES = frozenset(("CLOSED",))
+_SHORTABLE_STATUSES = frozenset((Shortable.AVAILABLE, Shortable.HTB))
+
+
+class OrderValidationError(ValueError):
+    """Заявка не прошла локальную проверку и не была отправлена."""
+
+    def __init__(self, order: Order, reason: str) -> None:
+        super().__init__(f"{order.symbol}: {reason}")
+        self.order = order
+        self.reason = reason
+
+
+@dataclass(frozen=True, slots=True)
+class InstrumentRules:
+    """Торговые параметры инструмента для проверки заявок."""
+
+    symbol: str
+    lot_size: Decimal
+    price_step: Decimal
+    longable: bool
+    shortable: bool
+    tradable: bool
+    # Торговые сессии в виде пар (начало, конец) в наносекундах UTC.
+    sessions: tuple[tuple[int, int], ...] = ()
+    # Конец периода, на который известно расписание, в наносекундах UTC.
+    # Позже время торгов не проверяется. None - конец последней сессии.
+    schedule_end: int | None = None
+
+    @classmethod
+    def from_responses(
+        cls,
+        asset: GetAssetResponse,
+        params: GetAssetParamsResponse,
+        schedule: ScheduleResponse | None = None,
+    ) -> "InstrumentRules":
+        """
+        Сборка параметров из ответов get_asset, get_asset_params и schedule.
+
+        :param asset: Ответ get_asset.
+        :param params: Ответ get_asset_params.
+        :param schedule: Ответ schedule. Без него время торгов
+            не проверяется.
+        """
+        sessions = ()
+        schedule_end = None
+        if schedule is not None:
+            sessions = tuple(
+                (
+                    session.interval.start_time.ToNanoseconds(),
+                    session.interval.end_time.ToNanoseconds(),
+                )
+                for session in schedule.sessions
+                if session.type not in CLOSED_SESSION_TYPES
+            )
+            schedule_end = max(
+                (
+                    session.interval.end_time.ToNanoseconds()
+                    for session in schedule.sessions
+                ),
+                default=None,
+            )
+        return cls(
+            symbol=params.symbol,
+            lot_size=_to_decimal(asset.lot_size.value),
+            price_step=Decimal(asset.min_step).scaleb(-asset.decimals),
+            longable=params.longable.value == Longable.AVAILABLE,
+            shortable=params.shortable.value in _SHORTABLE_STATUSES,
+            tradable=(
+                not params.HasField("is_tradable") or params.is_tradable.value
+            ),
+            sessions=sessions,
+            schedule_end=schedule_end,
+        )
+
+    def is_trading_at(self, timestamp_ns: int) -> bool:
+        """
+        Идет ли торговая сессия в указанный момент.
+
+        За пределами расписания сессии неизвестны и момент считается
+        торговым: иначе параметры, собранные при запуске, отклоняли бы
+        все заявки на следующий день. Для точной проверки параметры
+        нужно обновлять через OrderValidator.add.
+        """
+        if not self.sessions:
+            return True
+        schedule_end = self.schedule_end
+        if schedule_end is None:
+            schedule_end = max(end for _, end in self.sessions)
+        if timestamp_ns >= schedule_end:
+            return True
+        return any(start <= timestamp_ns < end for start, end in self.sessions)
+
+
+class OrderValidator:
+    """
+    Локальная проверка заявок перед отправкой.
+
+    Проверяет кратность количества лоту, кратность цен шагу цены,
+    доступность инструмента для торгов, лонга и шорта и время торгов.
+    Проверяются только инструменты, для которых добавлены параметры.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[InstrumentRules] = (),
+        *,
+        position: Callable[[str, str], Decimal] | None = None,
+    ) -> None:
+        """
+        :param rules: Параметры инструментов.
+        :param position: Текущая позиция по счету и символу.
+            Нужна, чтобы отличить продажу из позиции от открытия шорта
+            и покупку для закрытия шорта от открытия лонга. Без нее
+            запрет шорта не проверяется, а покупка при недоступном лонге
+            отклоняется.
+        """
+        self.__rules = {rule.symbol: rule for rule in rules}
+        self.__position = position
+
+    def add(self, rules: InstrumentRules) -> None:
+        """Добавление или обновление параметров инструмента."""
+        self.__rules[rules.symbol] = rules
+
+    def get(self, symbol: str) -> InstrumentRules | None:
+        """Параметры инструмента."""
+        return self.__rules.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.__rules
+
+    def validate(self, order: Order, now_ns: int | None = None) -> None:
+        """
+        Проверка заявки.
+
+        :param order: Заявка.
+        :param now_ns: Текущее время в наносекундах UTC.
+        :raises OrderValidationError: Заявка не прошла проверку.
+        """
+        rules = self.__rules.get(order.symbol)
+        if rules is None:
+            return
+        if not rules.tradable:
+            raise OrderValidationError(order, "instrument is not tradable")
+        quantity = _to_decimal(order.quantity.value)
+        if (
+            order.side == SIDE_BUY
+            and not rules.longable
+            and not self.__covers_short(order, quantity)
+        ):
+            raise OrderValidationError(order, "long is not available")
+        if quantity <= 0:
+            raise OrderValidationError(order, "quantity must be positive")
+        if rules.lot_size and quantity % rules.lot_size:
+            raise OrderValidationError(
+                order, f"quantity is not a multiple of lot {rules.lot_size}"
+            )
+        if rules.price_step:
+            for field in ("limit_price", "stop_price"):
+                if not order.HasField(field):
+                    continue
+                price = _to_decimal(getattr(order, field).value)
+                if price % rules.price_step:
+                    raise OrderValidationError(
+                        order,
+                        f"{field} is not a multiple of step {rules.price_step}",
+                    )
+        if (
+            order.side == SIDE_SELL
+            and not rules.shortable
+            and self.__position is not None
+            and self.__position(order.account_id, order.symbol) < quantity
+        ):
+            raise OrderValidationError(order, "short is not available")
+        if not rules.is_trading_at(
+            time.time_ns() if now_ns is None else now_ns
+        ):
+            raise OrderValidationError(order, "trading session is closed")
+
+    def __covers_short(self, order: Order, quantity: Decimal) -> bool:
+        """Закрывает ли покупка шорт, не открывая лонг."""
+        if self.__position is None:
+            return False
+        return quantity <= -self.__position(order.account_id, order.symbol)
+
+
+def _to_decimal(value: str) -> Decimal:
+    try:
+        return Decimal(value or 0)
+    except InvalidOperation:
+        return Decimal(0)
@@ -0,0 +1,76 @@
+"""
+Удаление опций protoc-gen-openapiv2 из proto-файлов.
+
+Опции openapiv2 описывают только REST-шлюз и не нужны gRPC клиенту,
+но тянут за собой annotations_pb2 и openapiv2_pb2 с их дескрипторами.
+Скрипт удаляет импорт annotations.proto и все операторы
+option (grpc.gateway.protoc_gen_openapiv2.options.*) = {...};
+
+Запуск: python strip_openapiv2.py <каталог с proto-файлами>
+"""
+
+import pathlib
+import re
+import sys
+
+OPTION_PREFIX = "grpc.gateway.protoc_gen_openapiv2.options."
+_IMPORT = re.compile(
+    r'^[ \t]*import\s+"[^"]*protoc[_-]gen[_-]openapiv2/[^"]*";[ \t]*\n', re.M
+)
+_OPTION = re.compile(
+    r"\boption\s*\(\s*" + re.escape(OPTION_PREFIX) + r"\w+\s*\)\s*=\s*"
+)
+
+
+def _skip_value(text: str, position: int) -> int:
+    """Позиция после значения опции и завершающей точки с запятой."""
+    depth = 0
+    quote = None
+    while position < len(text):
+        char = text[position]
+        if quote:
+            if char == "\\":
+                position += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == ";" and depth == 0:
+            return position + 1
+        position += 1
+    raise ValueError("unterminated option")
+
+
+def strip(text: str) -> str:
+    """Текст proto-файла без опций openapiv2."""
+    text = _IMPORT.sub("", text)
+    while match := _OPTION.search(text):
+        end = _skip_value(text, match.end())
+        start = text.rfind("\n", 0, match.start()) + 1
+        if text[start : match.start()].strip():
+            start = match.start()
+        if text[end : end + 1] == "\n":
+            end += 1
+        text = text[:start] + text[end:]
+    if "protoc_gen_openapiv2" in text or "protoc-gen-openapiv2" in text:
+        raise ValueError("openapiv2 references left after stripping")
+    return text
+
+
+def main(path: str) -> None:
+    for proto_file in sorted(pathlib.Path(path).rglob("*.proto")):
+        if "protoc_gen_openapiv2" in proto_file.parts:
+            continue
+        text = proto_file.read_text(encoding="utf-8")
+        stripped = strip(text)
+        if stripped != text:
+            proto_file.write_text(stripped, encoding="utf-8")
+            print(proto_file)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
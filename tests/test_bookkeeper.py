@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from google.type.decimal_pb2 import Decimal
+from grpc import RpcError
+
+from benchmarks.fake_server import FakeFinamServer
+from finam_grpc_client.asyncio import FinamClient, OrderBookkeeper
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    ORDER_STATUS_FILLED,
+    ORDER_STATUS_NEW,
+    ORDER_TYPE_LIMIT,
+    Order,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.side_pb2 import SIDE_BUY
+
+ACCOUNT = "A"
+TIMEOUT = 10
+
+
+def _order(client_order_id: str = "") -> Order:
+    return Order(
+        account_id=ACCOUNT,
+        symbol="YDEX@MISX",
+        quantity=Decimal(value="2"),
+        side=SIDE_BUY,
+        type=ORDER_TYPE_LIMIT,
+        limit_price=Decimal(value="100"),
+        client_order_id=client_order_id,
+    )
+
+
+def _port(server: FakeFinamServer) -> int:
+    return int(server.url.rsplit(":", 1)[1])
+
+
+class OrderBookkeeperTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeFinamServer(fill_delay=None)
+        self.server.start()
+        self.client = FinamClient("secret", url=self.server.url, secure=False)
+        await self.client.start()
+
+    async def asyncTearDown(self):
+        await self.client.stop()
+        await asyncio.to_thread(self.server.stop)
+
+    async def bookkeeper(self) -> OrderBookkeeper:
+        bookkeeper = OrderBookkeeper(self.client, ACCOUNT, reconnect_delay=60)
+        await bookkeeper.start()
+        self.addAsyncCleanup(bookkeeper.stop)
+        return bookkeeper
+
+    async def test_start_reconciles_existing_orders(self):
+        state = await self.client.place_order(request=_order())
+        bookkeeper = await self.bookkeeper()
+        self.assertEqual(bookkeeper.get(state.order_id), state)
+        self.assertEqual(bookkeeper.active_orders(), [state])
+
+    async def test_wait_done_by_client_order_id(self):
+        self.server.orders.fill_delay = 0.05
+        bookkeeper = await self.bookkeeper()
+        done = bookkeeper.wait_for(client_order_id="c1")
+        state = await self.client.place_order(request=_order("c1"))
+        filled = await asyncio.wait_for(done, TIMEOUT)
+        self.assertEqual(filled.order_id, state.order_id)
+        self.assertEqual(filled.status, ORDER_STATUS_FILLED)
+        self.assertEqual(bookkeeper.active_orders(), [])
+
+    async def test_fills_are_deduplicated(self):
+        self.server.orders.fill_delay = 0
+        bookkeeper = await self.bookkeeper()
+        state = await self.client.place_order(request=_order())
+        await asyncio.wait_for(bookkeeper.wait_done(state.order_id), TIMEOUT)
+        while not bookkeeper.fills(state.order_id):
+            await asyncio.sleep(0.01)
+        bookkeeper.apply_trade(bookkeeper.fills(state.order_id)[0])
+        self.assertEqual(bookkeeper.filled_quantity(state.order_id), 2)
+
+    async def test_reconnect_reconciles_missed_updates(self):
+        bookkeeper = await self.bookkeeper()
+        state = await self.client.place_order(request=_order())
+        self.assertEqual(state.status, ORDER_STATUS_NEW)
+        done = bookkeeper.wait_done(state.order_id)
+        port = _port(self.server)
+        with self.assertLogs("finam_grpc_client", "WARNING"):
+            await asyncio.to_thread(self.server.stop)
+            # Заявка исполнилась, пока стрим был закрыт: новое состояние
+            # есть только в get_orders нового сервера, до подписки.
+            self.server = FakeFinamServer(port=port, fill_delay=0)
+            self.server.orders.PlaceOrder(_order(), None)
+            self.server.start()
+            filled = await asyncio.wait_for(done, TIMEOUT)
+        self.assertEqual(filled.order_id, state.order_id)
+        self.assertEqual(filled.status, ORDER_STATUS_FILLED)
+
+    async def test_failed_reconcile_stops_jobs(self):
+        async def get_orders(request):
+            raise RpcError()
+
+        bookkeeper = OrderBookkeeper(self.client, ACCOUNT)
+        with mock.patch.object(
+            FinamClient, "get_orders", new_callable=mock.PropertyMock
+        ) as prop:
+            prop.return_value = get_orders
+            with self.assertRaises(RpcError):
+                await bookkeeper.start()
+        self.assertFalse(bookkeeper.started)
+
+
+if __name__ == "__main__":
+    unittest.main()
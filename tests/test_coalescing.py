@@ -0,0 +1,93 @@
+import threading
+import unittest
+from types import SimpleNamespace
+
+from finam_grpc_client.coalescing import CoalescingInterceptor
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    QuoteRequest,
+)
+
+METHOD = "/grpc.tradeapi.v1.marketdata.MarketDataService/LastQuote"
+
+
+def details(token: str, timeout: float | None = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        method=METHOD,
+        timeout=timeout,
+        metadata=(("authorization", token),),
+    )
+
+
+class _Call:
+    def add_done_callback(self, callback) -> None:
+        self.callback = callback
+
+
+class CoalescingInterceptorTest(unittest.TestCase):
+    def setUp(self):
+        self.interceptor = CoalescingInterceptor([METHOD])
+        self.release = threading.Event()
+        self.sent = []
+
+    def continuation(self, client_call_details, request):
+        self.sent.append(client_call_details)
+        self.release.wait(5)
+        return _Call()
+
+    def call_in_thread(
+        self, client_call_details
+    ) -> tuple[threading.Thread, list]:
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                self.interceptor.intercept_unary_unary(
+                    self.continuation,
+                    client_call_details,
+                    QuoteRequest(symbol="SBER@MISX"),
+                )
+            )
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.release.set)
+        return thread, results
+
+    def wait_sent(self, count: int) -> None:
+        for _ in range(500):
+            if len(self.sent) >= count and self.interceptor.in_flight:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"{count} calls were not sent")
+
+    def test_same_token_is_coalesced(self):
+        leader, first = self.call_in_thread(details("a", timeout=5))
+        self.wait_sent(1)
+        follower, second = self.call_in_thread(details("a", timeout=5))
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(len(self.sent), 1)
+        self.assertIs(first[0], second[0])
+
+    def test_different_tokens_are_not_coalesced(self):
+        self.call_in_thread(details("a"))
+        self.wait_sent(1)
+        self.call_in_thread(details("b"))
+        self.wait_sent(2)
+        self.release.set()
+        self.assertEqual(
+            [d.metadata for d in self.sent],
+            [(("authorization", "a"),), (("authorization", "b"),)],
+        )
+
+    def test_shorter_timeout_is_sent_separately(self):
+        self.call_in_thread(details("a", timeout=10))
+        self.wait_sent(1)
+        self.call_in_thread(details("a", timeout=1))
+        self.wait_sent(2)
+        self.release.set()
+        self.assertEqual([d.timeout for d in self.sent], [10, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from benchmarks.fake_server import FakeFinamServer
+from finam_grpc_client import FinamClient, resubscribing
+from finam_grpc_client.asyncio import FinamClient as AsyncFinamClient
+from finam_grpc_client.asyncio import resubscribing as async_resubscribing
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    SubscribeQuoteRequest,
+)
+
+REQUEST = SubscribeQuoteRequest(symbols=["YDEX@MISX"])
+TIMEOUT = 10
+
+
+def _port(server: FakeFinamServer) -> int:
+    return int(server.url.rsplit(":", 1)[1])
+
+
+def _wait_for(condition, timeout: float = TIMEOUT) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class ResubscribingTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeFinamServer(rate=50)
+        self.server.start()
+        self.addCleanup(lambda: self.server.stop())
+        self.client = FinamClient("secret", url=self.server.url, secure=False)
+        self.client.start()
+        self.addCleanup(self.client.stop)
+        self.received = 0
+
+    def read(self, stream) -> threading.Thread:
+        def run():
+            for _ in stream:
+                self.received += 1
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            resubscribing(self.client, "last_quotes", REQUEST)
+
+    def test_cancel_ends_iteration(self):
+        stream = resubscribing(self.client, "subscribe_quote", REQUEST)
+        thread = self.read(stream)
+        self.assertTrue(_wait_for(lambda: self.received > 0))
+        stream.cancel()
+        thread.join(TIMEOUT)
+        self.assertFalse(thread.is_alive())
+
+    def test_stream_survives_server_restart(self):
+        # Пауза больше времени теста: повторная подписка происходит
+        # по восстановлению соединения.
+        stream = resubscribing(
+            self.client, "subscribe_quote", REQUEST, delay=60
+        )
+        thread = self.read(stream)
+        self.assertTrue(_wait_for(lambda: self.received > 0))
+        with self.assertLogs("finam_grpc_client", "WARNING"):
+            port = _port(self.server)
+            self.server.stop()
+            received = self.received
+            self.server = FakeFinamServer(rate=50, port=port)
+            self.server.start()
+            self.assertTrue(_wait_for(lambda: self.received > received))
+        stream.cancel()
+        thread.join(TIMEOUT)
+        self.assertFalse(thread.is_alive())
+
+    def test_client_stop_ends_iteration(self):
+        stream = resubscribing(self.client, "subscribe_quote", REQUEST)
+        thread = self.read(stream)
+        self.assertTrue(_wait_for(lambda: self.received > 0))
+        self.client.stop()
+        thread.join(TIMEOUT)
+        self.assertFalse(thread.is_alive())
+
+
+class AsyncResubscribingTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeFinamServer(rate=50)
+        self.server.start()
+        self.client = AsyncFinamClient(
+            "secret", url=self.server.url, secure=False
+        )
+        await self.client.start()
+        self.received = 0
+
+    async def asyncTearDown(self):
+        await self.client.stop()
+        await asyncio.to_thread(self.server.stop)
+
+    def read(self, stream) -> asyncio.Task:
+        async def run():
+            async for _ in stream:
+                self.received += 1
+
+        return asyncio.create_task(run())
+
+    async def wait_for(self, condition) -> None:
+        deadline = time.monotonic() + TIMEOUT
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            await asyncio.sleep(0.02)
+
+    async def test_cancel_ends_iteration(self):
+        stream = async_resubscribing(self.client, "subscribe_quote", REQUEST)
+        task = self.read(stream)
+        await self.wait_for(lambda: self.received > 0)
+        stream.cancel()
+        await asyncio.wait_for(task, TIMEOUT)
+
+    async def test_stream_survives_server_restart(self):
+        stream = async_resubscribing(
+            self.client, "subscribe_quote", REQUEST, delay=60
+        )
+        task = self.read(stream)
+        await self.wait_for(lambda: self.received > 0)
+        with self.assertLogs("finam_grpc_client", "WARNING"):
+            port = _port(self.server)
+            await asyncio.to_thread(self.server.stop)
+            received = self.received
+            self.server = FakeFinamServer(rate=50, port=port)
+            self.server.start()
+            await self.wait_for(lambda: self.received > received)
+        stream.cancel()
+        await asyncio.wait_for(task, TIMEOUT)
+
+
+if __name__ == "__main__":
+    unittest.main()
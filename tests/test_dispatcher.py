@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+
+from finam_grpc_client.asyncio import EventDispatcher, FinamClient
+from finam_grpc_client.asyncio.dispatcher import ORDER, QUOTE, TRADE
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    Quote,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    Order,
+    OrderState,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+TIMEOUT = 5
+
+
+def _quote(symbol: str, ask: str = "") -> Quote:
+    quote = Quote(symbol=symbol)
+    quote.ask.value = ask
+    return quote
+
+
+def _order(symbol: str) -> OrderState:
+    return OrderState(order_id=symbol, order=Order(symbol=symbol))
+
+
+class EventDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    """События подаются через dispatch, без стримов."""
+
+    async def asyncSetUp(self):
+        self.handled: list[tuple[str, str]] = []
+        self.gate = asyncio.Event()
+        self.gated = {"A"}
+
+    async def dispatcher(self, **kwargs) -> EventDispatcher:
+        dispatcher = EventDispatcher(FinamClient("secret"), **kwargs)
+
+        async def on_quote(quote):
+            self.handled.append((QUOTE, quote.symbol))
+            if quote.symbol in self.gated:
+                await self.gate.wait()
+
+        dispatcher.on_quote(on_quote)
+        dispatcher.on_order(
+            lambda state: self.handled.append((ORDER, state.order.symbol))
+        )
+        dispatcher.on_trade(
+            lambda trade: self.handled.append((TRADE, trade.symbol))
+        )
+        await dispatcher.start()
+        self.addAsyncCleanup(dispatcher.stop)
+        return dispatcher
+
+    async def wait_for(self, condition) -> None:
+        async with asyncio.timeout(TIMEOUT):
+            while not condition():
+                await asyncio.sleep(0.001)
+
+    async def test_execution_events_go_first(self):
+        dispatcher = await self.dispatcher(concurrency=1)
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        await self.wait_for(lambda: self.handled)
+        await dispatcher.dispatch(QUOTE, _quote("B"))
+        await dispatcher.dispatch(ORDER, _order("C"))
+        await dispatcher.dispatch(TRADE, AccountTrade(symbol="D"))
+        self.gate.set()
+        await self.wait_for(lambda: not dispatcher.pending)
+        self.assertEqual(
+            self.handled,
+            [(QUOTE, "A"), (ORDER, "C"), (TRADE, "D"), (QUOTE, "B")],
+        )
+
+    async def test_execution_overtakes_market_data_of_symbol(self):
+        dispatcher = await self.dispatcher(concurrency=2)
+        self.gated = {"A", "B"}
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        await self.wait_for(lambda: self.handled)
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        await dispatcher.dispatch(ORDER, _order("A"))
+        self.gated = set()
+        self.gate.set()
+        await self.wait_for(lambda: not dispatcher.pending)
+        self.assertEqual(
+            self.handled, [(QUOTE, "A"), (ORDER, "A"), (QUOTE, "A")]
+        )
+
+    async def test_symbol_events_are_ordered_and_serial(self):
+        dispatcher = EventDispatcher(FinamClient("secret"), concurrency=4)
+        received: dict[str, list[str]] = {"X": [], "Y": []}
+        active: set[str] = set()
+        overlaps = []
+
+        async def on_quote(quote):
+            if quote.symbol in active:
+                overlaps.append(quote.symbol)
+            active.add(quote.symbol)
+            await asyncio.sleep(0)
+            received[quote.symbol].append(quote.ask.value)
+            active.discard(quote.symbol)
+
+        dispatcher.on_quote(on_quote)
+        await dispatcher.start()
+        self.addAsyncCleanup(dispatcher.stop)
+        expected = [str(i) for i in range(50)]
+        for ask in expected:
+            await dispatcher.dispatch(QUOTE, _quote("X", ask))
+            await dispatcher.dispatch(QUOTE, _quote("Y", ask))
+        await self.wait_for(lambda: not dispatcher.pending)
+        self.assertEqual(received, {"X": expected, "Y": expected})
+        self.assertEqual(overlaps, [])
+
+    async def test_max_pending_applies_to_market_data(self):
+        dispatcher = await self.dispatcher(concurrency=1, max_pending=2)
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        blocked = asyncio.create_task(dispatcher.dispatch(QUOTE, _quote("A")))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+        # События исполнения мест не занимают.
+        await asyncio.wait_for(dispatcher.dispatch(ORDER, _order("B")), 1)
+        self.gate.set()
+        await asyncio.wait_for(blocked, TIMEOUT)
+        await self.wait_for(lambda: not dispatcher.pending)
+
+    async def test_slots_are_reset_by_restart(self):
+        dispatcher = await self.dispatcher(concurrency=1, max_pending=2)
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        await dispatcher.dispatch(QUOTE, _quote("A"))
+        await self.wait_for(lambda: self.handled)
+        with self.assertLogs("finam_grpc_client", "WARNING"):
+            await dispatcher.stop()
+        self.assertEqual(dispatcher.pending, 0)
+        await dispatcher.start()
+        # Все места снова свободны, но не больше max_pending.
+        await asyncio.wait_for(dispatcher.dispatch(QUOTE, _quote("A")), 1)
+        await asyncio.wait_for(dispatcher.dispatch(QUOTE, _quote("A")), 1)
+        blocked = asyncio.create_task(dispatcher.dispatch(QUOTE, _quote("A")))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+        self.gate.set()
+        await asyncio.wait_for(blocked, TIMEOUT)
+        await self.wait_for(lambda: not dispatcher.pending)
+        self.assertEqual(len(self.handled), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
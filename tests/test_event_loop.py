@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from finam_grpc_client.asyncio import event_loop
+from finam_grpc_client.asyncio.event_loop import (
+    UnsupportedEventLoopError,
+    UvloopRequiredError,
+    check_event_loop,
+    check_grpc_aio,
+    run,
+)
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+class _HangingChannel:
+    """Канал, вызовы которого не завершаются: grpc.aio не получает
+    результатов в цикле."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def unary_unary(self, method):
+        return lambda request, timeout: asyncio.Event().wait()
+
+
+class CheckGrpcAioTest(unittest.TestCase):
+    def test_asyncio(self):
+        self.assertEqual(run(self.main(), use_uvloop=False), "asyncio")
+
+    @unittest.skipIf(uvloop is None, "uvloop is not installed")
+    def test_uvloop(self):
+        self.assertEqual(run(self.main()), "uvloop")
+
+    async def main(self) -> str:
+        loop = asyncio.get_running_loop()
+        self.assertIn(loop, event_loop._checked_loops)
+        # Повторная проверка в том же цикле не выполняет вызов.
+        with mock.patch.object(event_loop, "insecure_channel") as channel:
+            await check_grpc_aio()
+        channel.assert_not_called()
+        return check_event_loop()
+
+    def test_hanging_loop(self):
+        async def main():
+            with mock.patch.object(
+                event_loop,
+                "insecure_channel",
+                lambda target: _HangingChannel(),
+            ):
+                with self.assertRaises(UnsupportedEventLoopError):
+                    await check_grpc_aio(timeout=0.05)
+            self.assertNotIn(
+                asyncio.get_running_loop(), event_loop._checked_loops
+            )
+
+        asyncio.run(main())
+
+    def test_run_closes_main_on_failure(self):
+        async def main():
+            pass
+
+        coroutine = main()
+        with mock.patch.object(
+            event_loop,
+            "check_grpc_aio",
+            mock.AsyncMock(side_effect=UnsupportedEventLoopError),
+        ):
+            with self.assertRaises(UnsupportedEventLoopError):
+                run(coroutine, use_uvloop=False)
+        self.assertIsNone(coroutine.cr_frame)
+
+    def test_uvloop_required(self):
+        async def main():
+            check_event_loop(require_uvloop=True)
+
+        with self.assertRaises(UvloopRequiredError):
+            asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unittest.main()
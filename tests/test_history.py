@@ -0,0 +1,187 @@
+import csv
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from finam_grpc_client import FinamClient
+from finam_grpc_client.asyncio import FinamClient as AsyncFinamClient
+from finam_grpc_client.asyncio.history import write_csv as async_write_csv
+from finam_grpc_client.history import AdaptiveWindow, to_row, write_csv
+from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+    TradesResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.side_pb2 import SIDE_BUY
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+UTC = datetime.timezone.utc
+START = datetime.datetime(2025, 1, 1, tzinfo=UTC)
+HOUR = datetime.timedelta(hours=1)
+
+
+def _bounds(window: AdaptiveWindow) -> tuple[datetime.datetime, ...]:
+    interval = window.interval
+    return (
+        interval.start_time.ToDatetime(UTC),
+        interval.end_time.ToDatetime(UTC),
+    )
+
+
+def _trade(trade_id: str, at: datetime.datetime) -> AccountTrade:
+    trade = AccountTrade(trade_id=trade_id, symbol="X@Y", side=SIDE_BUY)
+    trade.timestamp.FromDatetime(at)
+    return trade
+
+
+class AdaptiveWindowTest(unittest.TestCase):
+    def test_window_is_clipped_to_end(self):
+        window = AdaptiveWindow(START, START + 3 * HOUR, 100, 2 * HOUR)
+        self.assertEqual(_bounds(window), (START, START + 2 * HOUR))
+        self.assertTrue(window.advance(50))
+        self.assertEqual(_bounds(window), (START + 2 * HOUR, START + 3 * HOUR))
+        self.assertTrue(window.advance(50))
+        self.assertTrue(window.done)
+
+    def test_full_response_halves_window(self):
+        window = AdaptiveWindow(START, START + 4 * HOUR, 10, 4 * HOUR)
+        self.assertFalse(window.advance(10))
+        self.assertEqual(_bounds(window), (START, START + 2 * HOUR))
+        self.assertTrue(window.advance(9))
+        self.assertEqual(_bounds(window), (START + 2 * HOUR, START + 4 * HOUR))
+
+    def test_sparse_response_doubles_window_up_to_initial(self):
+        window = AdaptiveWindow(START, START + 10 * HOUR, 100, 2 * HOUR)
+        self.assertFalse(window.advance(100))
+        self.assertTrue(window.advance(1))
+        self.assertEqual(_bounds(window), (START + HOUR, START + 3 * HOUR))
+        self.assertTrue(window.advance(1))
+        self.assertEqual(_bounds(window), (START + 3 * HOUR, START + 5 * HOUR))
+
+    def test_min_window_accepts_full_response(self):
+        window = AdaptiveWindow(
+            START,
+            START + HOUR,
+            10,
+            window=datetime.timedelta(seconds=2),
+            min_window=datetime.timedelta(seconds=1),
+        )
+        self.assertFalse(window.advance(10))
+        with self.assertLogs("finam_grpc_client.history", "WARNING"):
+            self.assertTrue(window.advance(10))
+        self.assertEqual(_bounds(window)[0], START + (HOUR / 3600))
+
+    def test_empty_interval_is_done(self):
+        self.assertTrue(AdaptiveWindow(START, START, 10).done)
+
+
+# Сделки сервера: редкие и плотная группа, которая не помещается
+# в лимит одного запроса с начальным окном.
+TRADES = [_trade(str(i), START + i * 3 * HOUR) for i in range(8)] + [
+    _trade(f"burst{i}", START + 30 * HOUR + i * datetime.timedelta(minutes=5))
+    for i in range(6)
+]
+TRADES.sort(key=lambda trade: trade.timestamp.ToNanoseconds())
+LIMIT = 4
+
+
+def _trades_response(request) -> TradesResponse:
+    start = request.interval.start_time.ToNanoseconds()
+    end = request.interval.end_time.ToNanoseconds()
+    trades = [
+        trade
+        for trade in TRADES
+        if start <= trade.timestamp.ToNanoseconds() < end
+    ]
+    return TradesResponse(trades=trades[: request.limit])
+
+
+class IterTradesTest(unittest.TestCase):
+    def test_paging_returns_every_trade_once(self):
+        client = FinamClient("secret")
+        requests = []
+
+        def trades(request):
+            requests.append(request)
+            return _trades_response(request)
+
+        with mock.patch.object(
+            FinamClient, "trades", new_callable=mock.PropertyMock
+        ) as prop:
+            prop.return_value = trades
+            result = list(
+                client.iter_trades(
+                    "A",
+                    START,
+                    START + 48 * HOUR,
+                    limit=LIMIT,
+                    window=datetime.timedelta(hours=12),
+                )
+            )
+        self.assertEqual(result, TRADES)
+        self.assertTrue(all(r.limit == LIMIT for r in requests))
+        # Окно с плотной группой запрашивалось повторно.
+        self.assertGreater(len(requests), 4)
+
+
+class AsyncIterTradesTest(unittest.IsolatedAsyncioTestCase):
+    async def test_paging_returns_every_trade_once(self):
+        client = AsyncFinamClient("secret")
+
+        async def trades(request):
+            return _trades_response(request)
+
+        with mock.patch.object(
+            AsyncFinamClient, "trades", new_callable=mock.PropertyMock
+        ) as prop:
+            prop.return_value = trades
+            result = [
+                trade
+                async for trade in client.iter_trades(
+                    "A",
+                    START,
+                    START + 48 * HOUR,
+                    limit=LIMIT,
+                    window=datetime.timedelta(hours=12),
+                )
+            ]
+        self.assertEqual(result, TRADES)
+
+
+class ToRowTest(unittest.TestCase):
+    def test_known_enum_is_named(self):
+        self.assertEqual(to_row(_trade("1", START))["side"], "SIDE_BUY")
+
+    def test_unknown_enum_is_number(self):
+        trade = _trade("1", START)
+        trade.side = 42
+        self.assertEqual(to_row(trade)["side"], 42)
+
+
+class WriteCsvTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "trades.csv")
+
+    def read_ids(self) -> list[str]:
+        with open(self.path, newline="", encoding="utf-8") as file:
+            return [row["trade_id"] for row in csv.DictReader(file)]
+
+    def test_sync(self):
+        self.assertEqual(write_csv(TRADES, self.path), len(TRADES))
+        self.assertEqual(self.read_ids(), [t.trade_id for t in TRADES])
+
+    async def test_async(self):
+        async def trades():
+            for trade in TRADES:
+                yield trade
+
+        self.assertEqual(
+            await async_write_csv(trades(), self.path), len(TRADES)
+        )
+        self.assertEqual(self.read_ids(), [t.trade_id for t in TRADES])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,326 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from grpc import StatusCode
+
+from benchmarks.fake_server import FakeFinamServer
+from finam_grpc_client import FinamClient, MetricsRegistry
+from finam_grpc_client.asyncio import FinamClient as AsyncFinamClient
+from finam_grpc_client.instrumentation import (
+    LATENCY_BUCKETS,
+    CompositeInstrumentation,
+    LatencyHistogram,
+    OpenTelemetryInstrumentation,
+    PrometheusInstrumentation,
+    internal_calls,
+    is_internal_call,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.assets.assets_service_pb2 import (
+    ClockRequest,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    QuoteRequest,
+    SubscribeQuoteRequest,
+)
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+except ImportError:
+    MeterProvider = None
+
+METHOD = "/grpc.tradeapi.v1.marketdata.MarketDataService/LastQuote"
+STREAM = "/grpc.tradeapi.v1.marketdata.MarketDataService/SubscribeQuote"
+CLOCK = "/grpc.tradeapi.v1.assets.AssetsService/Clock"
+REQUEST = SubscribeQuoteRequest(symbols=["YDEX@MISX"])
+TIMEOUT = 10
+
+
+def _events(instrumentation) -> None:
+    instrumentation.on_call(METHOD, StatusCode.OK, 0.001, 10, 100)
+    instrumentation.on_call(METHOD, StatusCode.UNAVAILABLE, 0.002, 10, 0)
+    instrumentation.on_call(METHOD, StatusCode.CANCELLED, 0.003, 10, 0)
+    instrumentation.on_stream_start(STREAM, 12)
+    instrumentation.on_stream_message(STREAM, 50)
+    instrumentation.on_stream_message(STREAM, 70)
+    instrumentation.on_stream_end(STREAM, StatusCode.CANCELLED, 1.0, 2)
+    instrumentation.on_retry(METHOD)
+    instrumentation.on_coalesce(METHOD)
+    instrumentation.on_reconnect(0.5)
+
+
+def _wait_for(condition, timeout: float = TIMEOUT) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().quantile(0.5), 0.0)
+
+    def test_quantile_is_within_bucket(self):
+        histogram = LatencyHistogram()
+        for _ in range(100):
+            histogram.observe(0.001)
+        upper = LATENCY_BUCKETS[histogram.counts.index(100)]
+        self.assertLessEqual(histogram.quantile(0.5), upper)
+        self.assertGreater(histogram.quantile(0.5), upper / 2)
+        self.assertAlmostEqual(histogram.sum, 0.1)
+
+    def test_value_above_last_bucket(self):
+        histogram = LatencyHistogram()
+        histogram.observe(LATENCY_BUCKETS[-1] * 2)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.quantile(0.99), LATENCY_BUCKETS[-1])
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        _events(self.metrics)
+
+    def test_unary_calls(self):
+        metrics = self.metrics[METHOD]
+        self.assertEqual(metrics.calls, 3)
+        self.assertEqual(metrics.errors, 1)
+        self.assertEqual(metrics.cancelled, 1)
+        self.assertEqual(metrics.request_bytes, 30)
+        self.assertEqual(metrics.response_bytes, 100)
+        self.assertEqual((metrics.retries, metrics.coalesced), (1, 1))
+
+    def test_stream(self):
+        metrics = self.metrics[STREAM]
+        self.assertEqual(metrics.calls, 1)
+        self.assertEqual(metrics.errors, 0)
+        self.assertEqual(metrics.cancelled, 1)
+        self.assertEqual(metrics.request_bytes, 12)
+        self.assertEqual((metrics.messages, metrics.message_bytes), (2, 120))
+
+    def test_snapshot_and_reset(self):
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(set(snapshot), {METHOD, STREAM})
+        self.assertEqual(
+            snapshot[METHOD]["codes"],
+            {"OK": 1, "UNAVAILABLE": 1, "CANCELLED": 1},
+        )
+        self.assertEqual(snapshot[METHOD]["cancelled"], 1)
+        self.assertEqual(self.metrics.reconnects.count, 1)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+        self.assertNotIn(METHOD, self.metrics)
+        self.assertEqual(self.metrics.reconnects.count, 0)
+
+    def test_composite(self):
+        first, second = MetricsRegistry(), MetricsRegistry()
+        _events(CompositeInstrumentation(first, second))
+        for metrics in (first, second):
+            self.assertEqual(metrics[METHOD].codes, self.metrics[METHOD].codes)
+            self.assertEqual(metrics[STREAM].request_bytes, 12)
+            self.assertEqual(metrics.reconnects.count, 1)
+
+
+@unittest.skipIf(prometheus_client is None, "prometheus_client is missing")
+class PrometheusInstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = prometheus_client.CollectorRegistry()
+        _events(PrometheusInstrumentation(self.registry, namespace="test"))
+
+    def value(self, name: str, **labels: str) -> float | None:
+        return self.registry.get_sample_value(f"test_{name}", labels)
+
+    def test_samples(self):
+        self.assertEqual(
+            self.value("rpc_duration_seconds_count", method=METHOD, code="OK"),
+            1,
+        )
+        self.assertEqual(
+            self.value(
+                "rpc_duration_seconds_count", method=STREAM, code="CANCELLED"
+            ),
+            1,
+        )
+        self.assertEqual(
+            self.value("rpc_request_bytes_total", method=METHOD), 30
+        )
+        self.assertEqual(
+            self.value("rpc_request_bytes_total", method=STREAM), 12
+        )
+        self.assertEqual(
+            self.value("stream_message_bytes_total", method=STREAM), 120
+        )
+        self.assertEqual(self.value("rpc_retries_total", method=METHOD), 1)
+        self.assertEqual(self.value("rpc_coalesced_total", method=METHOD), 1)
+        self.assertEqual(self.value("channel_reconnect_seconds_count"), 1)
+
+
+@unittest.skipIf(MeterProvider is None, "opentelemetry-sdk is missing")
+class OpenTelemetryInstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.reader = InMemoryMetricReader()
+        provider = MeterProvider(metric_readers=[self.reader])
+        self.addCleanup(provider.shutdown)
+        _events(OpenTelemetryInstrumentation(provider))
+
+    def points(self) -> dict[str, list]:
+        data = self.reader.get_metrics_data()
+        return {
+            metric.name: list(metric.data.data_points)
+            for resource in data.resource_metrics
+            for scope in resource.scope_metrics
+            for metric in scope.metrics
+        }
+
+    def test_points(self):
+        points = self.points()
+        request_size = {
+            point.attributes["rpc.method"]: point.value
+            for point in points["rpc.client.request.size"]
+        }
+        self.assertEqual(request_size, {METHOD: 30, STREAM: 12})
+        durations = {
+            (
+                point.attributes["rpc.method"],
+                point.attributes["rpc.grpc.status_code"],
+            ): point.count
+            for point in points["rpc.client.duration"]
+        }
+        self.assertEqual(
+            durations,
+            {
+                (METHOD, StatusCode.OK.value[0]): 1,
+                (METHOD, StatusCode.UNAVAILABLE.value[0]): 1,
+                (METHOD, StatusCode.CANCELLED.value[0]): 1,
+                (STREAM, StatusCode.CANCELLED.value[0]): 1,
+            },
+        )
+        self.assertEqual(points["rpc.client.stream.size"][0].value, 120)
+        self.assertEqual(points["rpc.client.reconnect.duration"][0].count, 1)
+
+
+class InternalCallsTest(unittest.TestCase):
+    def test_context(self):
+        self.assertFalse(is_internal_call())
+        with internal_calls():
+            self.assertTrue(is_internal_call())
+        self.assertFalse(is_internal_call())
+
+
+class ClientInstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeFinamServer(rate=100)
+        self.server.start()
+        self.addCleanup(lambda: self.server.stop())
+        self.metrics = MetricsRegistry()
+
+    def client(self, url, **kwargs) -> FinamClient:
+        client = FinamClient(
+            "secret",
+            url=url,
+            secure=False,
+            instrumentation=self.metrics,
+            **kwargs,
+        )
+        client.start()
+        self.addCleanup(client.stop)
+        return client
+
+    def test_cancelled_stream(self):
+        client = self.client(self.server.url)
+        stream = client.subscribe_quote(REQUEST)
+        next(stream)
+        stream.cancel()
+        self.assertTrue(_wait_for(lambda: self.metrics[STREAM].calls))
+        metrics = self.metrics[STREAM]
+        self.assertEqual(metrics.request_bytes, REQUEST.ByteSize())
+        self.assertEqual((metrics.errors, metrics.cancelled), (0, 1))
+
+    def test_probes_are_not_recorded(self):
+        backup = FakeFinamServer()
+        backup.start()
+        self.addCleanup(lambda: backup.stop())
+        client = self.client([self.server.url, backup.url])
+        self.assertTrue(
+            _wait_for(
+                lambda: all(
+                    stats["latency"] is not None
+                    for stats in client.endpoints.stats().values()
+                )
+            )
+        )
+        client.clock(ClockRequest())
+        self.assertTrue(_wait_for(lambda: self.metrics[CLOCK].calls))
+        self.assertEqual(self.metrics[CLOCK].calls, 1)
+
+    def test_coalesced_calls_are_not_recorded(self):
+        client = self.client(self.server.url, coalesce=True)
+        request = QuoteRequest(symbol="YDEX@MISX")
+        barrier = threading.Barrier(8)
+
+        def call():
+            barrier.wait()
+            client.last_quote(request)
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(TIMEOUT)
+        self.assertTrue(
+            _wait_for(
+                lambda: self.metrics[METHOD].calls
+                + self.metrics[METHOD].coalesced
+                == 8
+            )
+        )
+
+
+class AsyncClientInstrumentationTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeFinamServer(rate=100)
+        self.server.start()
+        self.metrics = MetricsRegistry()
+        self.client = AsyncFinamClient(
+            "secret",
+            url=self.server.url,
+            secure=False,
+            instrumentation=self.metrics,
+        )
+        await self.client.start()
+
+    async def asyncTearDown(self):
+        await self.client.stop()
+        self.server.stop()
+
+    async def wait_for(self, condition) -> None:
+        deadline = time.monotonic() + TIMEOUT
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            await asyncio.sleep(0.02)
+
+    async def test_cancelled_stream(self):
+        stream = self.client.subscribe_quote(REQUEST)
+        async for _ in stream:
+            break
+        stream.cancel()
+        await self.wait_for(
+            lambda: STREAM in self.metrics and self.metrics[STREAM].calls
+        )
+        metrics = self.metrics[STREAM]
+        self.assertEqual(metrics.request_bytes, REQUEST.ByteSize())
+        self.assertEqual((metrics.calls, metrics.messages), (1, 1))
+        self.assertEqual((metrics.errors, metrics.cancelled), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
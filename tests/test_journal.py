@@ -0,0 +1,165 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from finam_grpc_client.asyncio.journal import AsyncTradeJournal
+from finam_grpc_client.journal import TradeJournal
+from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+    Transaction,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+UTC = datetime.timezone.utc
+START = datetime.datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def _at(day: int) -> datetime.datetime:
+    return START + datetime.timedelta(days=day)
+
+
+def _trade(trade_id: str, day: int) -> AccountTrade:
+    trade = AccountTrade(trade_id=trade_id, account_id="A", symbol="X@Y")
+    trade.timestamp.FromDatetime(_at(day))
+    return trade
+
+
+def _transaction(transaction_id: str, day: int) -> Transaction:
+    transaction = Transaction(id=transaction_id, symbol="X@Y")
+    transaction.timestamp.FromDatetime(_at(day))
+    return transaction
+
+
+def _between(records, start, end) -> list:
+    return [r for r in records if start <= r.timestamp.ToDatetime(UTC) < end]
+
+
+class _Client:
+    """Сделки и транзакции из списков, с записью запрошенных интервалов."""
+
+    def __init__(self, trades=(), transactions=()) -> None:
+        self.trades = list(trades)
+        self.transactions = list(transactions)
+        self.requests: list[tuple[str, datetime.datetime]] = []
+
+    def iter_trades(self, account_id, start, end):
+        self.requests.append(("trades", start))
+        return iter(_between(self.trades, start, end))
+
+    def iter_transactions(self, account_id, start, end):
+        self.requests.append(("transactions", start))
+        return iter(_between(self.transactions, start, end))
+
+
+class _AsyncClient(_Client):
+    async def iter_trades(self, account_id, start, end):
+        for trade in super().iter_trades(account_id, start, end):
+            yield trade
+
+    async def iter_transactions(self, account_id, start, end):
+        for transaction in super().iter_transactions(account_id, start, end):
+            yield transaction
+
+
+class TradeJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.journal = TradeJournal(":memory:", "A")
+        self.addCleanup(self.journal.close)
+
+    def test_empty_journal_requires_since(self):
+        with self.assertRaises(ValueError):
+            self.journal.update(_Client())
+
+    def test_resumes_from_previous_until(self):
+        client = _Client([_trade("1", 1)], [_transaction("t1", 2)])
+        self.assertEqual(
+            self.journal.update(client, since=START, until=_at(5)), (1, 1)
+        )
+        client.trades.append(_trade("2", 6))
+        client.requests.clear()
+        self.assertEqual(self.journal.update(client, until=_at(10)), (1, 0))
+        self.assertEqual(
+            client.requests, [("trades", _at(5)), ("transactions", _at(5))]
+        )
+
+    def test_empty_account_after_sync(self):
+        client = _Client()
+        self.assertEqual(
+            self.journal.update(client, since=START, until=_at(5)), (0, 0)
+        )
+        client.requests.clear()
+        self.assertEqual(self.journal.update(client, until=_at(10)), (0, 0))
+        self.assertEqual(
+            client.requests, [("trades", _at(5)), ("transactions", _at(5))]
+        )
+
+    def test_reinserts_are_ignored(self):
+        client = _Client([_trade("1", 1), _trade("2", 2)])
+        self.journal.update(client, since=START, until=_at(5))
+        # Без sync_state загрузка продолжается с последней записи,
+        # и она приходит повторно.
+        self.journal._connection.execute("DELETE FROM sync_state")
+        client.requests.clear()
+        self.assertEqual(
+            self.journal.update(client, since=START, until=_at(5)), (0, 0)
+        )
+        self.assertEqual(
+            client.requests, [("trades", _at(2)), ("transactions", START)]
+        )
+        self.assertEqual(self.journal.add_trades([_trade("1", 1)]), 0)
+        self.assertEqual(
+            [trade.trade_id for trade in self.journal.trades()], ["1", "2"]
+        )
+
+    def test_cursor_is_per_account(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "journal.db")
+        with TradeJournal(path, "A") as journal:
+            journal.update(_Client(), since=START, until=_at(5))
+        with TradeJournal(path, "A") as journal:
+            self.assertEqual(journal.update(_Client(), until=_at(6)), (0, 0))
+        with TradeJournal(path, "B") as journal:
+            with self.assertRaises(ValueError):
+                journal.update(_Client())
+
+
+class AsyncTradeJournalTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.journal = AsyncTradeJournal(":memory:", "A")
+        self.addCleanup(self.journal.close)
+
+    async def test_resumes_from_previous_until(self):
+        client = _AsyncClient([_trade("1", 1)], [_transaction("t1", 2)])
+        self.assertEqual(
+            await self.journal.update(client, since=START, until=_at(5)),
+            (1, 1),
+        )
+        client.transactions.append(_transaction("t2", 7))
+        client.requests.clear()
+        self.assertEqual(
+            await self.journal.update(client, until=_at(10)), (0, 1)
+        )
+        self.assertEqual(
+            client.requests, [("trades", _at(5)), ("transactions", _at(5))]
+        )
+
+    async def test_empty_account_after_sync(self):
+        client = _AsyncClient()
+        await self.journal.update(client, since=START, until=_at(5))
+        self.assertEqual(
+            await self.journal.update(client, until=_at(10)), (0, 0)
+        )
+
+    async def test_reinserts_are_ignored(self):
+        client = _AsyncClient([_trade("1", 1)], [_transaction("t1", 2)])
+        await self.journal.update(client, since=START, until=_at(5))
+        self.journal._connection.execute("DELETE FROM sync_state")
+        self.assertEqual(
+            await self.journal.update(client, until=_at(5)), (0, 0)
+        )
+        self.assertEqual(len(list(self.journal.transactions())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
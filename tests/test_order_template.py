@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from decimal import Decimal
+
+from benchmarks.fake_server import FakeFinamServer
+from finam_grpc_client.asyncio import FinamClient
+from finam_grpc_client.order_template import OrderTemplate
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    Order,
+    OrdersRequest,
+)
+from finam_grpc_client.validation import (
+    InstrumentRules,
+    OrderValidationError,
+    OrderValidator,
+)
+
+
+class OrderTemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.template = OrderTemplate(Order(account_id="A", symbol="X@Y"))
+
+    def test_build_matches_order(self):
+        order = self.template.build_order(
+            "10", "id-1", limit_price=Decimal("0.3")
+        )
+        self.assertEqual(order.quantity.value, "10")
+        self.assertEqual(order.limit_price.value, "0.3")
+        self.assertEqual(order.client_order_id, "id-1")
+        self.assertEqual(order.symbol, "X@Y")
+
+    def test_float_is_rejected(self):
+        with self.assertRaises(TypeError):
+            self.template.build(1, limit_price=0.1 + 0.2)
+
+    def test_decimal_without_exponent(self):
+        order = self.template.build_order(
+            Decimal("1E+1"),
+            limit_price=Decimal("1.50"),
+            stop_price=Decimal("1E-7"),
+        )
+        self.assertEqual(order.quantity.value, "10")
+        self.assertEqual(order.limit_price.value, "1.50")
+        self.assertEqual(order.stop_price.value, "0.0000001")
+
+
+class PlaceOrderBytesTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeFinamServer()
+        self.server.start()
+        validator = OrderValidator(
+            [
+                InstrumentRules(
+                    symbol="X@Y",
+                    lot_size=Decimal(10),
+                    price_step=Decimal("0.5"),
+                    longable=True,
+                    shortable=True,
+                    tradable=True,
+                )
+            ]
+        )
+        self.client = FinamClient(
+            "secret", url=self.server.url, secure=False, validator=validator
+        )
+        await self.client.start()
+        self.template = OrderTemplate(Order(account_id="A", symbol="X@Y"))
+
+    async def asyncTearDown(self):
+        await self.client.stop()
+        await asyncio.to_thread(self.server.stop)
+
+    async def test_valid_order_is_sent(self):
+        state = await self.client.place_order_bytes(
+            request=self.template.build(Decimal("2E+1"), limit_price="1.5")
+        )
+        self.assertEqual(state.order.quantity.value, "20")
+
+    async def test_invalid_order_is_not_sent(self):
+        with self.assertRaises(OrderValidationError) as e:
+            await self.client.place_order_bytes(
+                request=self.template.build("10", limit_price="1.3")
+            )
+        self.assertIn("limit_price", e.exception.reason)
+        response = await self.client.get_orders(
+            request=OrdersRequest(account_id="A")
+        )
+        self.assertEqual(len(response.orders), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from google.type.decimal_pb2 import Decimal
+
+from finam_grpc_client.portfolio import PortfolioTracker
+from finam_grpc_client.proto.grpc.tradeapi.v1.accounts.accounts_service_pb2 import (
+    GetAccountResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.side_pb2 import (
+    SIDE_BUY,
+    SIDE_SELL,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.trade_pb2 import AccountTrade
+
+
+def _trade(trade_id: str, side: int, size: str, price: str) -> AccountTrade:
+    return AccountTrade(
+        trade_id=trade_id,
+        account_id="A",
+        symbol="X@Y",
+        side=side,
+        size=Decimal(value=size),
+        price=Decimal(value=price),
+    )
+
+
+class ApplyTradeTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = PortfolioTracker(GetAccountResponse(account_id="A"))
+
+    def test_empty_trade_is_ignored(self):
+        self.tracker.apply_trade(
+            AccountTrade(trade_id="1", account_id="A", symbol="X@Y")
+        )
+        self.assertNotIn("X@Y", self.tracker)
+
+    def test_zero_size_trade_keeps_position(self):
+        self.tracker.apply_trade(_trade("1", SIDE_BUY, "10", "100"))
+        self.tracker.apply_trade(_trade("2", SIDE_BUY, "0", "90"))
+        position = self.tracker.position("X@Y")
+        self.assertEqual(position.quantity, 10)
+        self.assertEqual(position.average_price, 100)
+
+    def test_average_and_realized_pnl(self):
+        self.tracker.apply_trade(_trade("1", SIDE_BUY, "10", "100"))
+        self.tracker.apply_trade(_trade("2", SIDE_BUY, "10", "110"))
+        self.tracker.apply_trade(_trade("2", SIDE_BUY, "10", "110"))
+        self.tracker.apply_trade(_trade("3", SIDE_SELL, "20", "120"))
+        position = self.tracker.position("X@Y")
+        self.assertEqual(position.quantity, 0)
+        self.assertEqual(position.realized_pnl, 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+
+from finam_grpc_client.rate_limit import RateLimiter
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_window_is_not_exceeded(self):
+        limiter = RateLimiter(3, period=60.0)
+        with mock.patch("time.monotonic", return_value=100.0):
+            delays = [limiter.reserve() for _ in range(7)]
+        self.assertEqual(delays, [0, 0, 0, 60.0, 60.0, 60.0, 120.0])
+
+    def test_slots_free_up_after_period(self):
+        limiter = RateLimiter(2, period=10.0)
+        with mock.patch("time.monotonic", return_value=0.0):
+            limiter.reserve()
+            limiter.reserve()
+        with mock.patch("time.monotonic", return_value=4.0):
+            self.assertEqual(limiter.reserve(), 6.0)
+        with mock.patch("time.monotonic", return_value=25.0):
+            self.assertEqual(limiter.reserve(), 0)
+
+    def test_limit_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
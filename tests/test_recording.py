@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    Quote,
+    SubscribeQuoteResponse,
+)
+from finam_grpc_client.recording import (
+    RecordReader,
+    RecordWriter,
+    ReplayClient,
+    recording,
+)
+
+QUOTES = SubscribeQuoteResponse.DESCRIPTOR.full_name
+
+
+def _response(symbol: str) -> SubscribeQuoteResponse:
+    return SubscribeQuoteResponse(quote=[Quote(symbol=symbol)])
+
+
+def _symbols(messages) -> list[str]:
+    return [message.quote[0].symbol for message in messages]
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "quotes.log")
+
+    def write(self, path: str, symbols, start_ns: int = 0, **kwargs) -> None:
+        with RecordWriter(path, QUOTES, **kwargs) as writer:
+            for i, symbol in enumerate(symbols):
+                writer.write(
+                    _response(symbol).SerializeToString(), start_ns + i
+                )
+
+    def read(self, path: str) -> list[tuple[int, str]]:
+        with RecordReader(path) as reader:
+            return [
+                (timestamp_ns, message.quote[0].symbol)
+                for timestamp_ns, message in reader
+            ]
+
+    def test_round_trip(self):
+        # Маленький блок: записи распределяются по нескольким блокам.
+        self.write(self.path, ["A", "B", "C"], block_size=16)
+        self.assertEqual(self.read(self.path), [(0, "A"), (1, "B"), (2, "C")])
+
+    def test_reopened_writer_appends(self):
+        self.write(self.path, ["A", "B"])
+        self.write(self.path, ["C"], start_ns=10)
+        self.assertEqual(self.read(self.path), [(0, "A"), (1, "B"), (10, "C")])
+
+    def test_concatenated_logs(self):
+        first, second = self.path + ".1", self.path + ".2"
+        self.write(first, ["A"])
+        self.write(second, ["B"], start_ns=5)
+        with open(self.path, "wb") as out:
+            for part in (first, second):
+                with open(part, "rb") as file:
+                    out.write(file.read())
+        self.assertEqual(self.read(self.path), [(0, "A"), (5, "B")])
+
+    def test_other_message_type_is_rejected(self):
+        self.write(self.path, ["A"])
+        with self.assertRaises(ValueError):
+            RecordWriter(self.path, Quote.DESCRIPTOR.full_name)
+        self.assertEqual(self.read(self.path), [(0, "A")])
+
+    def test_not_a_record(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a record")
+        with self.assertRaises(ValueError):
+            RecordReader(self.path)
+        with self.assertRaises(ValueError):
+            RecordWriter(self.path, QUOTES)
+
+    def test_resubscribe_keeps_previous_capture(self):
+        def subscribe_quote(symbols):
+            return iter([_response(symbol) for symbol in symbols])
+
+        subscribe = recording(subscribe_quote, self.path)
+        self.assertEqual(_symbols(subscribe(["A", "B"])), ["A", "B"])
+        self.assertEqual(_symbols(subscribe(["C"])), ["C"])
+        replay = ReplayClient({"subscribe_quote": self.path}, speed=None)
+        with replay:
+            self.assertEqual(
+                _symbols(replay.subscribe_quote()), ["A", "B", "C"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import glob
+import os
+import tempfile
+import unittest
+
+from google.type import decimal_pb2
+
+from strip_openapiv2 import strip
+
+try:
+    from grpc_tools import protoc
+except ImportError:  # grpcio-tools - dev-зависимость
+    protoc = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Каталог с google/type/*.proto из googleapis-common-protos.
+GOOGLE_PROTOS = os.path.dirname(
+    os.path.dirname(os.path.dirname(decimal_pb2.__file__))
+)
+
+IMPORT = (
+    'import "finam_grpc_client/proto/protoc_gen_openapiv2/options/'
+    'annotations.proto";\n'
+)
+SWAGGER = """\
+option(grpc.gateway.protoc_gen_openapiv2.options.openapiv2_swagger) = {
+  info: {
+    title: "Example; with \\"quotes\\" and {braces}";
+  };
+  responses: {
+    key: "default";
+    value: {description: "};"};
+  };
+};
+"""
+OPERATION = """\
+    option (grpc.gateway.protoc_gen_openapiv2.options.openapiv2_operation) = {
+      summary: "Get";
+      tags: "Example";
+    };
+"""
+SCHEMA = """\
+  option (grpc.gateway.protoc_gen_openapiv2.options.openapiv2_schema) = {
+    json_schema: {required: ["id"]}
+  };
+"""
+PROTO = """\
+syntax = "proto3";
+
+package example.v1;
+
+import "google/protobuf/timestamp.proto";
+{import}
+option java_multiple_files = true;
+{swagger}
+// Сервис примера
+service ExampleService {{
+  rpc Get(GetRequest) returns (GetResponse) {{
+{operation}  }};
+}}
+
+message GetRequest {{
+{schema}  string id = 1;
+}}
+
+message GetResponse {{
+  google.protobuf.Timestamp timestamp = 1;
+}}
+"""
+
+
+def _proto(**parts: str) -> str:
+    return PROTO.format(
+        **{"import": "", "swagger": "", "operation": "", "schema": ""} | parts
+    )
+
+
+class StripTest(unittest.TestCase):
+    def test_options_and_import_are_removed(self):
+        text = _proto(
+            **{"import": IMPORT},
+            swagger=SWAGGER,
+            operation=OPERATION,
+            schema=SCHEMA,
+        )
+        self.assertEqual(strip(text), _proto())
+
+    def test_text_without_options_is_unchanged(self):
+        self.assertEqual(strip(_proto()), _proto())
+
+    def test_unterminated_option(self):
+        with self.assertRaises(ValueError):
+            strip(_proto(swagger=SWAGGER[:-3]))
+
+    def test_unknown_reference_is_reported(self):
+        text = _proto(
+            schema="  // grpc.gateway.protoc_gen_openapiv2.options\n"
+        )
+        with self.assertRaises(ValueError):
+            strip(text)
+
+
+@unittest.skipIf(protoc is None, "grpcio-tools is not installed")
+class CompileTest(unittest.TestCase):
+    def compile(self, name: str, text: str, *include: str) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            with open(
+                os.path.join(directory, name), "w", encoding="utf-8"
+            ) as file:
+                file.write(text)
+            result = protoc.main(
+                [
+                    "protoc",
+                    f"--proto_path={directory}",
+                    *(f"--proto_path={path}" for path in include),
+                    f"--proto_path={os.path.dirname(protoc.__file__)}/_proto",
+                    f"--python_out={directory}",
+                    name,
+                ]
+            )
+        self.assertEqual(result, 0, name)
+
+    def test_stripped_example_compiles(self):
+        text = _proto(
+            **{"import": IMPORT},
+            swagger=SWAGGER,
+            operation=OPERATION,
+            schema=SCHEMA,
+        )
+        # Без каталога проекта: annotations.proto недоступен.
+        self.compile("example.proto", strip(text))
+
+    def test_stripped_api_protos_compile(self):
+        paths = glob.glob(
+            os.path.join(ROOT, "finam_grpc_client/proto/grpc/**/*.proto"),
+            recursive=True,
+        )
+        self.assertTrue(paths)
+        for path in paths:
+            with open(path, encoding="utf-8") as file:
+                stripped = strip(file.read())
+            self.assertNotIn("openapiv2", stripped)
+            self.compile(os.path.basename(path), stripped, ROOT, GOOGLE_PROTOS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import datetime
+import unittest
+
+from google.protobuf import symbol_database
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from finam_grpc_client.proto.grpc.tradeapi.v1.marketdata.marketdata_service_pb2 import (
+    Quote,
+    QuoteResponse,
+    SubscribeOrderBookResponse,
+    SubscribeQuoteResponse,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    OrderState,
+    SubscribeOrdersResponse,
+)
+from finam_grpc_client.timestamps import (
+    STREAM_TIMESTAMPS,
+    TimestampedBatch,
+    timestamp_ns,
+    timestamped,
+    timestamps_ns,
+    to_datetime,
+)
+
+UTC = datetime.timezone.utc
+MSK = datetime.timezone(datetime.timedelta(hours=3))
+
+# (seconds, nanos): до и после эпохи, с долями микросекунды.
+TIMESTAMPS = [
+    (0, 0),
+    (0, 1),
+    (0, 999),
+    (1_735_689_600, 123_456_789),
+    (1_735_689_600, 999_999_999),
+    (-1, 0),
+    (-1, 1),
+    (-1, 999_999_999),
+    (-86_400, 500_000_000),
+    (-2_208_988_800, 1_000),
+]
+
+
+def _timestamp(seconds: int, nanos: int) -> Timestamp:
+    return Timestamp(seconds=seconds, nanos=nanos)
+
+
+def _quote(seconds: int, nanos: int) -> Quote:
+    return Quote(symbol="X@Y", timestamp=_timestamp(seconds, nanos))
+
+
+class ConversionTest(unittest.TestCase):
+    def test_timestamp_ns(self):
+        for seconds, nanos in TIMESTAMPS:
+            timestamp = _timestamp(seconds, nanos)
+            self.assertEqual(
+                timestamp_ns(timestamp), timestamp.ToNanoseconds()
+            )
+
+    def test_timestamps_ns(self):
+        quotes = [_quote(*value) for value in TIMESTAMPS]
+        result = timestamps_ns(quotes)
+        self.assertEqual(result.typecode, "q")
+        self.assertEqual(
+            list(result), [q.timestamp.ToNanoseconds() for q in quotes]
+        )
+        self.assertEqual(len(timestamps_ns([])), 0)
+
+    def test_nested_field(self):
+        responses = [
+            QuoteResponse(quote=_quote(*value)) for value in TIMESTAMPS
+        ]
+        self.assertEqual(
+            list(timestamps_ns(responses, "quote.timestamp")),
+            [r.quote.timestamp.ToNanoseconds() for r in responses],
+        )
+
+    def test_to_datetime_matches_protobuf(self):
+        # Доли микросекунды отбрасываются в сторону прошлого, как
+        # в Timestamp.ToDatetime, в том числе до эпохи.
+        for seconds, nanos in TIMESTAMPS:
+            timestamp = _timestamp(seconds, nanos)
+            for tz in (UTC, MSK):
+                self.assertEqual(
+                    to_datetime(timestamp_ns(timestamp), tz),
+                    timestamp.ToDatetime(tzinfo=tz),
+                    (seconds, nanos, tz),
+                )
+
+    def test_to_datetime_before_epoch(self):
+        self.assertEqual(
+            to_datetime(-1),
+            datetime.datetime(1969, 12, 31, 23, 59, 59, 999_999, UTC),
+        )
+        self.assertEqual(
+            to_datetime(-1_500),
+            datetime.datetime(1969, 12, 31, 23, 59, 59, 999_998, UTC),
+        )
+        self.assertEqual(
+            to_datetime(999), datetime.datetime(1970, 1, 1, tzinfo=UTC)
+        )
+
+
+class StreamTimestampsTest(unittest.TestCase):
+    def test_fields_exist(self):
+        pool = symbol_database.Default().pool
+        for name, (items, field) in STREAM_TIMESTAMPS.items():
+            with self.subTest(name):
+                response = pool.FindMessageTypeByName(name)
+                items_field = response.fields_by_name[items]
+                self.assertTrue(items_field.is_repeated)
+                timestamp = items_field.message_type.fields_by_name[field]
+                self.assertEqual(
+                    timestamp.message_type.full_name,
+                    Timestamp.DESCRIPTOR.full_name,
+                )
+
+
+def _responses() -> list[SubscribeQuoteResponse]:
+    return [
+        SubscribeQuoteResponse(quote=[_quote(*TIMESTAMPS[3])]),
+        SubscribeQuoteResponse(
+            quote=[_quote(*TIMESTAMPS[5]), _quote(*TIMESTAMPS[7])]
+        ),
+    ]
+
+
+def _expected() -> list[list[int]]:
+    return [
+        [q.timestamp.ToNanoseconds() for q in response.quote]
+        for response in _responses()
+    ]
+
+
+class TimestampedTest(unittest.IsolatedAsyncioTestCase):
+    def test_inferred_fields(self):
+        stream = timestamped(lambda request: iter(_responses()))
+        batches = list(stream(request=None))
+        self.assertTrue(all(isinstance(b, TimestampedBatch) for b in batches))
+        self.assertEqual([list(b.ts_ns) for b in batches], _expected())
+        self.assertEqual([ts_ns for ts_ns, _ in batches[1]], _expected()[1])
+        self.assertEqual(
+            batches[1].datetime(1),
+            _timestamp(*TIMESTAMPS[7]).ToDatetime(tzinfo=UTC),
+        )
+
+    async def test_async_inferred_fields(self):
+        async def subscribe(request):
+            for response in _responses():
+                yield response
+
+        batches = [b async for b in timestamped(subscribe)(request=None)]
+        self.assertEqual([list(b.ts_ns) for b in batches], _expected())
+
+    def test_unknown_stream(self):
+        stream = timestamped(lambda: iter([SubscribeOrderBookResponse()]))()
+        with self.assertRaises(ValueError):
+            next(iter(stream))
+
+    def test_explicit_fields(self):
+        state = OrderState(accept_at=_timestamp(*TIMESTAMPS[6]))
+        stream = timestamped(
+            lambda: iter([SubscribeOrdersResponse(orders=[state])]),
+            items="orders",
+            field="accept_at",
+        )()
+        (batch,) = stream
+        self.assertEqual(list(batch.ts_ns), [state.accept_at.ToNanoseconds()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from decimal import Decimal
+
+from google.type.decimal_pb2 import Decimal as DecimalValue
+
+from finam_grpc_client.proto.grpc.tradeapi.v1.orders.orders_service_pb2 import (
+    Order,
+)
+from finam_grpc_client.proto.grpc.tradeapi.v1.side_pb2 import (
+    SIDE_BUY,
+    SIDE_SELL,
+)
+from finam_grpc_client.validation import (
+    InstrumentRules,
+    OrderValidationError,
+    OrderValidator,
+)
+
+HOUR = 3600 * 10**9
+DAY = 24 * HOUR
+
+
+def _rules(**kwargs) -> InstrumentRules:
+    values = dict(
+        symbol="SBER@MISX",
+        lot_size=Decimal(1),
+        price_step=Decimal("0.01"),
+        longable=True,
+        shortable=True,
+        tradable=True,
+    )
+    values.update(kwargs)
+    return InstrumentRules(**values)
+
+
+def _order(side: int, quantity: str) -> Order:
+    return Order(
+        account_id="A",
+        symbol="SBER@MISX",
+        quantity=DecimalValue(value=quantity),
+        side=side,
+    )
+
+
+class BuyToCoverTest(unittest.TestCase):
+    def validator(self, position: str) -> OrderValidator:
+        return OrderValidator(
+            [_rules(longable=False)],
+            position=lambda account_id, symbol: Decimal(position),
+        )
+
+    def test_buy_closing_short_is_allowed(self):
+        self.validator("-10").validate(_order(SIDE_BUY, "10"))
+
+    def test_buy_opening_long_is_rejected(self):
+        with self.assertRaises(OrderValidationError) as error:
+            self.validator("-10").validate(_order(SIDE_BUY, "11"))
+        self.assertEqual(error.exception.reason, "long is not available")
+
+    def test_buy_without_short_is_rejected(self):
+        with self.assertRaises(OrderValidationError):
+            self.validator("0").validate(_order(SIDE_BUY, "1"))
+
+    def test_buy_without_position_source_is_rejected(self):
+        validator = OrderValidator([_rules(longable=False)])
+        with self.assertRaises(OrderValidationError):
+            validator.validate(_order(SIDE_BUY, "1"))
+
+    def test_sell_from_position_is_allowed(self):
+        validator = OrderValidator(
+            [_rules(shortable=False)],
+            position=lambda account_id, symbol: Decimal(5),
+        )
+        validator.validate(_order(SIDE_SELL, "5"))
+        with self.assertRaises(OrderValidationError):
+            validator.validate(_order(SIDE_SELL, "6"))
+
+
+class ScheduleHorizonTest(unittest.TestCase):
+    start = 1_750_000_000 * 10**9
+
+    def rules(self, schedule_end: int | None = None) -> InstrumentRules:
+        return _rules(
+            sessions=((self.start, self.start + 8 * HOUR),),
+            schedule_end=schedule_end,
+        )
+
+    def test_inside_session(self):
+        self.assertTrue(self.rules().is_trading_at(self.start + HOUR))
+
+    def test_outside_session_within_schedule(self):
+        rules = self.rules(schedule_end=self.start + DAY)
+        self.assertFalse(rules.is_trading_at(self.start + 10 * HOUR))
+        self.assertFalse(rules.is_trading_at(self.start - HOUR))
+
+    def test_after_schedule_end_is_unknown(self):
+        rules = self.rules(schedule_end=self.start + DAY)
+        self.assertTrue(rules.is_trading_at(self.start + DAY))
+        self.assertTrue(rules.is_trading_at(self.start + 2 * DAY + HOUR))
+
+    def test_schedule_end_defaults_to_last_session(self):
+        self.assertTrue(self.rules().is_trading_at(self.start + DAY))
+
+    def test_validator_accepts_order_next_day(self):
+        validator = OrderValidator([self.rules(self.start + DAY)])
+        order = _order(SIDE_BUY, "1")
+        with self.assertRaises(OrderValidationError):
+            validator.validate(order, now_ns=self.start + 12 * HOUR)
+        validator.validate(order, now_ns=self.start + DAY + HOUR)
+
+
+if __name__ == "__main__":
+    unittest.main()
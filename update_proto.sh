@@ -1,4 +1,12 @@
 #!/bin/bash
+# Использование: ./update_proto.sh [--lean]
+# --lean - сборка без опций protoc-gen-openapiv2, которые описывают
+# только REST-шлюз: меньше дескрипторов, памяти и времени импорта.
+
+lean=false
+if [ "$1" = "--lean" ]; then
+    lean=true
+fi
 
 google_location=$(pip show googleapis-common-protos | grep Location | awk '{print $2}')
 proto_path=./finam-trade-api/proto
@@ -24,6 +32,12 @@ find "$output_path" -type f -name "*.proto" | while read -r proto_file; do
 done
 echo "Замена импортов завершена"
 
+if [ "$lean" = true ]; then
+    echo "Удаление опций openapiv2"
+    python strip_openapiv2.py "$output_path"
+    rm -rf "$output_path/protoc_gen_openapiv2"
+fi
+
 echo "Генерация кода GRPC"
 find "$output_path" -name "*.proto" -exec python -m grpc_tools.protoc -I. \
   --python_out=. \